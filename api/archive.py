@@ -0,0 +1,184 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError, CollectionInvalid
+
+from period_summaries import NO_ENTRIES_NOTE, outdated_days
+
+ARCHIVE_COLLECTION = "entry_archive"
+
+
+def ensure_archive_collection(db):
+    """Create the archive collection with zstd block compression (cold data is read rarely)."""
+    try:
+        db.create_collection(
+            ARCHIVE_COLLECTION,
+            storageEngine={"wiredTiger": {"configString": "block_compressor=zstd"}}
+        )
+    except CollectionInvalid:
+        pass  # Already exists
+    db[ARCHIVE_COLLECTION].create_index([("discordId", 1), ("timestamp", -1)])
+
+
+def collection_size(db, name: str) -> dict:
+    stats = db.command("collStats", name)
+    return {
+        "documents": stats.get("count", 0),
+        "dataBytes": stats.get("size", 0),
+        "storageBytes": stats.get("storageSize", 0),
+        "indexBytes": stats.get("totalIndexSize", 0),
+    }
+
+
+class EntryArchiver:
+    """
+    Hot/cold tiering for entries: days older than `after_days` move from the entry
+    collection to entry_archive once they have a daily summary, which stays in the
+    summary collection as the hot representation of the day.
+
+    Days without a summary are summarized first through `summarize_day` when given,
+    otherwise they stay hot until one exists. Entries are copied before they are deleted,
+    so an interrupted run is simply finished by the next one.
+    """
+
+    def __init__(
+        self,
+        db,
+        summarize_day: Optional[Callable[[str, str], Awaitable[None]]] = None,
+        after_days: int = 90,
+        max_days_per_run: int = 500
+    ):
+        self.db = db
+        self.entries = db.entry
+        self.archive = db[ARCHIVE_COLLECTION]
+        self.summaries = db.summary
+        self.checkpoints = db.summary_checkpoint
+        self.summarize_day = summarize_day
+        self.after_days = after_days
+        self.max_days_per_run = max_days_per_run
+
+    def cutoff(self) -> datetime:
+        """Entries before this (UTC midnight, after_days ago) belong in the archive."""
+        today = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+        return today - timedelta(days=self.after_days)
+
+    def _cold_days(self) -> Dict[str, List[str]]:
+        pipeline = [
+            # Entries without a localDate haven't been migrated yet (see local_dates.py)
+            {"$match": {"timestamp": {"$lt": self.cutoff()}, "localDate": {"$exists": True}}},
+            {"$group": {"_id": {"discordId": "$discordId", "date": "$localDate"}}},
+            {"$sort": {"_id.date": 1}},
+        ]
+        days = {}
+        for doc in self.entries.aggregate(pipeline, allowDiskUse=True):
+            days.setdefault(doc["_id"]["discordId"], []).append(doc["_id"]["date"])
+        return days
+
+    def _summarized(self, discord_id: str, dates: List[str]) -> List[str]:
+        # A "no entries" placeholder (stored when the user asked before writing) or a summary
+        # stored before the day was over doesn't cover the day's entries, so those days are
+        # summarized first
+        docs = {doc["_id"]["date"]: doc for doc in self.summaries.find({
+            "_id": {"$in": [{"discordId": discord_id, "date": d} for d in dates]},
+            "notes": {"$ne": NO_ENTRIES_NOTE}
+        }, {"_id": 1, "notes": 1, "entryCount": 1})}
+        return sorted(set(docs) - outdated_days(self.entries, discord_id, docs))
+
+    def _move_day(self, discord_id: str, date_str: str) -> int:
+        docs = list(self.entries.find({"discordId": discord_id, "localDate": date_str}))
+        if not docs:
+            return 0
+        try:
+            self.archive.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Already archived by an interrupted run; anything else is a real failure
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+        self.entries.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        # The checkpoint was only needed to summarize the day
+        self.checkpoints.delete_one({"_id": {"discordId": discord_id, "date": date_str}})
+        return len(docs)
+
+    async def run_once(self) -> dict:
+        """
+        Archive a batch of cold days: at most max_days_per_run days are moved or summarized.
+        Returns counts of moved entries and days, and of days summarized for archiving.
+        """
+        cold = await asyncio.to_thread(self._cold_days)
+        budget = self.max_days_per_run
+        moved_entries = moved_days = summarized_days = waiting_days = 0
+
+        async def move(discord_id, dates):
+            nonlocal budget, moved_entries, moved_days
+            for date_str in dates[:budget]:
+                moved_entries += await asyncio.to_thread(self._move_day, discord_id, date_str)
+                moved_days += 1
+            budget -= min(len(dates), budget)
+
+        for discord_id, dates in cold.items():
+            if budget <= 0:
+                break
+            summarized = await asyncio.to_thread(self._summarized, discord_id, dates)
+            await move(discord_id, summarized)
+            missing = sorted(set(dates) - set(summarized))
+            if self.summarize_day and missing and budget > 0:
+                attempted = missing[:budget]
+                budget -= len(attempted)
+                for date_str in attempted:
+                    try:
+                        await self.summarize_day(discord_id, date_str)
+                    except Exception as e:
+                        print(f"⚠️ Could not summarize {date_str} for user {discord_id} before archiving: {e}")
+                newly_summarized = await asyncio.to_thread(self._summarized, discord_id, attempted)
+                summarized_days += len(newly_summarized)
+                budget += len(newly_summarized)  # moving them is part of the same unit of work
+                await move(discord_id, newly_summarized)
+                missing = sorted(set(missing) - set(newly_summarized))
+            waiting_days += len(missing)
+        if moved_days or waiting_days:
+            print(f"🗄️ Archived {moved_entries} entries from {moved_days} days, {waiting_days} days waiting for a summary")
+        return {"entries": moved_entries, "days": moved_days, "summarized": summarized_days, "waitingForSummary": waiting_days}
+
+    def report(self) -> dict:
+        """Working set of the hot tier vs. the archive, from collStats."""
+        return {
+            "cutoff": self.cutoff().strftime("%Y-%m-%d"),
+            "hot": collection_size(self.db, self.entries.name),
+            "archive": collection_size(self.db, ARCHIVE_COLLECTION),
+            "summaries": collection_size(self.db, self.summaries.name),
+        }
+
+    async def run_periodically(self, interval_seconds: float):
+        """Background task: archive cold days every interval_seconds."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                # Keep going while batches make progress
+                while (await self.run_once())["days"]:
+                    pass
+            except Exception as e:
+                print(f"⚠️ Entry archiving failed: {e}")
+
+
+def is_archived_summary(summary_doc: Optional[dict]) -> bool:
+    """Whether a stored summary can stand in for a day whose entries are no longer hot."""
+    return bool(summary_doc) and summary_doc.get("notes") != NO_ENTRIES_NOTE
+
+
+if __name__ == "__main__":
+    import sys
+    from pymongo import MongoClient
+    from settings import get_settings
+
+    # One-off run: PYTHONPATH=.. python archive.py [--report]
+    # Only days that already have a summary are moved; the API's ARCHIVE_INTERVAL_SECONDS
+    # job also summarizes the rest first.
+    settings = get_settings()
+    db = MongoClient(settings.mongo_connection_string)[settings.mongo_database]
+    ensure_archive_collection(db)
+    archiver = EntryArchiver(db, after_days=settings.archive_after_days)
+    if "--report" not in sys.argv:
+        while asyncio.run(archiver.run_once())["days"]:
+            pass
+    print(archiver.report())
@@ -0,0 +1,204 @@
+import os
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Iterator, Optional
+
+CHUNK_SIZE = 64 * 1024
+
+
+class AudioStorage(ABC):
+    """
+    Where summary audio lives. Keys are plain filenames (e.g. "1234_20251019_20251019.ogg").
+    Backends stream in both directions: save() reads from a file-like object and open()
+    yields chunks, so whole files never have to sit in the API's memory.
+    """
+
+    @abstractmethod
+    def save(self, key: str, data: BinaryIO, content_type: str):
+        ...
+
+    @abstractmethod
+    def open(self, key: str) -> Optional[Iterator[bytes]]:
+        """Chunks of the stored file, or None if it doesn't exist."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether the file is (still) stored; retention may have deleted it."""
+
+    def url_for(self, key: str) -> Optional[str]:
+        """A URL clients can download the file from directly, or None to go through the API."""
+        return None
+
+    @abstractmethod
+    def delete_older_than(self, cutoff: datetime) -> int:
+        """Retention: delete files stored before cutoff. Returns how many were deleted."""
+
+
+class LocalDiskStorage(AudioStorage):
+    """Files in a directory on this machine. Only suitable for a single API replica."""
+
+    def __init__(self, directory: str = "audio"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        # Keys are filenames; never let one escape the audio directory
+        return os.path.join(self.directory, os.path.basename(key))
+
+    def save(self, key, data, content_type):
+        with open(self._path(key), "wb") as f:
+            while chunk := data.read(CHUNK_SIZE):
+                f.write(chunk)
+
+    def open(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        def chunks():
+            with open(path, "rb") as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    yield chunk
+        return chunks()
+
+    def exists(self, key):
+        return os.path.isfile(self._path(key))
+
+    def delete_older_than(self, cutoff):
+        deleted = 0
+        cutoff_ts = cutoff.timestamp()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff_ts:
+                os.remove(path)
+                deleted += 1
+        return deleted
+
+
+class S3Storage(AudioStorage):
+    """
+    S3-compatible object storage (AWS S3, MinIO, ...). Clients get pre-signed URLs,
+    so the bot downloads audio straight from the bucket instead of through the API.
+    Credentials come from the usual AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY variables.
+    """
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, region: Optional[str] = None,
+                 prefix: str = "audio/", url_expiry_seconds: int = 3600):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("The s3 audio storage backend requires boto3 (pip install boto3)")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.url_expiry_seconds = url_expiry_seconds
+        self.s3 = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def save(self, key, data, content_type):
+        # upload_fileobj streams the file in parts
+        self.s3.upload_fileobj(data, self.bucket, self.prefix + key, ExtraArgs={"ContentType": content_type})
+
+    def open(self, key):
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        return response["Body"].iter_chunks(CHUNK_SIZE)
+
+    def exists(self, key):
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except self.s3.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def url_for(self, key):
+        return self.s3.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.prefix + key},
+            ExpiresIn=self.url_expiry_seconds
+        )
+
+    def delete_older_than(self, cutoff):
+        if cutoff.tzinfo is None:
+            cutoff = cutoff.replace(tzinfo=timezone.utc)
+        deleted = 0
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            expired = [{"Key": obj["Key"]} for obj in page.get("Contents", []) if obj["LastModified"] < cutoff]
+            if expired:
+                self.s3.delete_objects(Bucket=self.bucket, Delete={"Objects": expired, "Quiet": True})
+                deleted += len(expired)
+        return deleted
+
+
+class GridFSStorage(AudioStorage):
+    """Files stored in MongoDB with GridFS, shared by every replica without extra infrastructure."""
+
+    def __init__(self, db, bucket_name: str = "audio"):
+        import gridfs
+        self.bucket = gridfs.GridFSBucket(db, bucket_name=bucket_name)
+        self.files = db[f"{bucket_name}.files"]
+
+    def save(self, key, data, content_type):
+        # Replace any previous version so there is one file per key
+        for old in self.files.find({"filename": key}, {"_id": 1}):
+            self.bucket.delete(old["_id"])
+        self.bucket.upload_from_stream(key, data, metadata={"contentType": content_type})
+
+    def open(self, key):
+        import gridfs
+        try:
+            stream = self.bucket.open_download_stream_by_name(key)
+        except gridfs.errors.NoFile:
+            return None
+
+        def chunks():
+            with stream:
+                while chunk := stream.read(CHUNK_SIZE):
+                    yield chunk
+        return chunks()
+
+    def exists(self, key):
+        return self.files.find_one({"filename": key}, {"_id": 1}) is not None
+
+    def delete_older_than(self, cutoff):
+        deleted = 0
+        for old in self.files.find({"uploadDate": {"$lt": cutoff}}, {"_id": 1}):
+            self.bucket.delete(old["_id"])
+            deleted += 1
+        return deleted
+
+
+def create_audio_storage(settings, db) -> AudioStorage:
+    """Build the backend selected by AUDIO_STORAGE (local, s3 or gridfs)."""
+    backend = settings.audio_storage_backend
+    if backend == "local":
+        return LocalDiskStorage(settings.audio_local_dir)
+    if backend == "s3":
+        if not settings.s3_bucket:
+            raise RuntimeError("AUDIO_S3_BUCKET is required for the s3 audio storage backend")
+        return S3Storage(
+            settings.s3_bucket,
+            endpoint_url=settings.s3_endpoint_url,
+            region=settings.s3_region,
+            url_expiry_seconds=settings.audio_url_expiry_seconds
+        )
+    if backend == "gridfs":
+        return GridFSStorage(db)
+    raise RuntimeError(f"Unknown AUDIO_STORAGE backend: {backend}")
+
+
+async def collect_garbage_periodically(storage: AudioStorage, retention_days: float, interval_seconds: float):
+    """Background task: delete audio older than retention_days every interval_seconds."""
+    while True:
+        try:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+            deleted = await asyncio.to_thread(storage.delete_older_than, cutoff)
+            if deleted:
+                print(f"🧹 Deleted {deleted} audio file(s) older than {retention_days:g} days")
+        except Exception as e:
+            print(f"⚠️ Audio retention cleanup failed: {e}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,162 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from pymongo import UpdateOne
+
+from local_dates import DEFAULT_TIMEZONE, to_local, user_timezones
+
+# Longest range /users/{id}/stats will compute, so a request reads at most this many rollups
+MAX_STATS_DAYS = 366
+
+
+def stats_key(discord_id: str, timestamp: datetime) -> dict:
+    return {"discordId": discord_id, "date": timestamp.strftime("%Y-%m-%d")}
+
+
+def rollup_update(role: str, timestamp: datetime) -> dict:
+    """$inc/$max update counting one entry in its day's rollup."""
+    if role == "user":
+        return {
+            "$inc": {"entries": 1, "userEntries": 1, f"hours.{timestamp.hour}": 1},
+            "$max": {"lastUserAt": timestamp}
+        }
+    return {
+        "$inc": {"entries": 1, "botEntries": 1},
+        "$max": {"lastBotAt": timestamp}
+    }
+
+
+class DailyStats:
+    """
+    Per-user, per-day activity rollups in the daily_stats collection, updated as entries
+    are written so the stats endpoint never scans the entry collection. Callers pass
+    timestamps in the user's local time, so days and hours are the user's own.
+
+    One document per user-day:
+        _id: {discordId, date}
+        entries, userEntries, botEntries
+        hours: {"<hour>": user entries in that hour of the day}
+        lastBotAt, lastUserAt
+        latencySum, latencyCount, latencyMax: seconds from a bot check-in to the user's reply
+    Check-ins answered after midnight are not counted towards latency.
+    """
+
+    def __init__(self, stats_collection):
+        self.stats = stats_collection
+
+    def record_entry(self, discord_id: str, timestamp: datetime, role: str):
+        """Count one entry. User replies to a check-in also record the response latency."""
+        try:
+            key = stats_key(discord_id, timestamp)
+            before = self.stats.find_one_and_update({"_id": key}, rollup_update(role, timestamp), upsert=True)
+            if role != "user" or not before or not before.get("lastBotAt"):
+                return
+            last_bot, last_user = before["lastBotAt"], before.get("lastUserAt")
+            # First user entry since the bot's last message is the reply to it
+            if last_bot <= timestamp and (last_user is None or last_user < last_bot):
+                latency = (timestamp - last_bot).total_seconds()
+                self.stats.update_one({"_id": key}, {
+                    "$inc": {"latencySum": latency, "latencyCount": 1},
+                    "$max": {"latencyMax": latency}
+                })
+        except Exception as e:
+            # Stats are best effort, never fail the write that triggered them
+            print(f"⚠️ Failed to update daily stats for user {discord_id}: {e}")
+
+    def record_entries(self, entries: Iterable[dict]):
+        """Count a batch of entries (bot messages from /entries/bulk) with one bulk write."""
+        updates = [
+            UpdateOne({"_id": stats_key(e["discordId"], e["timestamp"])}, rollup_update(e["role"], e["timestamp"]), upsert=True)
+            for e in entries
+        ]
+        if not updates:
+            return
+        try:
+            self.stats.bulk_write(updates, ordered=False)
+        except Exception as e:
+            print(f"⚠️ Failed to update daily stats for {len(updates)} entries: {e}")
+
+    def rebuild(self, entries_collection, discord_id: Optional[str] = None, timezones: Optional[Dict[str, str]] = None) -> int:
+        """
+        Recompute rollups from the entry collection (backfill for existing history).
+        timezones maps discordId to the user's timezone (default UTC).
+        Scans every entry, so this is a maintenance job, not something to run per request.
+        """
+        timezones = timezones or {}
+        query = {"discordId": discord_id} if discord_id else {}
+        self.stats.delete_many({"_id.discordId": discord_id} if discord_id else {})
+        count = 0
+        for entry in entries_collection.find(query, {"discordId": 1, "timestamp": 1, "role": 1}).sort("timestamp", 1):
+            local_time = to_local(entry["timestamp"], timezones.get(entry["discordId"], DEFAULT_TIMEZONE))
+            self.record_entry(entry["discordId"], local_time, entry["role"])
+            count += 1
+        return count
+
+    def load(self, discord_id: str, start: date, end: date) -> List[dict]:
+        # Exact _id lookups use the _id index, unlike range queries on its subfields
+        keys = [{"discordId": discord_id, "date": (start + timedelta(days=i)).isoformat()} for i in range((end - start).days + 1)]
+        return list(self.stats.find({"_id": {"$in": keys}}))
+
+    def summarize(self, discord_id: str, start: date, end: date, today: Optional[date] = None) -> dict:
+        """
+        Dashboard numbers for start..end (inclusive), from at most one rollup per day.
+        today is the user's current local date, for the current streak.
+        """
+        today = today or date.today()
+        days = (end - start).days + 1
+        docs = self.load(discord_id, start, end)
+
+        entries = np.zeros(days, dtype=np.int64)
+        user_entries = np.zeros(days, dtype=np.int64)
+        hours = np.zeros((days, 24), dtype=np.int64)
+        latency = np.zeros(3)  # sum, count, max
+        for doc in docs:
+            i = (date.fromisoformat(doc["_id"]["date"]) - start).days
+            entries[i] = doc.get("entries", 0)
+            user_entries[i] = doc.get("userEntries", 0)
+            for hour, n in (doc.get("hours") or {}).items():
+                hours[i, int(hour)] = n
+            latency[0] += doc.get("latencySum", 0)
+            latency[1] += doc.get("latencyCount", 0)
+            latency[2] = max(latency[2], doc.get("latencyMax", 0))
+
+        # Streaks: run lengths of consecutive days with at least one user entry
+        active = user_entries > 0
+        edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+        run_starts = np.flatnonzero(edges == 1)
+        run_lengths = np.flatnonzero(edges == -1) - run_starts
+        longest = int(run_lengths.max()) if run_lengths.size else 0
+        # Current streak ends on the last day of the range (or the day before, if it's today and quiet)
+        last = days - 1 if active[-1] or end < today else days - 2
+        current = int(run_lengths[-1]) if run_lengths.size and run_starts[-1] + run_lengths[-1] - 1 == last else 0
+
+        return {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "activeDays": int(active.sum()),
+            "totalEntries": int(entries.sum()),
+            "userEntries": int(user_entries.sum()),
+            "currentStreak": current,
+            "longestStreak": longest,
+            "entriesPerHour": hours.sum(axis=0).tolist(),
+            "checkInsAnswered": int(latency[1]),
+            "averageResponseSeconds": float(latency[0] / latency[1]) if latency[1] else None,
+            "maxResponseSeconds": float(latency[2]) if latency[1] else None,
+            "entriesPerDay": [
+                {"date": (start + timedelta(days=i)).isoformat(), "entries": int(n)}
+                for i, n in enumerate(entries)
+            ],
+        }
+
+
+if __name__ == "__main__":
+    import sys
+    from pymongo import MongoClient
+    from settings import get_settings
+
+    # Backfill: python daily_stats.py [discord_id]
+    settings = get_settings()
+    db = MongoClient(settings.mongo_connection_string)[settings.mongo_database]
+    counted = DailyStats(db.daily_stats).rebuild(db.entry, sys.argv[1] if len(sys.argv) > 1 else None, user_timezones(db.user))
+    print(f"✅ Rebuilt daily stats from {counted} entries")
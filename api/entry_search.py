@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# Compound text index: the discordId prefix keeps every search inside one user's entries,
+# so query cost depends on that user's matches, not on the size of the collection.
+SEARCH_INDEX_NAME = "discordId_content_text"
+
+
+def ensure_search_index(entries_collection):
+    """Create the text index used by search_entries (a no-op if it already exists)."""
+    entries_collection.create_index(
+        [("discordId", 1), ("content", "text")],
+        name=SEARCH_INDEX_NAME,
+        default_language="english"
+    )
+
+
+def search_entries(
+    entries_collection,
+    discord_id: str,
+    query: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    role: Optional[str] = None,
+    sort: str = "relevance",
+    page: int = 1,
+    page_size: int = 10,
+    archive_collection=None
+) -> Tuple[List[dict], bool]:
+    """
+    Full-text search over one user's entries.
+    Supports MongoDB $text syntax: "exact phrases" and -excluded words.
+
+    Returns (entries, has_more). Each entry carries its text relevance in "score".
+    sort is "relevance" (best match first, newest first on ties) or "newest".
+    With archive_collection, archived entries are searched too and merged into the ranking.
+    """
+    filters = {"discordId": discord_id, "$text": {"$search": query}}
+    if start or end:
+        filters["timestamp"] = {}
+        if start:
+            filters["timestamp"]["$gte"] = start
+        if end:
+            filters["timestamp"]["$lte"] = end
+    if role:
+        filters["role"] = role
+
+    score = {"$meta": "textScore"}
+    order = [("score", score), ("timestamp", -1)] if sort == "relevance" else [("timestamp", -1)]
+    skip = (page - 1) * page_size
+    if archive_collection is None:
+        # One extra document tells us whether there is another page without counting every match
+        results = list(entries_collection.find(filters, {"score": score}).sort(order).skip(skip).limit(page_size + 1))
+        return results[:page_size], len(results) > page_size
+
+    # Both tiers: the first skip + page_size + 1 of each, merged in the same order
+    results = []
+    for collection in (entries_collection, archive_collection):
+        results.extend(collection.find(filters, {"score": score}).sort(order).limit(skip + page_size + 1))
+    if sort == "relevance":
+        results.sort(key=lambda doc: (doc["score"], doc["timestamp"]), reverse=True)
+    else:
+        results.sort(key=lambda doc: doc["timestamp"], reverse=True)
+    return results[skip:skip + page_size], len(results) > skip + page_size
@@ -0,0 +1,23 @@
+# Production server config: gunicorn process manager with uvicorn workers.
+# Run with: gunicorn main:app -c gunicorn.conf.py
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('API_INTERNAL_PORT', '8000')}"
+
+# Requests spend most of their time waiting on MongoDB and OpenAI, so run more workers than cores
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Each worker opens its own MongoDB/OpenAI pools in the FastAPI lifespan hook after fork,
+# so the app must not be imported in the master process
+preload_app = False
+
+# On SIGTERM workers stop accepting, finish in-flight requests and drain LLM calls.
+# Keep this above LLM_DRAIN_TIMEOUT so the drain is never cut short.
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "60"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
@@ -0,0 +1,98 @@
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from pymongo import UpdateOne
+
+# Users who never set a timezone (IANA name, e.g. "America/Vancouver")
+DEFAULT_TIMEZONE = "UTC"
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> ZoneInfo:
+    """ZoneInfo for an IANA timezone name. Raises ValueError for unknown names."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"Unknown timezone: {name}") from e
+
+
+def is_valid_timezone(name: str) -> bool:
+    try:
+        get_zone(name)
+        return True
+    except ValueError:
+        return False
+
+
+def to_local(timestamp: datetime, tz_name: str) -> datetime:
+    """A stored (naive UTC) timestamp as naive wall-clock time in tz_name."""
+    return timestamp.replace(tzinfo=timezone.utc).astimezone(get_zone(tz_name)).replace(tzinfo=None)
+
+
+def local_date(timestamp: datetime, tz_name: str) -> str:
+    """The user's calendar day (YYYY-MM-DD) for a stored timestamp, as written to entry.localDate."""
+    return to_local(timestamp, tz_name).strftime("%Y-%m-%d")
+
+
+def local_today(tz_name: str) -> date:
+    return datetime.now(get_zone(tz_name)).date()
+
+
+def utc_day_bounds(date_str: str, tz_name: str) -> Tuple[datetime, datetime]:
+    """First and last instant of a local YYYY-MM-DD day, as naive UTC datetimes."""
+    day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    zone = get_zone(tz_name)
+    start = datetime.combine(day, time.min, zone).astimezone(timezone.utc).replace(tzinfo=None)
+    end = datetime.combine(day + timedelta(days=1), time.min, zone).astimezone(timezone.utc).replace(tzinfo=None)
+    return start, end - timedelta(microseconds=1)
+
+
+def user_timezones(users_collection) -> Dict[str, str]:
+    """discordId -> timezone for every user who has set one."""
+    return {
+        doc["_id"]["discordId"]: doc["preferences"]["timezone"]
+        for doc in users_collection.find({"preferences.timezone": {"$exists": True}}, {"preferences.timezone": 1})
+    }
+
+
+def backfill_local_dates(entries_collection, timezones: Dict[str, str], batch_size: int = 1000) -> int:
+    """
+    Set localDate on every entry that doesn't have one, in batches of bulk updates.
+    Walks the collection in _id order, so it can be interrupted and rerun at any time.
+    """
+    updated = 0
+    last_id = None
+    while True:
+        query = {"localDate": {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(entries_collection.find(query, {"discordId": 1, "timestamp": 1}).sort("_id", 1).limit(batch_size))
+        if not batch:
+            return updated
+        entries_collection.bulk_write([
+            UpdateOne(
+                {"_id": doc["_id"], "localDate": {"$exists": False}},
+                {"$set": {"localDate": local_date(doc["timestamp"], timezones.get(doc["discordId"], DEFAULT_TIMEZONE))}}
+            )
+            for doc in batch
+        ], ordered=False)
+        updated += len(batch)
+        last_id = batch[-1]["_id"]
+        print(f"🗓️ {entries_collection.name}: localDate set on {updated} entries")
+
+
+if __name__ == "__main__":
+    from pymongo import MongoClient
+    from settings import get_settings
+    from archive import ARCHIVE_COLLECTION
+
+    # Migration: PYTHONPATH=.. python local_dates.py
+    # Run once after deploying localDate, then rebuild the stats with python daily_stats.py
+    settings = get_settings()
+    db = MongoClient(settings.mongo_connection_string)[settings.mongo_database]
+    timezones = user_timezones(db.user)
+    db.entry.create_index([("discordId", 1), ("localDate", 1), ("timestamp", 1)])
+    for name in ("entry", ARCHIVE_COLLECTION):
+        print(f"✅ Backfilled localDate on {backfill_local_dates(db[name], timezones)} {name} documents")
@@ -1,58 +1,248 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
-from pydantic import BaseModel, Field, ConfigDict
+from time import perf_counter
+_IMPORT_STARTED = perf_counter()
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import List, Optional
-from datetime import datetime, time
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
+from datetime import date, datetime, time, timedelta, timezone
+from contextlib import asynccontextmanager
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 from bson import ObjectId
+import io
 import os
-import sys
 import re
-from dotenv import load_dotenv
-
-# Add path to import from llm directory
-sys.path.append(os.path.join(os.path.dirname(__file__), 'llm'))
-from summarizer import generate_summarizer
-from oneTurnCall import generate_one_turn_response
-from tts import text_to_speech
+import secrets
+import threading
 
-# Load environment variables
-load_dotenv()
+from llm import generate_summarizer, generate_one_turn_response, quick_reply_response
+from llm.llm_client import close_openai_client, drain as drain_llm_calls
+from llm.router import load_routes, router as model_router
+from llm.reply_cache import reply_cache
+from llm.PROMPTS import PERSONAS, QUICK_REPLY_OPTIONS
+from llm.tts import AUDIO_FORMATS, VOICES, generate_filename, media_type_for, synthesize_speech
+from llm.usage import for_user, usage_ledger
+from settings import get_settings
+from user_cache import UserProfileCache, watch_user_changes
+from rolling_summaries import RollingSummaries, to_summarizer_entry, unfolded_filter
+from period_summaries import PeriodSummaries
+from summary_prewarm import SummaryPrewarmer
+from mongo_profiles import MongoProfiles, load_profiles
+from usage_ledger import USAGE_COLLECTION, UsageLedgerWriter
+from audio_storage import create_audio_storage, collect_garbage_periodically
+from daily_stats import DailyStats, MAX_STATS_DAYS
+from entry_search import ensure_search_index, search_entries
+from memories import UserMemories
+from archive import ARCHIVE_COLLECTION, EntryArchiver, ensure_archive_collection, is_archived_summary
+from local_dates import DEFAULT_TIMEZONE, is_valid_timezone, local_date, local_today, to_local, utc_day_bounds
+from profiling import MODES as PROFILE_MODES, profiler, task_report
+import asyncio
 
 # --- MongoDB Connection ---
-MONGO_CONNECTION_STRING = os.getenv("connection_string")
-
-if not MONGO_CONNECTION_STRING:
-    raise RuntimeError("MongoDB connection string not found in .env file")
-
+# Created per worker in lifespan(), never at import time: MongoClient is not fork-safe,
+# and importing the app must not depend on the network.
+mongo = None
 client = None
 db = None
 users_collection = None
 summaries_collection = None
 entries_collection = None
+checkpoints_collection = None
+archive_collection = None
+daily_stats = None
+user_memories = None
+archiver = None
+rolling_summaries = None
+period_summaries = None
+summary_prewarmer = None
+usage_writer = None
+audio_storage = None
+draining = False
+startup_seconds = None
+user_profiles = UserProfileCache()
 
-try:
-    client = MongoClient(MONGO_CONNECTION_STRING)
-    # Test the connection
-    client.admin.command('ping')
-    print("Connected to MongoDB successfully!")
-    
-    # Set up database and collections
-    db = client.main
+def ensure_indexes():
+    """Create the indexes the API relies on. Runs in the background so startup never waits on MongoDB."""
+    try:
+        # Recent entries of a user: context queries, summaries
+        entries_collection.create_index([("discordId", 1), ("timestamp", -1)])
+        # A user's entries inserted since an _id: memory catch-up
+        entries_collection.create_index([("discordId", 1), ("_id", 1)])
+        # One day of a user's entries in order: daily summaries, rolling checkpoints, archiving
+        entries_collection.create_index([("discordId", 1), ("localDate", 1), ("timestamp", 1)])
+        # Everyone with entries on a local date: rolling summary passes, prewarming, nightly summaries
+        entries_collection.create_index([("localDate", 1), ("discordId", 1), ("role", 1)])
+        # Retried POST /entries calls carry the same Idempotency-Key
+        entries_collection.create_index("idempotencyKey", unique=True, sparse=True)
+        ensure_search_index(entries_collection)
+        ensure_archive_collection(db)
+        ensure_search_index(archive_collection)
+    except Exception as e:
+        print(f"⚠️ Failed to create indexes: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the MongoDB pool for this worker and drain LLM calls on shutdown."""
+    global mongo, client, db, users_collection, summaries_collection, entries_collection, checkpoints_collection, daily_stats
+    global archive_collection, archiver
+    global rolling_summaries, period_summaries, summary_prewarmer, usage_writer, audio_storage, draining, startup_seconds, user_profiles, user_memories
+
+    settings = get_settings()
+    if not settings.mongo_connection_string:
+        raise RuntimeError("MongoDB connection string not found in .env file")
+
+    # One pool per operation profile (see mongo_profiles.py); background jobs use "default".
+    # Clients connect on their first operation; /readyz does the ping
+    mongo = MongoProfiles(settings.mongo_connection_string, settings.mongo_database,
+                          load_profiles(settings.mongo_profiles_file))
+    client = mongo.client("default")
+    db = client[settings.mongo_database]
     users_collection = db.user
     summaries_collection = db.summary
     entries_collection = db.entry
-    
-except ConnectionFailure as e:
-    raise RuntimeError(f"Could not connect to MongoDB: {e}")
-except Exception as e:
-    raise RuntimeError(f"Error connecting to MongoDB: {e}")
+    checkpoints_collection = db.summary_checkpoint
+    archive_collection = db[ARCHIVE_COLLECTION]
+    daily_stats = DailyStats(db.daily_stats)
+
+    user_profiles = UserProfileCache(settings.user_cache_size, settings.user_cache_ttl_seconds)
+    stop_watching = threading.Event()
+    if settings.user_cache_change_stream:
+        threading.Thread(
+            target=watch_user_changes,
+            args=(users_collection, user_profiles, stop_watching),
+            daemon=True
+        ).start()
+
+    rolling_summaries = RollingSummaries(
+        checkpoints_collection,
+        entries_collection,
+        db.summary_checkpoint_lease,
+        every_entries=settings.rolling_summary_every_entries
+    )
+    period_summaries = PeriodSummaries(
+        summaries_collection,
+        build_daily_summary,
+        entries_collection,
+        concurrency=settings.period_summary_concurrency,
+        today_for=user_today
+    )
+    rolling_task = asyncio.create_task(
+        rolling_summaries.run_periodically(settings.rolling_summary_interval_seconds)
+    )
+
+    index_task = asyncio.create_task(asyncio.to_thread(ensure_indexes))
+
+    archiver = EntryArchiver(db, summarize_day_for_archive, after_days=settings.archive_after_days)
+    archive_task = None
+    if settings.archive_interval_seconds > 0:
+        archive_task = asyncio.create_task(archiver.run_periodically(settings.archive_interval_seconds))
+
+    summary_prewarmer = SummaryPrewarmer(
+        db,
+        build_daily_summary,
+        store_summary_audio,
+        lead_minutes=settings.summary_prewarm_lead_minutes,
+        max_in_flight=settings.summary_prewarm_max_in_flight
+    )
+    prewarm_task = None
+    if settings.summary_prewarm_interval_seconds > 0:
+        prewarm_task = asyncio.create_task(summary_prewarmer.run_periodically(settings.summary_prewarm_interval_seconds))
+
+    # LLM and TTS usage per user per day, counted in memory and written in batches
+    usage_ledger.daily_token_quota = settings.usage_daily_token_quota
+    usage_ledger.daily_tts_char_quota = settings.usage_daily_tts_char_quota
+    usage_writer = UsageLedgerWriter(mongo.collection("bulk_log_write", USAGE_COLLECTION))
+    usage_task = asyncio.create_task(usage_writer.run_periodically(settings.usage_flush_seconds))
+
+    # Settings are read after .env is loaded, unlike the llm package's import-time defaults
+    model_router.routes = load_routes(settings.llm_routes_file)
+    reply_cache.enabled = settings.reply_cache_enabled
+    reply_cache.max_entries = settings.reply_cache_max_entries
+    reply_cache.ttl_seconds = settings.reply_cache_ttl_seconds
+    reply_cache.variants = settings.reply_cache_variants
+
+    if settings.memory_enabled:
+        user_memories = UserMemories(
+            entries_collection,
+            summaries_collection,
+            max_rows=settings.memory_max_rows,
+            top_k=settings.memory_top_k,
+            min_score=settings.memory_min_score
+        )
+
+    # Shared by every replica unless AUDIO_STORAGE=local
+    audio_storage = create_audio_storage(settings, db)
+    audio_gc_task = None
+    if settings.audio_retention_days > 0:
+        audio_gc_task = asyncio.create_task(collect_garbage_periodically(
+            audio_storage, settings.audio_retention_days, settings.audio_gc_interval_seconds
+        ))
+
+    # The OpenAI client is created lazily on the first LLM call in this worker
+    startup_seconds = perf_counter() - _IMPORT_STARTED
+    print(f"✅ Worker {os.getpid()} ready in {startup_seconds * 1000:.0f} ms")
+
+    yield
+
+    # Stop advertising readiness, then let running LLM calls finish before closing pools
+    draining = True
+    stop_watching.set()
+    rolling_task.cancel()
+    index_task.cancel()
+    if archive_task:
+        archive_task.cancel()
+    if prewarm_task:
+        prewarm_task.cancel()
+    if audio_gc_task:
+        audio_gc_task.cancel()
+    usage_task.cancel()
+    print(f"🛑 Worker {os.getpid()} shutting down, draining in-flight LLM calls...")
+    remaining = await drain_llm_calls(timeout=settings.llm_drain_timeout)
+    if remaining:
+        print(f"⚠️ {remaining} LLM call(s) still running after {settings.llm_drain_timeout}s, closing anyway")
+    await close_openai_client()
+    try:
+        await asyncio.to_thread(usage_writer.flush)
+    except Exception as e:
+        print(f"⚠️ Failed to flush usage ledger on shutdown: {e}")
+    mongo.close()
+    print(f"✅ Worker {os.getpid()} shut down cleanly")
 
 # --- End MongoDB Connection ---
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+
+class CountProfiledRequests:
+    """
+    ASGI middleware that counts finished requests while a profile is running (see profiling/__init__.py).
+    Otherwise it costs one attribute check per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not profiler.active or scope["type"] != "http" or scope["path"].startswith("/admin/"):
+            return await self.app(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.request_finished()
+
+
+app.add_middleware(CountProfiledRequests)
+
+@app.exception_handler(PyMongoError)
+async def mongo_error(request, exc: PyMongoError):
+    """An operation over its profile's max_time_ms (see mongo_profiles.py) is a 503 the bot retries."""
+    if exc.timeout:
+        print(f"⏱️ MongoDB timeout on {request.url.path}: {exc}")
+        return JSONResponse(status_code=503, content={"detail": "Database timeout"}, headers={"Retry-After": "1"})
+    print(f"❌ MongoDB error on {request.url.path}: {exc}")
+    return JSONResponse(status_code=500, content={"detail": "Database error"})
 
 # Pydantic models for the collections
 
@@ -63,6 +253,17 @@ class QuietHours(BaseModel):
 class UserId(BaseModel):
     discordId: str
 
+class Preferences(BaseModel):
+    persona: str = "drill"  # coach, mindful, drill
+    voice: str = "alloy"  # alloy, echo, fable, onyx, nova, shimmer
+    timezone: str = DEFAULT_TIMEZONE  # IANA name, e.g. "America/Vancouver"; decides which day an entry belongs to
+
+class PreferencesUpdate(BaseModel):
+    """Partial update of a user's preferences; unset fields are left unchanged"""
+    persona: Optional[str] = None
+    voice: Optional[str] = None
+    timezone: Optional[str] = None
+
 class User(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
     
@@ -73,6 +274,7 @@ class User(BaseModel):
     preferredFrequency: str
     nextUpdateTime: datetime
     quietHours: QuietHours
+    preferences: Optional[Preferences] = None
     
     @classmethod
     def from_mongo_dict(cls, data: dict):
@@ -92,6 +294,8 @@ class Summary(BaseModel):
     content: str
     notes: Optional[str] = None
     audio_file_path: Optional[str] = None
+    # Direct (e.g. pre-signed) download URL, when the audio storage provides one
+    audio_url: Optional[str] = None
     
     @classmethod
     def from_mongo_dict(cls, data: dict):
@@ -108,6 +312,17 @@ class Entry(BaseModel):
     content: str
     notes: Optional[str] = None
     role: str  # "bot" or "user"
+    source: Optional[str] = None  # "text" or "button"
+    quickReply: Optional[str] = None  # the quick-reply button pressed (a key of QUICK_REPLY_OPTIONS)
+    localDate: Optional[str] = None  # YYYY-MM-DD in the user's timezone, set by the API on insert
+    
+    @field_validator("timestamp")
+    @classmethod
+    def naive_utc(cls, value: datetime) -> datetime:
+        """Store timestamps as naive UTC, like the rest of the collection."""
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
     
     @classmethod
     def from_mongo_dict(cls, data: dict):
@@ -121,7 +336,7 @@ class BotResponse(BaseModel):
     """Response from the bot for a one-turn call"""
     reply: str
     timeout_seconds: int
-    followup_message: str
+    followup_message: Optional[str] = None  # None: no follow-up (e.g. "Done for today")
 
 
 class EntryResponse(BaseModel):
@@ -130,41 +345,156 @@ class EntryResponse(BaseModel):
     bot_response: Optional[BotResponse] = None
 
 
+class BulkEntryResponse(BaseModel):
+    """Response when creating entries in bulk"""
+    inserted: int
+    failed: int = 0
+    # Indexes of the entries that failed for another reason than already being stored: send them again
+    retry: List[int] = []
+
+
+class SearchResult(BaseModel):
+    entry: Entry
+    score: float  # text relevance, higher is better
+
+
+class SearchResponse(BaseModel):
+    """One page of entry search results"""
+    query: str
+    page: int
+    page_size: int
+    has_more: bool
+    results: List[SearchResult]
+
+
+class DayCount(BaseModel):
+    date: str
+    entries: int
+
+
+class UserStats(BaseModel):
+    """Activity dashboard for a date range, computed from the daily_stats rollups"""
+    model_config = ConfigDict(populate_by_name=True)
+
+    from_date: str = Field(alias="from")
+    to_date: str = Field(alias="to")
+    activeDays: int
+    totalEntries: int
+    userEntries: int
+    currentStreak: int
+    longestStreak: int
+    entriesPerHour: List[int]  # user entries by hour of day, index 0-23
+    checkInsAnswered: int
+    averageResponseSeconds: Optional[float] = None
+    maxResponseSeconds: Optional[float] = None
+    entriesPerDay: List[DayCount]
+
+
 @app.get("/health")
 async def read_root():
     return {
         "status": "UP",
-        "mongodb": "CONNECTED" if client is not None else "NOT CONNECTED"
+        "mongodb": "CONNECTED" if client is not None else "NOT CONNECTED",
+        "userCache": user_profiles.stats(),
+        "memory": user_memories.stats() if user_memories else None,
+        "models": model_router.stats(),
+        "replyCache": reply_cache.stats(),
+        "summaryPrewarm": summary_prewarmer.stats() if summary_prewarmer else None,
+        "usage": usage_ledger.stats(),
+        "mongoProfiles": mongo.stats() if mongo else None
     }
 
+@app.get("/livez")
+async def liveness():
+    """Liveness probe: the worker's event loop is responsive."""
+    return {"status": "ALIVE", "pid": os.getpid()}
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness probe: the worker can reach MongoDB and is not shutting down."""
+    if draining:
+        return JSONResponse(status_code=503, content={"status": "DRAINING"})
+    try:
+        client.admin.command('ping')
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"status": "NOT READY", "mongodb": str(e)})
+    return {"status": "READY", "pid": os.getpid(), "startupMs": round(startup_seconds * 1000)}
+
 @app.get("/audio/{filename}")
 async def get_audio_file(filename: str):
     """
-    Serve audio files for Discord bot.
+    Serve audio files for Discord bot, streamed from the audio storage.
     """
-    # Construct the full path to the audio file
-    audio_path = os.path.join("audio", filename)
-    
-    # Check if file exists
-    if not os.path.exists(audio_path):
-        print(f"❌ Audio file not found: {audio_path}")
+    chunks = await asyncio.to_thread(audio_storage.open, filename)
+    if chunks is None:
+        print(f"❌ Audio file not found: {filename}")
         raise HTTPException(status_code=404, detail="Audio file not found")
     
-    print(f"🎵 Serving audio file: {audio_path}")
-    return FileResponse(
-        path=audio_path,
-        media_type="audio/mpeg",
-        filename=filename
+    print(f"🎵 Serving audio file: {filename}")
+    return StreamingResponse(
+        chunks,
+        media_type=media_type_for(filename),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
 
+async def store_summary_audio(text: str, voice: str, discord_id: str, date_str: str, profile: str) -> Optional[str]:
+    """
+    Convert a summary to speech and save it to the audio storage.
+    Returns the storage key (a filename), or None if TTS failed or the user is over
+    their daily TTS quota.
+    """
+    if usage_ledger.over_tts_quota(discord_id):
+        print(f"🔇 User {discord_id} is over the daily TTS quota, skipping audio for {date_str}")
+        return None
+    try:
+        print(f"🎵 Generating audio for user {discord_id} on {date_str}...")
+        print(f"🎵 Audio settings - Voice: {voice}, Text length: {len(text)} chars")
+        with for_user(discord_id):
+            audio_bytes, audio_format = await synthesize_speech(text, voice=voice, profile=profile)
+        key = generate_filename(discord_id, date_str.replace("-", ""), extension=AUDIO_FORMATS[audio_format]["extension"])
+        await asyncio.to_thread(audio_storage.save, key, io.BytesIO(audio_bytes), media_type_for(key))
+        print(f"✅ Audio file stored: {key} ({len(audio_bytes)} bytes, {audio_format})")
+        return key
+    except Exception as e:
+        # Don't fail the request if TTS fails, just continue without audio
+        print(f"❌ Failed to generate audio file for user {discord_id} on {date_str}: {type(e).__name__}: {e}")
+        return None
+
+def audio_url_for(audio_file_path: Optional[str]) -> Optional[str]:
+    """Direct download URL for a stored audio file, if the storage backend supports one."""
+    if not audio_file_path:
+        return None
+    try:
+        return audio_storage.url_for(audio_file_path)
+    except Exception as e:
+        print(f"⚠️ Could not create a direct audio URL for {audio_file_path}: {e}")
+        return None
+
 # --- USER Endpoints ---
+def get_user_profile(discord_id: str) -> Optional[dict]:
+    """Fetch a user document through the profile cache. Returns None if the user doesn't exist."""
+    hit, user_data = user_profiles.get(discord_id)
+    if not hit:
+        user_data = mongo.collection("interactive_write", "user").find_one({"_id.discordId": discord_id})
+        user_profiles.put(discord_id, user_data)
+    return user_data
+
+def get_preferences(discord_id: str) -> Preferences:
+    """The user's stored preferences, or the defaults."""
+    user_data = get_user_profile(discord_id)
+    return Preferences(**((user_data or {}).get("preferences") or {}))
+
+def user_today(discord_id: str) -> str:
+    """Today's date (YYYY-MM-DD) in the user's timezone."""
+    return local_today(get_preferences(discord_id).timezone).isoformat()
+
 @app.get("/users/{discord_id}", response_model=User)
 async def get_user_by_discord_id(discord_id: str):
     """
     Retrieves a single user by their Discord ID from MongoDB.
     """
     try:
-        user_data = users_collection.find_one({"_id.discordId": discord_id})
+        user_data = get_user_profile(discord_id)
         if user_data:
             return User.from_mongo_dict(user_data)
     except Exception as e:
@@ -184,33 +514,173 @@ async def create_user(user: User):
     if not user_dict.get("_id"):
         raise HTTPException(status_code=400, detail="discordId is required in _id")
     
-    # Check if user already exists
-    existing = users_collection.find_one({"_id.discordId": user_dict["_id"]["discordId"]})
-    if existing:
+    # _id is unique, so the insert is the existence check: one round trip, and of
+    # concurrent creates of the same user exactly one succeeds
+    try:
+        mongo.collection("interactive_write", "user").insert_one(user_dict)
+    except DuplicateKeyError:
         raise HTTPException(status_code=409, detail="User with this discordId already exists")
-    
-    users_collection.insert_one(user_dict)
+    user_profiles.invalidate(user_dict["_id"]["discordId"])
     return user
 
+@app.get("/users/{discord_id}/preferences", response_model=Preferences)
+async def get_user_preferences(discord_id: str):
+    """
+    Retrieves a user's persona and voice. Users without stored preferences get the defaults.
+    """
+    return get_preferences(discord_id)
+
+@app.patch("/users/{discord_id}/preferences", response_model=Preferences)
+async def update_user_preferences(discord_id: str, update: PreferencesUpdate, name: Optional[str] = None):
+    """
+    Updates a user's persona, voice and/or timezone.
+    A new timezone applies to entries written from now on; earlier entries keep their day.
+    Users that have not been created yet are registered with default settings,
+    so the bot can store preferences for anyone who talks to it.
+    
+    Query parameters:
+    - name: display name to use if the user has to be created
+    """
+    changes = update.model_dump(exclude_none=True)
+    if not changes:
+        return await get_user_preferences(discord_id)
+    if "persona" in changes and changes["persona"] not in PERSONAS:
+        raise HTTPException(status_code=400, detail=f"Invalid persona. Choose from: {', '.join(PERSONAS)}")
+    if "voice" in changes and changes["voice"] not in VOICES:
+        raise HTTPException(status_code=400, detail=f"Invalid voice. Choose from: {', '.join(VOICES)}")
+    if "timezone" in changes and not is_valid_timezone(changes["timezone"]):
+        raise HTTPException(status_code=400, detail="Invalid timezone. Use an IANA name like America/Vancouver")
+
+    now = datetime.now()
+    user_data = mongo.collection("interactive_write", "user").find_one_and_update(
+        {"_id": {"discordId": discord_id}},
+        {
+            "$set": {f"preferences.{key}": value for key, value in changes.items()},
+            "$setOnInsert": {
+                "name": name or discord_id,
+                "startDate": now,
+                "preferredFrequency": "dynamic",
+                "nextUpdateTime": now,
+                "quietHours": {"start": "22:00", "end": "07:00"},
+            },
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    # Write-through: this worker sees the change immediately
+    user_profiles.put(discord_id, user_data)
+    return Preferences(**(user_data.get("preferences") or {}))
+
 # --- SUMMARY Endpoints ---
+def summary_length_within_quota(discord_id: str, summary_length: str) -> str:
+    """Users over their daily token quota get short summaries."""
+    if summary_length != "short" and usage_ledger.over_token_quota(discord_id):
+        print(f"✂️ User {discord_id} is over the daily token quota, generating a short summary")
+        return "short"
+    return summary_length
+
+async def build_daily_summary(discord_id: str, date_str: str, summary_length: str, persona: str):
+    """
+    Generate the summary text for one day from its rolling checkpoint and remaining entries.
+    Returns (summary_content, entry_count). summary_content is None if generation failed,
+    and entry_count is 0 if the user has no entries that day.
+    """
+    datetime.strptime(date_str, "%Y-%m-%d")  # Validate the date string
+
+    # Running notes for the day, kept up to date in the background.
+    # Only entries the checkpoint doesn't cover need to go into the prompt.
+    checkpoint = rolling_summaries.get(discord_id, date_str)
+    # The day's entries are an equality match on the user's local date
+    day_filter = unfolded_filter(discord_id, date_str, checkpoint)
+    if checkpoint:
+        print(f"🧾 Using rolling summary covering {checkpoint['entryCount']} entries")
+
+    # Fetch the remaining entries for this user on this day
+    print(f"🔍 Fetching entries for user {discord_id} on {date_str}...")
+
+    entries_cursor = entries_collection.find(day_filter).sort("timestamp", 1)  # Sort by timestamp ascending
+
+    entries_list = list(entries_cursor)
+    entry_count = len(entries_list) + (checkpoint["entryCount"] if checkpoint else 0)
+    print(f"🔍 Found {len(entries_list)} entries for user {discord_id} on {date_str}")
+    if entry_count == 0:
+        return None, 0
+
+    # Convert MongoDB entries to format expected by summarizer
+    entries_for_summarizer = [to_summarizer_entry(entry) for entry in entries_list]
+
+    # Generate summary using the summarizer
+    summary_length = summary_length_within_quota(discord_id, summary_length)
+    print(f"📝 Generating {summary_length} summary for user {discord_id} on {date_str}...")
+    print(f"📝 Summary settings - Persona: {persona}, Entries count: {len(entries_for_summarizer)}")
+
+    with for_user(discord_id):
+        summary_content = await generate_summarizer(
+            entries_for_summarizer,
+            summary_length=summary_length,
+            persona=persona,
+            earlier_summary=checkpoint["content"] if checkpoint else None
+        )
+
+    if summary_content:
+        print(f"✅ Summary generated successfully for user {discord_id} on {date_str}")
+        print(f"✅ Summary length: {len(summary_content)} characters")
+    return summary_content, entry_count
+
+async def summarize_day_for_archive(discord_id: str, date_str: str):
+    """Store the daily summary of a day so its entries can be archived."""
+    persona = get_preferences(discord_id).persona
+    await period_summaries.dailies(discord_id, [date_str], "short", persona)
+
 @app.get("/summaries/{discord_id}/{date_str}", response_model=Summary)
 async def get_summary_by_discord_id_and_date(
     discord_id: str, 
     date_str: str,
     summary_length: str = "short",  # Query parameter: short, medium, long
-    persona: str = "drill",  # Query parameter: coach, mindful, drill
-    voice: str = "alloy"  # Query parameter: alloy, echo, fable, onyx, nova, shimmer
+    persona: Optional[str] = None,  # Query parameter: coach, mindful, drill
+    voice: Optional[str] = None  # Query parameter: alloy, echo, fable, onyx, nova, shimmer
 ):
     """
-    Retrieves a single summary by Discord ID and date (YYYY-MM-DD) from MongoDB.
+    Retrieves a single summary by Discord ID and date (YYYY-MM-DD, or "today" in the user's timezone) from MongoDB.
+    Today's summary is served from the prewarmed one if it is still valid (see summary_prewarm.py).
     If summary doesn't exist, fetches entries for that day and generates a new summary.
     If no entries exist for that day, returns an appropriate message.
     
     Query parameters:
     - summary_length: "short", "medium", or "long" (default: "short")
-    - persona: "coach", "mindful", or "drill" (default: "drill")
-    - voice: "alloy", "echo", "fable", "onyx", "nova", or "shimmer" (default: "alloy")
+    - persona: "coach", "mindful", or "drill" (default: the user's preference)
+    - voice: "alloy", "echo", "fable", "onyx", "nova", or "shimmer" (default: the user's preference)
     """
+    preferences = get_preferences(discord_id)
+    persona = persona or preferences.persona
+    voice = voice or preferences.voice
+    today = local_today(preferences.timezone).isoformat()
+    if date_str == "today":
+        date_str = today
+
+    if date_str == today:
+        # When users ask for today's summary is what the prewarmer predicts
+        await asyncio.to_thread(summary_prewarmer.record_request, discord_id, preferences.timezone)
+        prewarmed = await asyncio.to_thread(summary_prewarmer.take, discord_id, date_str, summary_length, persona, voice)
+        if prewarmed:
+            print(f"🔥 Serving prewarmed summary for user {discord_id} on {date_str}")
+            served = Summary(
+                id=SummaryId(discordId=discord_id, date=date_str),
+                content=prewarmed["content"],
+                notes=prewarmed.get("notes"),
+                audio_file_path=prewarmed.get("audio_file_path")
+            )
+            # Stored like a generated one (below), so week/month summaries and archiving reuse it
+            if prewarmed.get("entryCount"):
+                await asyncio.to_thread(
+                    mongo.collection("interactive_write", "summary").replace_one,
+                    {"_id": {"discordId": discord_id, "date": date_str}},
+                    {**served.model_dump(by_alias=True, exclude_unset=True), "level": "day", "entryCount": prewarmed["entryCount"]},
+                    upsert=True
+                )
+            served.audio_url = audio_url_for(prewarmed.get("audio_file_path"))
+            return served
+
     # First, check if summary already exists
     # summary_data = summaries_collection.find_one({"_id.discordId": discord_id, "_id.date": date_str})
     # if summary_data:
@@ -218,53 +688,35 @@ async def get_summary_by_discord_id_and_date(
     
     # Summary doesn't exist, fetch entries for that day
     try:
-        # Parse the date string to get start and end of day
-        from datetime import datetime as dt
-        date_obj = dt.strptime(date_str, "%Y-%m-%d")
-        start_of_day = date_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = date_obj.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        # Fetch all entries for this user on this day
-        print(f"🔍 Fetching entries for user {discord_id} on {date_str}...")
-        print(f"🔍 Date range: {start_of_day} to {end_of_day}")
-        
-        entries_cursor = entries_collection.find({
-            "discordId": discord_id,
-            "timestamp": {
-                "$gte": start_of_day,
-                "$lte": end_of_day
-            }
-        }).sort("timestamp", 1)  # Sort by timestamp ascending
+        summary_content, entry_count = await build_daily_summary(discord_id, date_str, summary_length, persona)
+        notes = f"Generated from {entry_count} entries"
         
-        entries_list = list(entries_cursor)
-        print(f"🔍 Found {len(entries_list)} entries for user {discord_id} on {date_str}")
+        # Archived days are represented by their stored summary, and its audio while retention keeps it
+        if entry_count == 0:
+            stored = mongo.collection("interactive_write", "summary").find_one({"_id": {"discordId": discord_id, "date": date_str}})
+            if is_archived_summary(stored):
+                audio_file_path = stored.get("audio_file_path")
+                if not audio_file_path or not await asyncio.to_thread(audio_storage.exists, audio_file_path):
+                    audio_file_path = await store_summary_audio(stored["content"], voice, discord_id, date_str, summary_length)
+                    if audio_file_path:
+                        mongo.collection("interactive_write", "summary").update_one(
+                            {"_id": stored["_id"]}, {"$set": {"audio_file_path": audio_file_path}}
+                        )
+                return Summary(
+                    id=SummaryId(discordId=discord_id, date=date_str),
+                    content=stored["content"],
+                    notes=stored.get("notes"),
+                    audio_file_path=audio_file_path,
+                    audio_url=audio_url_for(audio_file_path)
+                )
         
         # If no entries exist for that day
-        if not entries_list:
+        if entry_count == 0 and not summary_content:
             print(f"📭 No entries found for user {discord_id} on {date_str}, generating default message")
             summary_content = f"No entries found for {date_str}. Start journaling to get your daily summary!"
             
             # Generate audio file for the "no entries" message
-            audio_file_path = None
-            try:
-                print(f"🎵 Generating audio for user {discord_id} on {date_str}...")
-                print(f"🎵 Audio settings - Voice: {voice}, Text length: {len(summary_content)} chars")
-                
-                audio_file_path = await text_to_speech(
-                    text=summary_content,
-                    voice=voice,
-                    user=discord_id,
-                    custom_hash=date_str.replace("-", "")
-                )
-                
-                if audio_file_path:
-                    print(f"✅ Audio file generated successfully: {audio_file_path}")
-                else:
-                    print("⚠️ Audio file generation returned None")
-                    
-            except Exception as e:
-                print(f"❌ Failed to generate audio file for user {discord_id} on {date_str}: {e}")
-                print(f"❌ Audio generation error details: {type(e).__name__}: {str(e)}")
+            audio_file_path = await store_summary_audio(summary_content, voice, discord_id, date_str, "short")
             
             new_summary = Summary(
                 id=SummaryId(discordId=discord_id, date=date_str),
@@ -272,74 +724,45 @@ async def get_summary_by_discord_id_and_date(
                 notes="No entries available",
                 audio_file_path=audio_file_path
             )
-            summaries_collection.insert_one(new_summary.model_dump(by_alias=True, exclude_unset=True))
+            # Asking again regenerates it: replace the stored one instead of failing on the duplicate _id
+            mongo.collection("interactive_write", "summary").replace_one(
+                {"_id": {"discordId": discord_id, "date": date_str}},
+                new_summary.model_dump(by_alias=True, exclude_unset=True),
+                upsert=True
+            )
+            new_summary.audio_url = audio_url_for(audio_file_path)
             return new_summary
         
-        # Convert MongoDB entries to format expected by summarizer
-        entries_for_summarizer = []
-        for entry in entries_list:
-            entries_for_summarizer.append({
-                "timestamp": entry["timestamp"].isoformat(),
-                "role": entry["role"],
-                "content": entry["content"],
-                "source": "entry"  # You can customize this based on your needs
-            })
-        
-        # Generate summary using the summarizer
-        print(f"📝 Generating {summary_length} summary for user {discord_id} on {date_str}...")
-        print(f"📝 Summary settings - Persona: {persona}, Entries count: {len(entries_for_summarizer)}")
-        
-        summary_content = await generate_summarizer(
-            entries_for_summarizer, 
-            summary_length=summary_length,
-            persona=persona
-        )
-        
         if not summary_content:
             print(f"❌ Summary generation failed for user {discord_id} on {date_str}")
             raise HTTPException(status_code=500, detail="Failed to generate summary")
         
-        print(f"✅ Summary generated successfully for user {discord_id} on {date_str}")
-        print(f"✅ Summary length: {len(summary_content)} characters")
-        
         # Generate audio file using TTS
-        audio_file_path = None
-        try:
-            print(f"🎵 Generating audio for user {discord_id} on {date_str}...")
-            print(f"🎵 Audio settings - Voice: {voice}, Text length: {len(summary_content)} chars")
-            print(f"🎵 Summary preview: {summary_content[:100]}...")
-            
-            audio_file_path = await text_to_speech(
-                text=summary_content,
-                voice=voice,
-                user=discord_id,
-                custom_hash=date_str.replace("-", "")
-            )
-            
-            if audio_file_path:
-                print(f"✅ Audio file generated successfully: {audio_file_path}")
-            else:
-                print("⚠️ Audio file generation returned None")
-                
-        except Exception as e:
-            print(f"❌ Failed to generate audio file for user {discord_id} on {date_str}: {e}")
-            print(f"❌ Audio generation error details: {type(e).__name__}: {str(e)}")
-            # Don't fail the request if TTS fails, just continue without audio
+        print(f"🎵 Summary preview: {summary_content[:100]}...")
+        audio_file_path = await store_summary_audio(summary_content, voice, discord_id, date_str, summary_length)
         
         # Save the generated summary to the database
         print(f"💾 Creating summary object for user {discord_id} on {date_str}...")
-        print(f"💾 Summary includes {len(entries_list)} entries, audio: {'Yes' if audio_file_path else 'No'}")
+        print(f"💾 Summary includes {entry_count} entries, audio: {'Yes' if audio_file_path else 'No'}")
         
         new_summary = Summary(
             id=SummaryId(discordId=discord_id, date=date_str),
             content=summary_content,
-            notes=f"Generated from {len(entries_list)} entries",
+            notes=notes,
             audio_file_path=audio_file_path
         )
 
+        # Asking again regenerates it: replace the stored one (a "no entries" placeholder
+        # included). Archived days have no hot entries and keep the summary they have
+        if entry_count:
+            mongo.collection("interactive_write", "summary").replace_one(
+                {"_id": {"discordId": discord_id, "date": date_str}},
+                {**new_summary.model_dump(by_alias=True, exclude_unset=True), "level": "day", "entryCount": entry_count},
+                upsert=True
+            )
+        new_summary.audio_url = audio_url_for(audio_file_path)
+
         print(f"✅ Summary object created successfully for user {discord_id} on {date_str}")
-        
-        # summaries_collection.insert_one(new_summary.model_dump(by_alias=True, exclude_unset=True))
         return new_summary
         
     except ValueError as e:
@@ -347,6 +770,56 @@ async def get_summary_by_discord_id_and_date(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
 
+@app.get("/summaries/{discord_id}/week/{date_str}", response_model=Summary)
+async def get_weekly_summary(
+    discord_id: str,
+    date_str: str,
+    summary_length: str = "short",  # Query parameter: short, medium, long
+    persona: Optional[str] = None  # Query parameter: coach, mindful, drill
+):
+    """
+    Retrieves the summary of the Monday-Sunday week containing date_str (YYYY-MM-DD).
+    Built from the stored daily summaries; missing days are generated first.
+    
+    Query parameters:
+    - summary_length: "short", "medium", or "long" (default: "short")
+    - persona: "coach", "mindful", or "drill" (default: the user's preference)
+    """
+    persona = persona or get_preferences(discord_id).persona
+    summary_length = summary_length_within_quota(discord_id, summary_length)
+    try:
+        with for_user(discord_id):
+            return Summary.from_mongo_dict(await period_summaries.week(discord_id, date_str, summary_length, persona))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date format. Use YYYY-MM-DD: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating weekly summary: {str(e)}")
+
+@app.get("/summaries/{discord_id}/month/{month_str}", response_model=Summary)
+async def get_monthly_summary(
+    discord_id: str,
+    month_str: str,
+    summary_length: str = "short",  # Query parameter: short, medium, long
+    persona: Optional[str] = None  # Query parameter: coach, mindful, drill
+):
+    """
+    Retrieves the summary of a month (YYYY-MM).
+    Built from the stored daily summaries; missing days are generated first.
+    
+    Query parameters:
+    - summary_length: "short", "medium", or "long" (default: "short")
+    - persona: "coach", "mindful", or "drill" (default: the user's preference)
+    """
+    persona = persona or get_preferences(discord_id).persona
+    summary_length = summary_length_within_quota(discord_id, summary_length)
+    try:
+        with for_user(discord_id):
+            return Summary.from_mongo_dict(await period_summaries.month(discord_id, month_str, summary_length, persona))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid month format. Use YYYY-MM: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating monthly summary: {str(e)}")
+
 @app.post("/summaries", response_model=Summary, status_code=201)
 async def create_summary(summary: Summary):
     """
@@ -358,15 +831,11 @@ async def create_summary(summary: Summary):
     if not summary_dict.get("_id"):
         raise HTTPException(status_code=400, detail="_id with discordId and date is required")
     
-    # Check if summary already exists
-    existing = summaries_collection.find_one({
-        "_id.discordId": summary_dict["_id"]["discordId"],
-        "_id.date": summary_dict["_id"]["date"]
-    })
-    if existing:
+    # _id (discordId, date) is unique: insert and map the duplicate to 409
+    try:
+        mongo.collection("interactive_write", "summary").insert_one(summary_dict)
+    except DuplicateKeyError:
         raise HTTPException(status_code=409, detail="Summary for this user and date already exists")
-    
-    summaries_collection.insert_one(summary_dict)
     return summary
 
 # --- ENTRY Endpoints ---
@@ -376,7 +845,7 @@ async def get_entry_by_id(entry_id: str):
     Retrieves a single entry by its MongoDB ObjectId from MongoDB.
     """
     try:
-        entry_data = entries_collection.find_one({"_id": ObjectId(entry_id)})
+        entry_data = mongo.collection("history_read", "entry").find_one({"_id": ObjectId(entry_id)})
         if entry_data:
             return Entry.from_mongo_dict(entry_data)
     except Exception as e:
@@ -410,40 +879,83 @@ def convert_time_to_seconds(time_str: str) -> int:
 
 def get_last_n_entries(discord_id: str, n: int = 10) -> List[dict]:
     """Fetch the last N entries for a user"""
-    entries_cursor = entries_collection.find({
+    entries_cursor = mongo.collection("history_read", "entry").find({
         "discordId": discord_id
     }).sort("timestamp", -1).limit(n)
     
     return list(entries_cursor)
 
 @app.post("/entries", response_model=EntryResponse, status_code=201)
-async def create_entry(entry: Entry, persona: str = "drill"):
+async def create_entry(
+    entry: Entry,
+    http_response: Response,
+    persona: Optional[str] = None,
+    idempotency_key: Optional[str] = Header(None)
+):
     """
     Accepts an entry in JSON format and creates a new entry in MongoDB.
     If the entry is from a user, generates a bot response using the last 10 entries.
     
     Query parameters:
-    - persona: "coach", "mindful", or "drill" (default: "drill")
+    - persona: "coach", "mindful", or "drill" (default: the user's preference)
+    
+    Headers:
+    - Idempotency-Key: makes retries safe. If an entry with this key already exists,
+      it is returned with status 200 and the bot response generated for it then (if any),
+      and nothing is written.
+    
+    Entries with quickReply set (a quick-reply button press) are answered from the
+    precomputed QUICK_REPLIES table, without an LLM call.
     
     Returns the created entry and bot response with:
     - reply: Initial message to send immediately
     - timeout_seconds: Time to wait before sending followup
-    - followup_message: Message to send after timeout
+    - followup_message: Message to send after timeout (None: no followup)
     """
+    if entry.quickReply is not None and entry.quickReply not in QUICK_REPLY_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown quick reply: {entry.quickReply}")
     entry_dict = entry.model_dump(by_alias=True, exclude_unset=True)
     if "_id" in entry_dict:
         del entry_dict["_id"]  # Let MongoDB generate the ID
     
+    if idempotency_key:
+        entry_dict["idempotencyKey"] = idempotency_key
+    
+    # Cached profile lookup: no user round trip on a cache hit
+    preferences = get_preferences(entry.discordId)
+    entry.localDate = entry_dict["localDate"] = local_date(entry.timestamp, preferences.timezone)
+    
     # Save the entry to MongoDB
-    result = entries_collection.insert_one(entry_dict)
+    try:
+        result = mongo.collection("interactive_write", "entry").insert_one(entry_dict)
+    except DuplicateKeyError:
+        print(f"🔁 Entry with Idempotency-Key {idempotency_key} already exists")
+        http_response.status_code = 200
+        existing = mongo.collection("interactive_write", "entry").find_one({"idempotencyKey": idempotency_key})
+        # The client may never have received the first response: give it the same reply again
+        stored_response = existing.get("botResponse")
+        return EntryResponse(
+            entry=Entry.from_mongo_dict(existing),
+            bot_response=BotResponse(**stored_response) if stored_response else None
+        )
     entry.id = str(result.inserted_id)
+    rolling_summaries.record_entry(entry.discordId, entry.localDate)
+    daily_stats.record_entry(entry.discordId, to_local(entry.timestamp, preferences.timezone), entry.role)
     
     # Only generate bot response if this is a user entry
     bot_response = None
-    if entry.role == "user":
+    if entry.role == "user" and entry.quickReply:
+        # Button press: a precomputed reply, no memories and no LLM round trip
+        response = quick_reply_response(entry.quickReply, persona or preferences.persona)
+        bot_response = BotResponse(
+            reply=response["reply"],
+            timeout_seconds=convert_time_to_seconds(response["time"]) if response["time"] else 0,
+            followup_message=response["nextCheckIn"]
+        )
+    elif entry.role == "user":
         try:
             # Fetch the last 10 entries for this user (including the one just added)
-            last_entries_cursor = entries_collection.find({
+            last_entries_cursor = mongo.collection("history_read", "entry").find({
                 "discordId": entry.discordId
             }).sort("timestamp", -1).limit(10)
             
@@ -452,11 +964,26 @@ async def create_entry(entry: Entry, persona: str = "drill"):
             # Convert entries to format for context (optional - could be used for more advanced responses)
             # For now, we'll just use the current message for the one-turn response
             
+            if persona is None:
+                persona = preferences.persona
+
+            # Over the daily token quota: cached or generic replies only
+            over_quota = usage_ledger.over_token_quota(entry.discordId)
+
+            # Past entries/summaries relevant to this message (not the message itself)
+            memories = []
+            # Short check-ins may be answered from the shared reply cache, which doesn't use memories
+            if user_memories and not over_quota and not reply_cache.cacheable(entry.content):
+                memories = await user_memories.recall(entry.discordId, entry.content, before=entry.timestamp)
+
             # Generate one-turn response
-            response = await generate_one_turn_response(
-                user_message=entry.content,
-                persona=persona
-            )
+            with for_user(entry.discordId):
+                response = await generate_one_turn_response(
+                    user_message=entry.content,
+                    persona=persona,
+                    memories=memories,
+                    cached_only=over_quota
+                )
             print(f"Response in main.py: {response}")
             
             if response:
@@ -473,17 +1000,235 @@ async def create_entry(entry: Entry, persona: str = "drill"):
             # Don't fail the request if bot response generation fails
             # Just return without bot_response
     
+    if bot_response and idempotency_key:
+        # Kept for a retried request (see the DuplicateKeyError branch above)
+        mongo.collection("interactive_write", "entry").update_one(
+            {"_id": result.inserted_id}, {"$set": {"botResponse": bot_response.model_dump()}}
+        )
+    
     return EntryResponse(
         entry=entry,
         bot_response=bot_response
     )
 
+@app.post("/entries/bulk", response_model=BulkEntryResponse, status_code=201)
+async def create_entries_bulk(entries: List[Entry]):
+    """
+    Accepts a list of entries and inserts them in one unordered batch.
+    Used for write-behind logging of bot messages, so no bot responses are generated.
+    One bad document does not stop the rest of the batch from being inserted.
+    """
+    if not entries:
+        return BulkEntryResponse(inserted=0)
+
+    entry_dicts = []
+    local_entries = []  # the same entries with local wall-clock timestamps, for the daily stats
+    for entry in entries:
+        entry_dict = entry.model_dump(by_alias=True, exclude_unset=True)
+        entry_dict.pop("_id", None)  # Let MongoDB generate the IDs
+        tz_name = get_preferences(entry.discordId).timezone
+        entry_dict["localDate"] = local_date(entry.timestamp, tz_name)
+        entry_dicts.append(entry_dict)
+        local_entries.append({**entry_dict, "timestamp": to_local(entry.timestamp, tz_name)})
+
+    try:
+        # Bot messages: w=1 is enough for a log line (see the bulk_log_write profile)
+        result = mongo.collection("bulk_log_write", "entry").insert_many(entry_dicts, ordered=False)
+        daily_stats.record_entries(local_entries)
+        return BulkEntryResponse(inserted=len(result.inserted_ids))
+    except BulkWriteError as e:
+        details = e.details
+        failed = {error["index"] for error in details.get("writeErrors", [])}
+        # Duplicate keys are entries a retried batch already stored
+        retry = sorted(error["index"] for error in details.get("writeErrors", []) if error.get("code") != 11000)
+        print(f"⚠️ Bulk insert partially failed: {len(failed)} error(s), {len(retry)} to retry")
+        daily_stats.record_entries(d for i, d in enumerate(local_entries) if i not in failed)
+        return BulkEntryResponse(inserted=details.get("nInserted", 0), failed=len(failed), retry=retry)
+
 @app.get("/users/{discord_id}/entries", response_model=List[Entry])
-async def get_entries_for_user(discord_id: str):
+async def get_entries_for_user(discord_id: str, include_archived: bool = False):
     """
     Retrieves a list of entries filtered by Discord ID from MongoDB.
+    
+    Query parameters:
+    - include_archived: also return entries moved to the archive (default: false)
     """
     entries = []
-    for doc in entries_collection.find({"discordId": discord_id}):
+    for doc in mongo.collection("history_read", "entry").find({"discordId": discord_id}):
         entries.append(Entry.from_mongo_dict(doc))
-    return entries
\ No newline at end of file
+    if include_archived:
+        # Skip entries caught between the copy and the delete of an archive run
+        seen = {entry.id for entry in entries}
+        for doc in mongo.collection("history_read", ARCHIVE_COLLECTION).find({"discordId": discord_id}):
+            if str(doc["_id"]) not in seen:
+                entries.append(Entry.from_mongo_dict(doc))
+    return entries
+
+@app.get("/users/{discord_id}/entries/search", response_model=SearchResponse)
+async def search_user_entries(
+    discord_id: str,
+    q: str,
+    from_date: Optional[str] = Query(None, alias="from"),  # YYYY-MM-DD
+    to_date: Optional[str] = Query(None, alias="to"),  # YYYY-MM-DD
+    role: Optional[str] = None,  # "user" or "bot" (default: both)
+    sort: str = "relevance",  # relevance or newest
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=50),
+    include_archived: bool = False  # also search entries moved to the archive
+):
+    """
+    Full-text search over a user's entries, ranked by relevance.
+    Supports "exact phrases" and -excluded words.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    if sort not in ("relevance", "newest"):
+        raise HTTPException(status_code=400, detail="sort must be relevance or newest")
+    tz_name = get_preferences(discord_id).timezone
+    try:
+        start = utc_day_bounds(from_date, tz_name)[0] if from_date else None
+        end = utc_day_bounds(to_date, tz_name)[1] if to_date else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date format. Use YYYY-MM-DD: {str(e)}")
+
+    docs, has_more = search_entries(
+        mongo.collection("history_read", "entry"), discord_id, q, start, end, role, sort, page, page_size,
+        archive_collection=mongo.collection("history_read", ARCHIVE_COLLECTION) if include_archived else None
+    )
+    return SearchResponse(
+        query=q,
+        page=page,
+        page_size=page_size,
+        has_more=has_more,
+        results=[SearchResult(score=doc.pop("score"), entry=Entry.from_mongo_dict(doc)) for doc in docs]
+    )
+
+@app.get("/users/{discord_id}/stats", response_model=UserStats)
+async def get_user_stats(
+    discord_id: str,
+    from_date: Optional[str] = Query(None, alias="from"),  # YYYY-MM-DD (default: 30 days before `to`)
+    to_date: Optional[str] = Query(None, alias="to")  # YYYY-MM-DD (default: today in the user's timezone)
+):
+    """
+    Activity stats for a user: entries per day and per hour of day, active days,
+    streaks and how quickly check-ins get answered.
+    Served from the daily_stats rollups, so the cost depends on the range, not on the user's history.
+    """
+    today = date.fromisoformat(user_today(discord_id))
+    try:
+        end = date.fromisoformat(to_date) if to_date else today
+        start = date.fromisoformat(from_date) if from_date else end - timedelta(days=29)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date format. Use YYYY-MM-DD: {str(e)}")
+    if start > end:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    if (end - start).days + 1 > MAX_STATS_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_STATS_DAYS} days")
+
+    stats_reader = DailyStats(mongo.collection("analytics_read", "daily_stats"))
+    return UserStats(**stats_reader.summarize(discord_id, start, end, today=today))
+
+
+@app.get("/archive/stats")
+async def get_archive_stats():
+    """
+    Working-set size of the hot entry collection vs. the archive.
+    """
+    return await asyncio.to_thread(archiver.report)
+
+
+@app.get("/prewarm/stats")
+async def get_prewarm_stats(days: int = Query(7, ge=1, le=90)):
+    """
+    Summary prewarming: this worker's hit rate, and how many prewarmed summaries of the
+    last `days` days (all workers) were generated but never served.
+    """
+    return {
+        "worker": summary_prewarmer.stats(),
+        "waste": await asyncio.to_thread(summary_prewarmer.waste_stats, days)
+    }
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints need X-Admin-Token to match ADMIN_TOKEN; without ADMIN_TOKEN they don't exist."""
+    expected = get_settings().admin_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/admin/usage", dependencies=[Depends(require_admin)])
+async def get_usage(
+    from_date: Optional[str] = Query(None, alias="from"),
+    to_date: Optional[str] = Query(None, alias="to"),
+    discord_id: Optional[str] = None,
+    top: int = Query(50, ge=1, le=1000)
+):
+    """
+    LLM tokens and calls, and TTS characters and calls, per user over a range of UTC days
+    (from/to as YYYY-MM-DD, default today), heaviest users first. Flushes this worker's
+    counts first; other workers' counts are at most USAGE_FLUSH_SECONDS behind.
+    """
+    today = datetime.now(timezone.utc).date()
+    try:
+        start = date.fromisoformat(from_date) if from_date else today
+        end = date.fromisoformat(to_date) if to_date else max(start, today)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date format. Use YYYY-MM-DD: {str(e)}")
+    if start > end:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    await asyncio.to_thread(usage_writer.flush)
+    return await asyncio.to_thread(usage_writer.report, start.isoformat(), end.isoformat(), discord_id, top)
+
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_worker(
+    seconds: Optional[float] = Query(None, gt=0),
+    requests: Optional[int] = Query(None, gt=0),
+    mode: str = "sample",
+    memory: bool = False,
+    format: str = Query("json", pattern="^(json|collapsed|pstats)$")
+):
+    """
+    Profile the worker that serves this request for `seconds`, or for its next `requests`
+    requests. Each gunicorn worker profiles itself, so repeat the call to cover the others.
+
+    Query parameters:
+    - mode: sample (stack sampling, flamegraph output) or cprofile (deterministic)
+    - memory: also diff tracemalloc snapshots taken at the start and end
+    - format: json (full report), collapsed (sample mode: collapsed stacks for
+      flamegraph.pl/speedscope) or pstats (cprofile mode: raw pstats data for snakeviz)
+    """
+    if mode not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(PROFILE_MODES)}")
+    if format != "json" and format != {"sample": "collapsed", "cprofile": "pstats"}[mode]:
+        raise HTTPException(status_code=400, detail=f"format {format} is not available in {mode} mode")
+    try:
+        report = await profiler.profile(seconds=seconds, requests=requests, mode=mode, memory=memory)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if format == "collapsed":
+        return PlainTextResponse(report["collapsed"])
+    if format == "pstats":
+        return Response(
+            content=report["pstats"],
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile-{report["pid"]}.pstats"'}
+        )
+    report.pop("pstats", None)
+    return report
+
+
+@app.get("/admin/tasks", dependencies=[Depends(require_admin)])
+async def dump_tasks(limit: int = Query(25, ge=1, le=500), format: str = Query("json", pattern="^(json|collapsed)$")):
+    """
+    The worker's asyncio tasks, grouped by coroutine and the line they are waiting on.
+    format=collapsed gives the await stacks in flamegraph input format.
+    """
+    report = task_report(limit)
+    if format == "collapsed":
+        return PlainTextResponse(report["collapsed"])
+    report["pid"] = os.getpid()
+    return report
@@ -0,0 +1,121 @@
+import asyncio
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from bson import ObjectId
+
+from llm.memory import MemoryIndex
+
+from period_summaries import NO_ENTRIES_NOTE
+
+# Workers create _ids from their own clocks, so catch-up re-reads this many seconds of them
+CATCH_UP_OVERLAP_SECONDS = 60
+
+
+class _UserMemory:
+    def __init__(self):
+        self.index = MemoryIndex()
+        self.last_id: Optional[ObjectId] = None  # newest entry _id indexed
+        self.recent_ids = set()  # _ids indexed within the overlap window before last_id
+        self.lock = asyncio.Lock()
+        self.last_summary_date: str = ""  # newest daily summary date indexed
+        self.summaries_checked: Optional[date] = None
+
+
+class UserMemories:
+    """
+    Per-worker long-term memory: one MemoryIndex per active user, built from their
+    past user entries and stored daily summaries.
+
+    A user's index is built in the background the first time they are seen, so that
+    message is answered without memories. After that each recall() first pulls in entries
+    inserted since the last one indexed (including ones written by other workers), so the index
+    is updated incrementally on every create_entry. Entries are tracked by _id, not timestamp,
+    so late entries stamped earlier than ones already indexed are still picked up. Daily summaries are picked up once a day.
+    Least recently used users are dropped once the worker holds more than max_rows memories.
+    """
+
+    def __init__(self, entries_collection, summaries_collection, max_rows: int = 100000,
+                 top_k: int = 3, min_score: float = 0.2):
+        self.entries = entries_collection
+        self.summaries = summaries_collection
+        self.max_rows = max_rows
+        self.top_k = top_k
+        self.min_score = min_score
+        self._users: "OrderedDict[str, _UserMemory]" = OrderedDict()
+        self._loading = set()
+
+    async def recall(self, discord_id: str, text: str, before: Optional[datetime] = None) -> List[dict]:
+        """Memories most relevant to text, older than `before`. Empty while the user's index is being built."""
+        memory = self._users.get(discord_id)
+        if memory is None:
+            if discord_id not in self._loading:
+                self._loading.add(discord_id)
+                asyncio.create_task(self._load(discord_id))
+            return []
+        self._users.move_to_end(discord_id)
+        async with memory.lock:
+            await asyncio.to_thread(self._catch_up, discord_id, memory)
+        return memory.index.search(text, k=self.top_k, before=before, min_score=self.min_score)
+
+    def _catch_up(self, discord_id: str, memory: _UserMemory):
+        query = {"discordId": discord_id, "role": "user"}
+        if memory.last_id:
+            since = memory.last_id.generation_time - timedelta(seconds=CATCH_UP_OVERLAP_SECONDS)
+            query["_id"] = {"$gt": ObjectId.from_datetime(since)}
+        new_entries = [
+            e for e in self.entries.find(query, {"content": 1, "timestamp": 1}).sort("_id", 1)
+            if e["_id"] not in memory.recent_ids
+        ]
+        if new_entries:
+            memory.index.add_many((e["content"], e["timestamp"], "entry") for e in new_entries)
+            memory.last_id = max(memory.last_id or new_entries[-1]["_id"], new_entries[-1]["_id"])
+            window_start = memory.last_id.generation_time - timedelta(seconds=CATCH_UP_OVERLAP_SECONDS)
+            memory.recent_ids = {
+                _id for _id in memory.recent_ids.union(e["_id"] for e in new_entries)
+                if _id.generation_time >= window_start
+            }
+
+        today = date.today()
+        if memory.summaries_checked != today:
+            memory.summaries_checked = today
+            new_summaries = sorted(
+                (doc for doc in self.summaries.find({"_id.discordId": discord_id, "level": "day"})
+                 if doc["_id"]["date"] > memory.last_summary_date and doc.get("notes") != NO_ENTRIES_NOTE),
+                key=lambda doc: doc["_id"]["date"]
+            )
+            if new_summaries:
+                memory.index.add_many(
+                    (doc["content"], datetime.strptime(doc["_id"]["date"], "%Y-%m-%d"), "summary") for doc in new_summaries
+                )
+                memory.last_summary_date = new_summaries[-1]["_id"]["date"]
+
+    async def _load(self, discord_id: str):
+        try:
+            memory = _UserMemory()
+            await asyncio.to_thread(self._catch_up, discord_id, memory)
+            self._users[discord_id] = memory
+            print(f"🧠 Indexed {len(memory.index)} memories for user {discord_id}")
+            self._evict(keep=discord_id)
+        except Exception as e:
+            print(f"⚠️ Failed to build memory index for user {discord_id}: {e}")
+        finally:
+            self._loading.discard(discord_id)
+
+    def _evict(self, keep: str):
+        total = sum(len(m.index) for m in self._users.values())
+        while total > self.max_rows and len(self._users) > 1:
+            discord_id, memory = next(iter(self._users.items()))
+            if discord_id == keep:
+                self._users.move_to_end(discord_id)
+                continue
+            del self._users[discord_id]
+            total -= len(memory.index)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._users),
+            "memories": sum(len(m.index) for m in self._users.values()),
+            "bytes": sum(m.index.nbytes for m in self._users.values()),
+        }
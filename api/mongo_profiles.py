@@ -0,0 +1,116 @@
+import json
+from typing import Dict, Optional
+
+from pymongo import MongoClient
+
+# Named MongoDB operation profiles. Each profile gets its own MongoClient, so its own
+# connection pool (max_pool_size), and applies its write concern, read preference and
+# time limit (max_time_ms, sent as maxTimeMS and also bounding server selection) to every
+# operation through it. Operations that aren't assigned a profile use "default".
+#
+# Override any field with a JSON file of the same shape via MONGO_PROFILES_FILE, e.g.
+#   {"history_read": {"read_preference": "primary"}, "bulk_log_write": {"max_pool_size": 20}}
+MONGO_PROFILES = {
+    # Background jobs, migrations, index builds: the driver defaults, no time limit
+    "default": {
+        "write_concern": {},
+        "read_preference": "primary",
+        "max_time_ms": None,
+        "max_pool_size": 100,
+    },
+    # User-facing writes and the reads that must see them: entries, users, summaries
+    "interactive_write": {
+        "write_concern": {"w": "majority"},
+        "read_preference": "primary",
+        "max_time_ms": 2000,
+        "max_pool_size": 50,
+    },
+    # Bot messages logged in batches by the bot; losing one on a failover only loses a log line
+    "bulk_log_write": {
+        "write_concern": {"w": 1},
+        "read_preference": "primary",
+        "max_time_ms": 10000,
+        "max_pool_size": 10,
+    },
+    # Earlier entries for prompts, entry lists and search; a second of lag doesn't matter
+    "history_read": {
+        "write_concern": {},
+        "read_preference": "secondaryPreferred",
+        "max_time_ms": 1500,
+        "max_pool_size": 50,
+    },
+    # Stats and reports: slow and rare, kept to a small pool away from the primary
+    "analytics_read": {
+        "write_concern": {},
+        "read_preference": "secondaryPreferred",
+        "max_time_ms": 30000,
+        "max_pool_size": 5,
+    },
+}
+
+
+def load_profiles(path: Optional[str] = None) -> Dict[str, dict]:
+    """MONGO_PROFILES with the fields set in the JSON file at path (if any) replaced."""
+    profiles = {name: dict(profile) for name, profile in MONGO_PROFILES.items()}
+    if path:
+        with open(path) as f:
+            for name, overrides in json.load(f).items():
+                profiles[name] = {**profiles.get(name, MONGO_PROFILES["default"]), **overrides}
+    return profiles
+
+
+def client_options(profile: dict) -> dict:
+    """MongoClient keyword arguments for a profile."""
+    options = {
+        "readPreference": profile["read_preference"],
+        "maxPoolSize": profile["max_pool_size"],
+        **profile["write_concern"],
+    }
+    if profile.get("max_time_ms"):
+        options["timeoutMS"] = profile["max_time_ms"]
+    return options
+
+
+class MongoProfiles:
+    """
+    One lazily connected MongoClient per operation profile (see MONGO_PROFILES).
+
+        mongo.collection("history_read", "entry").find(...)
+
+    Clients are created with connect=False, like the single client they replace, so a
+    profile that a worker never uses costs nothing. Collection objects are cheap; get
+    them per call.
+    """
+
+    def __init__(self, connection_string: str, database: str, profiles: Optional[Dict[str, dict]] = None):
+        self.connection_string = connection_string
+        self.database = database
+        self.profiles = profiles if profiles is not None else load_profiles()
+        self._clients = {}
+
+    def client(self, profile: str = "default") -> MongoClient:
+        client = self._clients.get(profile)
+        if client is None:
+            client = self._clients[profile] = MongoClient(
+                self.connection_string, connect=False, **client_options(self.profiles[profile])
+            )
+        return client
+
+    def db(self, profile: str = "default"):
+        return self.client(profile)[self.database]
+
+    def collection(self, profile: str, name: str):
+        return self.db(profile)[name]
+
+    def stats(self) -> Dict[str, dict]:
+        """Each profile's settings, and whether this worker has opened its pool."""
+        return {
+            name: {**profile, "open": name in self._clients}
+            for name, profile in self.profiles.items()
+        }
+
+    def close(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            client.close()
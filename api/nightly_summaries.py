@@ -0,0 +1,197 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from llm.batch import FINAL_STATUSES, batch_results, chat_request, submit_batch, wait_for_batch, write_batch_file
+from llm.summarizer import build_summary_prompt
+from local_dates import DEFAULT_TIMEZONE, local_today, user_timezones
+from rolling_summaries import to_summarizer_entry, unfolded_filter
+
+BATCH_COLLECTION = "summary_batch"
+# Same default as Preferences.persona in main.py
+DEFAULT_PERSONA = "drill"
+
+
+class NightlySummaries:
+    """
+    Daily summaries for every user with entries on a day, generated through the OpenAI
+    Batch API instead of one chat() call each: half the price, and a separate rate limit
+    from the interactive replies.
+
+    submit() writes the day's summary prompts to a JSONL file and starts a batch; collect()
+    waits for it and bulk-writes the summaries. The batch and its requests are recorded in
+    summary_batch, so a run that stops while waiting is resumed from its batch id alone.
+    Days that already have a stored summary, or that haven't ended yet in the user's
+    timezone, are left out; days whose request fails are generated on demand as before.
+    """
+
+    def __init__(self, db, base_url: Optional[str] = None, api_key_env: Optional[str] = None,
+                 summary_length: str = "short", batch_dir: str = "batches"):
+        self.entries = db.entry
+        self.summaries = db.summary
+        self.checkpoints = db.summary_checkpoint
+        self.users = db.user
+        self.batches = db[BATCH_COLLECTION]
+        self.base_url = base_url
+        self.api_key_env = api_key_env
+        self.summary_length = summary_length
+        self.batch_dir = batch_dir
+
+    def pending_users(self, date_str: str) -> List[str]:
+        """Users with entries on date_str whose day is over and has no stored summary yet."""
+        users = sorted(self.entries.distinct("discordId", {"localDate": date_str}))
+        summarized = {
+            doc["_id"]["discordId"]
+            for doc in self.summaries.find({"_id": {"$in": [{"discordId": u, "date": date_str} for u in users]}}, {"_id": 1})
+        }
+        timezones = user_timezones(self.users)
+        return [
+            u for u in users
+            if u not in summarized and local_today(timezones.get(u, DEFAULT_TIMEZONE)).isoformat() > date_str
+        ]
+
+    def _personas(self, discord_ids: List[str]) -> Dict[str, str]:
+        docs = self.users.find({"_id.discordId": {"$in": discord_ids}}, {"preferences.persona": 1})
+        personas = {doc["_id"]["discordId"]: (doc.get("preferences") or {}).get("persona") for doc in docs}
+        return {u: personas.get(u) or DEFAULT_PERSONA for u in discord_ids}
+
+    def _request(self, discord_id: str, date_str: str, persona: str):
+        """The batch request for one user-day (as build_daily_summary in main.py would prompt it), and its entry count."""
+        checkpoint = self.checkpoints.find_one({"_id": {"discordId": discord_id, "date": date_str}})
+        day_filter = unfolded_filter(discord_id, date_str, checkpoint)
+        entries = [to_summarizer_entry(entry) for entry in self.entries.find(day_filter).sort("timestamp", 1)]
+        prompt, routing = build_summary_prompt(
+            entries,
+            summary_length=self.summary_length,
+            persona=persona,
+            earlier_summary=checkpoint["content"] if checkpoint else None
+        )
+        custom_id = f"{discord_id}/{date_str}"
+        entry_count = len(entries) + (checkpoint["entryCount"] if checkpoint else 0)
+        return chat_request(custom_id, "summary", prompt, **routing), entry_count
+
+    async def submit(self, date_str: str) -> Optional[str]:
+        """Start a batch with the summaries missing for date_str. Returns its id (None if nothing is missing)."""
+        datetime.strptime(date_str, "%Y-%m-%d")  # Validate the date string
+        users = self.pending_users(date_str)
+        if not users:
+            print(f"📭 No summaries missing for {date_str}")
+            return None
+
+        personas = self._personas(users)
+        requests, meta = [], []
+        for discord_id in users:
+            request, entry_count = self._request(discord_id, date_str, personas[discord_id])
+            requests.append(request)
+            meta.append({"customId": request["custom_id"], "discordId": discord_id, "entryCount": entry_count})
+
+        os.makedirs(self.batch_dir, exist_ok=True)
+        path = os.path.join(self.batch_dir, f"summaries-{date_str}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.jsonl")
+        write_batch_file(path, requests)
+        batch = await submit_batch(path, self.base_url, self.api_key_env, metadata={"job": "nightly_summaries", "date": date_str})
+        self.batches.insert_one({
+            "_id": batch.id,
+            "date": date_str,
+            "summaryLength": self.summary_length,
+            "inputFile": path,
+            "requests": meta,
+            "status": batch.status,
+            "createdAt": datetime.now(timezone.utc).replace(tzinfo=None)
+        })
+        print(f"📦 Submitted batch {batch.id} with {len(requests)} summaries for {date_str} ({path})")
+        return batch.id
+
+    async def collect(self, batch_id: str, poll_interval: float = 60.0, timeout: Optional[float] = None) -> dict:
+        """
+        Wait for a batch (submitted by this or an earlier run) and store its summaries.
+        Returns a report; "status" is the batch status, which is not final if timeout ran out.
+        """
+        job = self.batches.find_one({"_id": batch_id})
+        if job is None:
+            raise ValueError(f"Unknown batch {batch_id}")
+        if job.get("writtenAt"):
+            print(f"✅ Batch {batch_id} was already written")
+            return {"batchId": batch_id, "status": job["status"], "written": job.get("written", 0), "failed": job.get("failed", 0)}
+
+        batch = await wait_for_batch(batch_id, self.base_url, self.api_key_env, poll_interval, timeout)
+        self.batches.update_one({"_id": batch_id}, {"$set": {"status": batch.status}})
+        if batch.status not in FINAL_STATUSES:
+            print(f"⏸️ Batch {batch_id} is still {batch.status}; resume with --resume {batch_id}")
+            return {"batchId": batch_id, "status": batch.status, "written": 0, "failed": 0}
+
+        replies, errors = await batch_results(batch, self.base_url, self.api_key_env)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        writes = []
+        for request in job["requests"]:
+            content = replies.get(request["customId"])
+            if not content:
+                continue
+            # Insert only: a summary stored since the batch was submitted wins
+            writes.append(UpdateOne(
+                {"_id": {"discordId": request["discordId"], "date": job["date"]}},
+                {"$setOnInsert": {
+                    "content": content,
+                    "notes": f"Generated from {request['entryCount']} entries",
+                    "level": "day",
+                    "entryCount": request["entryCount"],
+                    "batchId": batch_id,
+                    "generatedAt": now
+                }},
+                upsert=True
+            ))
+        written = self.summaries.bulk_write(writes, ordered=False).upserted_count if writes else 0
+        failed = len(job["requests"]) - len(writes)
+        for custom_id, error in list(errors.items())[:5]:
+            print(f"❌ {custom_id}: {error}")
+        self.batches.update_one({"_id": batch_id}, {"$set": {"written": written, "failed": failed, "writtenAt": now}})
+        print(f"✅ Batch {batch_id} ({batch.status}): stored {written} summaries for {job['date']}, {failed} failed")
+        return {"batchId": batch_id, "status": batch.status, "written": written, "failed": failed}
+
+    async def run(self, date_str: str, poll_interval: float = 60.0, timeout: Optional[float] = None) -> Optional[dict]:
+        batch_id = await self.submit(date_str)
+        if batch_id is None:
+            return None
+        return await self.collect(batch_id, poll_interval, timeout)
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    from pymongo import MongoClient
+    from settings import get_settings
+    from llm.llm_client import close_openai_client
+    from llm.router import load_routes, router
+
+    # Nightly job, e.g. from cron a few hours after midnight UTC:
+    #   PYTHONPATH=.. python nightly_summaries.py [--date YYYY-MM-DD]
+    # Pick a stopped run up again:
+    #   PYTHONPATH=.. python nightly_summaries.py --resume batch_abc123
+    parser = argparse.ArgumentParser(description="Generate a day's missing daily summaries through the OpenAI Batch API")
+    parser.add_argument("--date", default=(datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d"),
+                        help="local date to summarize (default: yesterday, UTC)")
+    parser.add_argument("--resume", metavar="BATCH_ID", help="wait for and store an already submitted batch")
+    parser.add_argument("--base-url", default=os.getenv("SUMMARY_BATCH_BASE_URL"),
+                        help="OpenAI-compatible endpoint, e.g. a fake one: http://localhost:9101/v1")
+    parser.add_argument("--poll-seconds", type=float, default=60)
+    parser.add_argument("--timeout", type=float, help="stop waiting after this many seconds (resume later)")
+    parser.add_argument("--batch-dir", default="batches", help="where the batch input files are written")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    router.routes = load_routes(settings.llm_routes_file)
+    db = MongoClient(settings.mongo_connection_string)[settings.mongo_database]
+    nightly = NightlySummaries(db, base_url=args.base_url, batch_dir=args.batch_dir)
+
+    async def main():
+        try:
+            if args.resume:
+                await nightly.collect(args.resume, args.poll_seconds, args.timeout)
+            else:
+                await nightly.run(args.date, args.poll_seconds, args.timeout)
+        finally:
+            await close_openai_client()
+
+    asyncio.run(main())
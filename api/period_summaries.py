@@ -0,0 +1,191 @@
+import asyncio
+import calendar
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from llm.summarizer import generate_period_summary
+
+# Notes stored on the placeholder summary of a day without entries
+NO_ENTRIES_NOTE = "No entries available"
+
+
+def outdated_days(entries_collection, discord_id: str, stored: Dict[str, dict]) -> Set[str]:
+    """
+    Days of stored daily summaries ({date: doc}) that cover fewer entries than the day now
+    has: "no entries" placeholders and summaries asked for before the day was over. Archived
+    days have fewer hot entries than their summary covers, never more.
+    """
+    if not stored:
+        return set()
+    counts = {doc["_id"]: doc["count"] for doc in entries_collection.aggregate([
+        {"$match": {"discordId": discord_id, "localDate": {"$in": list(stored)}}},
+        {"$group": {"_id": "$localDate", "count": {"$sum": 1}}},
+    ])}
+    outdated = set()
+    for day, doc in stored.items():
+        covered = 0 if doc.get("notes") == NO_ENTRIES_NOTE else doc.get("entryCount")
+        if covered is not None and counts.get(day, 0) > covered:
+            outdated.add(day)
+    return outdated
+
+
+def week_of(date_str: str) -> Tuple[str, List[str]]:
+    """ISO week key ("2025-W42") and the Monday..Sunday dates of the week containing date_str."""
+    day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    year, week, weekday = day.isocalendar()
+    monday = day - timedelta(days=weekday - 1)
+    return f"{year}-W{week:02d}", [(monday + timedelta(days=i)).isoformat() for i in range(7)]
+
+
+def month_of(month_str: str) -> Tuple[str, List[str]]:
+    """Month key ("2025-10") and every date of the month given as YYYY-MM."""
+    first = datetime.strptime(month_str, "%Y-%m").date()
+    days_in_month = calendar.monthrange(first.year, first.month)[1]
+    return first.strftime("%Y-%m"), [date(first.year, first.month, d).isoformat() for d in range(1, days_in_month + 1)]
+
+
+class PeriodSummaries:
+    """
+    Weekly and monthly summaries built by map-reduce over daily summaries.
+
+    Map: every day of the period gets a daily summary, read from summaries_collection or
+    generated (at most `concurrency` at a time) and stored there once the day is over.
+    Reduce: the dailies are folded into one summary with a single LLM call. If they are
+    too long for one prompt, they are first reduced per week and those intermediate
+    summaries are stored too. Results for finished periods are cached per persona and length.
+    A stored daily summary covering fewer entries than the day now has (a "no entries"
+    placeholder, or one asked for before the day was over) is regenerated.
+    """
+
+    def __init__(
+        self,
+        summaries_collection,
+        build_daily_summary: Callable[[str, str, str, str], Awaitable[Tuple[Optional[str], int]]],
+        entries_collection,
+        concurrency: int = 4,
+        max_reduce_chars: int = 12000,
+        today_for: Optional[Callable[[str], str]] = None
+    ):
+        self.summaries = summaries_collection
+        self.entries = entries_collection
+        self.build_daily_summary = build_daily_summary
+        self.concurrency = concurrency
+        self.max_reduce_chars = max_reduce_chars
+        # The user's current local date (YYYY-MM-DD): days before it are finished
+        self.today_for = today_for or (lambda discord_id: date.today().isoformat())
+
+    async def week(self, discord_id: str, date_str: str, summary_length: str, persona: str) -> dict:
+        key, days = week_of(date_str)
+        return await self._period(discord_id, key, "week", f"week of {days[0]}", days, summary_length, persona)
+
+    async def month(self, discord_id: str, month_str: str, summary_length: str, persona: str) -> dict:
+        key, days = month_of(month_str)
+        label = datetime.strptime(key, "%Y-%m").strftime("%B %Y")
+        return await self._period(discord_id, key, "month", label, days, summary_length, persona)
+
+    async def _period(self, discord_id, key, level, label, days, summary_length, persona) -> dict:
+        today = self.today_for(discord_id)
+        complete = days[-1] < today
+        doc_id = {"discordId": discord_id, "date": key}
+
+        cached = self.summaries.find_one({"_id": doc_id})
+        if (cached and cached.get("complete") and cached.get("persona") == persona
+                and cached.get("summaryLength") == summary_length):
+            print(f"📦 Serving cached {level} summary {key} for user {discord_id}")
+            return cached
+
+        dailies = await self.dailies(discord_id, [d for d in days if d <= today], summary_length, persona)
+        if not dailies:
+            return {"_id": doc_id, "content": f"No entries found for the {label}. Start journaling to get your {level}ly summary!", "notes": NO_ENTRIES_NOTE}
+
+        parts = dailies
+        if sum(len(text) for _, text in dailies) > self.max_reduce_chars:
+            parts = await self._reduce_by_week(discord_id, key, dailies, summary_length, persona, complete)
+
+        print(f"🧮 Reducing {len(parts)} summaries into the {level} summary {key} for user {discord_id}")
+        content = await generate_period_summary(parts, label, level, summary_length, persona)
+        if not content:
+            raise RuntimeError(f"Failed to generate {level} summary")
+
+        doc = {
+            "_id": doc_id,
+            "content": content,
+            "notes": f"Reduced from {len(dailies)} daily summaries",
+            "level": level,
+            "persona": persona,
+            "summaryLength": summary_length,
+            "complete": complete,
+            "generatedAt": datetime.now()
+        }
+        self.summaries.replace_one({"_id": doc_id}, doc, upsert=True)
+        return doc
+
+    async def _reduce_by_week(self, discord_id, key, dailies, summary_length, persona, complete):
+        """Intermediate level: one summary per ISO week of the period, stored as "<key>/<week>"."""
+        weeks = {}
+        for day, text in dailies:
+            weeks.setdefault(week_of(day)[0], []).append((day, text))
+
+        async def reduce_week(week_key, week_dailies):
+            doc_id = {"discordId": discord_id, "date": f"{key}/{week_key}"}
+            cached = self.summaries.find_one({"_id": doc_id})
+            if (cached and cached.get("days") == len(week_dailies) and cached.get("persona") == persona
+                    and cached.get("summaryLength") == summary_length):
+                return cached["content"]
+            label = f"{week_dailies[0][0]} to {week_dailies[-1][0]}"
+            content = await generate_period_summary(week_dailies, label, "week", summary_length, persona)
+            if content:
+                self.summaries.replace_one({"_id": doc_id}, {
+                    "_id": doc_id,
+                    "content": content,
+                    "level": "week-part",
+                    "persona": persona,
+                    "summaryLength": summary_length,
+                    "days": len(week_dailies),
+                    "complete": complete,
+                    "generatedAt": datetime.now()
+                }, upsert=True)
+            return content
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(week_key, week_dailies):
+            async with semaphore:
+                return week_dailies, await reduce_week(week_key, week_dailies)
+
+        results = await asyncio.gather(*(bounded(k, v) for k, v in sorted(weeks.items())))
+        return [(f"{wd[0][0]} to {wd[-1][0]}", text) for wd, text in results if text]
+
+    async def dailies(self, discord_id: str, days: List[str], summary_length: str, persona: str) -> List[Tuple[str, str]]:
+        """(date, summary) for every day with entries, generating missing ones in parallel."""
+        stored = {
+            doc["_id"]["date"]: doc
+            for doc in self.summaries.find({"_id": {"$in": [{"discordId": discord_id, "date": d} for d in days]}})
+        }
+        today = self.today_for(discord_id)
+        for day in outdated_days(self.entries, discord_id, stored):
+            del stored[day]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def daily(day):
+            doc = stored.get(day)
+            if doc and day < today:
+                return None if doc.get("notes") == NO_ENTRIES_NOTE else doc["content"]
+            async with semaphore:
+                content, entry_count = await self.build_daily_summary(discord_id, day, summary_length, persona)
+            if day < today and (content or entry_count == 0):
+                # Finished days never change, so keep them for the next reduction
+                self.summaries.replace_one({"_id": {"discordId": discord_id, "date": day}}, {
+                    "_id": {"discordId": discord_id, "date": day},
+                    "content": content or f"No entries found for {day}.",
+                    "notes": f"Generated from {entry_count} entries" if content else NO_ENTRIES_NOTE,
+                    "level": "day",
+                    "entryCount": entry_count
+                }, upsert=True)
+            return content
+
+        contents = await asyncio.gather(*(daily(day) for day in days))
+        missing = sum(1 for day in days if day not in stored)
+        if missing:
+            print(f"🗓️ Generated {missing} missing daily summaries for user {discord_id}")
+        return [(day, content) for day, content in zip(days, contents) if content]
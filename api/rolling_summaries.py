@@ -0,0 +1,189 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from llm.summarizer import generate_rolling_summary
+from llm.usage import for_user
+
+# How long a worker owns a user-day it is folding
+FOLD_CLAIM_SECONDS = 300
+
+
+def to_summarizer_entry(entry: dict) -> dict:
+    """Convert a MongoDB entry to the format expected by the summarizer."""
+    return {
+        "timestamp": entry["timestamp"].isoformat(),
+        "role": entry["role"],
+        "content": entry["content"],
+        "source": entry.get("source", "entry")
+    }
+
+
+def unfolded_filter(discord_id: str, date_str: str, checkpoint: Optional[dict]) -> dict:
+    """
+    Filter for the day's entries not yet folded into checkpoint. Entries are tracked by _id,
+    not timestamp: bot messages written behind and retried ingests can arrive after later
+    entries were folded. Checkpoints from before foldedIds existed fall back to lastTimestamp.
+    """
+    day_filter = {"discordId": discord_id, "localDate": date_str}
+    if checkpoint and "foldedIds" in checkpoint:
+        day_filter["_id"] = {"$nin": checkpoint["foldedIds"]}
+    elif checkpoint:
+        day_filter["timestamp"] = {"$gt": checkpoint["lastTimestamp"]}
+    return day_filter
+
+
+class RollingSummaries:
+    """
+    Keeps compact running notes ("checkpoints") of each user's day in the summary_checkpoint
+    collection, so the end-of-day summary only has to read the notes plus the entries since.
+
+    A checkpoint is folded forward in the background every `every_entries` new entries seen by
+    this worker, and for every active user by run_periodically(). The checkpoint keeps the _ids
+    of the entries it covers (foldedIds), so entries that arrive late are folded in by the next
+    pass whatever their timestamp. Folds of the same user-day are serialized per worker, and
+    across workers by a lease in leases_collection (every worker runs the periodic pass, only
+    one of them calls the LLM for a given user-day). A conditional update on entryCount still
+    stops a worker whose lease expired mid-fold from overwriting newer notes.
+    """
+
+    def __init__(self, checkpoints_collection, entries_collection, leases_collection,
+                 every_entries: int = 20, max_fold_entries: int = 200):
+        self.checkpoints = checkpoints_collection
+        self.entries = entries_collection
+        self.leases = leases_collection
+        self.every_entries = every_entries
+        self.max_fold_entries = max_fold_entries
+        self._new_entries = {}
+        self._locks = {}
+        self._tasks = set()
+
+    def get(self, discord_id: str, date_str: str) -> Optional[dict]:
+        return self.checkpoints.find_one({"_id": {"discordId": discord_id, "date": date_str}})
+
+    def record_entry(self, discord_id: str, date_str: str):
+        """Count a new entry and start a background fold once enough have accumulated."""
+        key = (discord_id, date_str)
+        self._new_entries[key] = self._new_entries.get(key, 0) + 1
+        if self._new_entries[key] >= self.every_entries:
+            self._new_entries[key] = 0
+            task = asyncio.create_task(self.fold(discord_id, date_str))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def fold(self, discord_id: str, date_str: str) -> Optional[dict]:
+        """Fold all entries not yet covered by the checkpoint into it. Returns the up-to-date checkpoint."""
+        lock = self._locks.setdefault((discord_id, date_str), asyncio.Lock())
+        async with lock:
+            if not self._claim(discord_id, date_str):
+                # Another worker is folding this day; its checkpoint is the freshest there is
+                return self.get(discord_id, date_str)
+            try:
+                checkpoint = self.get(discord_id, date_str)
+                while True:
+                    folded = await self._fold_once(discord_id, date_str, checkpoint)
+                    if folded is None:
+                        return checkpoint
+                    checkpoint, more = folded
+                    if not more:
+                        return checkpoint
+            finally:
+                self.leases.update_one({"_id": {"discordId": discord_id, "date": date_str}}, {"$set": {"claimedUntil": None}})
+
+    def _claim(self, discord_id: str, date_str: str) -> bool:
+        """Take the user-day's fold lease; another worker's unexpired lease makes the upsert a duplicate."""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        try:
+            self.leases.update_one(
+                {"_id": {"discordId": discord_id, "date": date_str},
+                 "$or": [{"claimedUntil": {"$lt": now}}, {"claimedUntil": None}]},
+                {"$set": {"claimedUntil": now + timedelta(seconds=FOLD_CLAIM_SECONDS)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    def _forget_before(self, date_str: str):
+        """Drop this worker's counters and idle locks for days before date_str."""
+        for key in [key for key in self._new_entries if key[1] < date_str]:
+            del self._new_entries[key]
+        for key, lock in list(self._locks.items()):
+            if key[1] < date_str and not lock.locked():
+                del self._locks[key]
+
+    def _folded_ids(self, checkpoint: Optional[dict]) -> list:
+        if not checkpoint:
+            return []
+        if "foldedIds" in checkpoint:
+            return checkpoint["foldedIds"]
+        # Written before foldedIds existed: it covers the entries up to lastTimestamp
+        key = checkpoint["_id"]
+        return self.entries.distinct("_id", {
+            "discordId": key["discordId"], "localDate": key["date"],
+            "timestamp": {"$lte": checkpoint["lastTimestamp"]}
+        })
+
+    async def _fold_once(self, discord_id: str, date_str: str, checkpoint: Optional[dict]):
+        tail = list(
+            self.entries.find(unfolded_filter(discord_id, date_str, checkpoint))
+            .sort("timestamp", 1)
+            .limit(self.max_fold_entries)
+        )
+        if not tail:
+            return None
+
+        with for_user(discord_id):
+            content = await generate_rolling_summary(
+                checkpoint["content"] if checkpoint else None,
+                [to_summarizer_entry(entry) for entry in tail]
+            )
+        if not content:
+            print(f"❌ Rolling summary update failed for user {discord_id} on {date_str}")
+            return None
+
+        key = {"discordId": discord_id, "date": date_str}
+        folded_ids = self._folded_ids(checkpoint) + [entry["_id"] for entry in tail]
+        fields = {
+            "content": content,
+            "foldedIds": folded_ids,
+            "lastTimestamp": max(entry["timestamp"] for entry in tail),
+            "entryCount": len(folded_ids),
+            "updatedAt": datetime.now()
+        }
+        if checkpoint:
+            fields["lastTimestamp"] = max(fields["lastTimestamp"], checkpoint["lastTimestamp"])
+            result = self.checkpoints.update_one({"_id": key, "entryCount": checkpoint["entryCount"]}, {"$set": fields})
+            if result.matched_count == 0:
+                # Another worker folded this day first; keep its notes
+                return self.get(discord_id, date_str), False
+        else:
+            try:
+                self.checkpoints.insert_one({"_id": key, **fields})
+            except DuplicateKeyError:
+                return self.get(discord_id, date_str), False
+
+        print(f"🧾 Rolling summary for user {discord_id} on {date_str} now covers {fields['entryCount']} entries")
+        return {"_id": key, **fields}, len(tail) == self.max_fold_entries
+
+    async def fold_active_users(self, date_str: str):
+        """Fold the checkpoints of every user with entries on date_str (their local date)."""
+        discord_ids = self.entries.distinct("discordId", {"localDate": date_str})
+        for discord_id in discord_ids:
+            await self.fold(discord_id, date_str)
+
+    async def run_periodically(self, interval_seconds: float):
+        """Background loop: bring today's checkpoints up to date every interval_seconds."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                # "Today" is one of three dates depending on the user's timezone
+                today = datetime.now(timezone.utc).date()
+                days = (today - timedelta(days=1), today, today + timedelta(days=1))
+                self._forget_before(days[0].isoformat())
+                for day in days:
+                    await self.fold_active_users(day.isoformat())
+            except Exception as e:
+                print(f"❌ Rolling summary pass failed: {e}")
@@ -0,0 +1,115 @@
+import os
+from functools import lru_cache
+from typing import Optional
+from pydantic import BaseModel
+from dotenv import load_dotenv
+
+
+class Settings(BaseModel):
+    """Typed API configuration, read from the environment once per process."""
+    mongo_connection_string: Optional[str] = None
+    mongo_database: str = "main"
+    # JSON overrides of the MongoDB operation profiles (see mongo_profiles.py)
+    mongo_profiles_file: Optional[str] = None
+    # How long shutdown waits for in-flight LLM/TTS calls before closing the pools
+    llm_drain_timeout: float = 30.0
+    # JSON replacement for the model routing table (see llm/router.py)
+    llm_routes_file: Optional[str] = None
+    # In-process user profile cache (see user_cache.py)
+    user_cache_size: int = 10000
+    user_cache_ttl_seconds: float = 300
+    # Invalidate cached users from a MongoDB change stream (needs a replica set)
+    user_cache_change_stream: bool = False
+    # Rolling day summaries (see rolling_summaries.py)
+    rolling_summary_every_entries: int = 20
+    rolling_summary_interval_seconds: float = 3600
+    # Max daily summaries generated in parallel for a week/month summary
+    period_summary_concurrency: int = 4
+    # Where summary audio is stored (see audio_storage.py): local, s3 or gridfs
+    audio_storage_backend: str = "local"
+    audio_local_dir: str = "audio"
+    s3_bucket: Optional[str] = None
+    s3_endpoint_url: Optional[str] = None  # e.g. http://minio:9000
+    s3_region: Optional[str] = None
+    # Lifetime of the pre-signed download URLs handed to the bot
+    audio_url_expiry_seconds: int = 3600
+    # Audio older than this is deleted by the retention loop (0 disables it)
+    audio_retention_days: float = 30
+    audio_gc_interval_seconds: float = 6 * 3600
+    # Long-term memory for one-turn replies (see memories.py)
+    memory_enabled: bool = True
+    memory_top_k: int = 3
+    memory_min_score: float = 0.2
+    # Memories kept in RAM per worker (about 1 KB each) before least recently used users are dropped
+    memory_max_rows: int = 100000
+    # Entries of days older than this move to entry_archive once the day is summarized (see archive.py)
+    archive_after_days: int = 90
+    # How often a worker runs the archive job (0 disables it; run it in one worker or from cron)
+    archive_interval_seconds: float = 0
+    # Shared one-turn reply cache (see llm/reply_cache.py): entries per worker, how long they live
+    # and how many LLM replies each collects before serving them in rotation
+    reply_cache_enabled: bool = True
+    reply_cache_max_entries: int = 10000
+    reply_cache_ttl_seconds: float = 6 * 3600
+    reply_cache_variants: int = 3
+    # Summary prewarming (see summary_prewarm.py): how often to look for summaries due soon (0 disables it),
+    # how long before the predicted !summary to generate, and the LLM/TTS calls in flight above which it waits
+    summary_prewarm_interval_seconds: float = 300
+    summary_prewarm_lead_minutes: float = 30
+    summary_prewarm_max_in_flight: int = 2
+    # How often each worker writes its LLM/TTS usage counts (see usage_ledger.py), and the daily
+    # per-user quotas above which users get cheaper replies, short summaries and no audio (0: none)
+    usage_flush_seconds: float = 10
+    usage_daily_token_quota: int = 0
+    usage_daily_tts_char_quota: int = 0
+    # Shared secret for the /admin endpoints, sent as X-Admin-Token (unset disables them)
+    admin_token: Optional[str] = None
+
+    @classmethod
+    def from_env(cls):
+        """Create Settings from environment variables (and the .env file, if present)"""
+        load_dotenv()
+        return cls(
+            mongo_connection_string=os.getenv("connection_string"),
+            mongo_database=os.getenv("MONGO_DATABASE", "main"),
+            mongo_profiles_file=os.getenv("MONGO_PROFILES_FILE") or None,
+            llm_drain_timeout=float(os.getenv("LLM_DRAIN_TIMEOUT", "30")),
+            llm_routes_file=os.getenv("LLM_ROUTES_FILE") or None,
+            user_cache_size=int(os.getenv("USER_CACHE_SIZE", "10000")),
+            user_cache_ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", "300")),
+            user_cache_change_stream=os.getenv("USER_CACHE_CHANGE_STREAM", "false").lower() in ("1", "true", "yes"),
+            rolling_summary_every_entries=int(os.getenv("ROLLING_SUMMARY_EVERY_ENTRIES", "20")),
+            rolling_summary_interval_seconds=float(os.getenv("ROLLING_SUMMARY_INTERVAL_SECONDS", "3600")),
+            period_summary_concurrency=int(os.getenv("PERIOD_SUMMARY_CONCURRENCY", "4")),
+            audio_storage_backend=os.getenv("AUDIO_STORAGE", "local").lower(),
+            audio_local_dir=os.getenv("AUDIO_LOCAL_DIR", "audio"),
+            s3_bucket=os.getenv("AUDIO_S3_BUCKET"),
+            s3_endpoint_url=os.getenv("AUDIO_S3_ENDPOINT_URL"),
+            s3_region=os.getenv("AUDIO_S3_REGION"),
+            audio_url_expiry_seconds=int(os.getenv("AUDIO_URL_EXPIRY_SECONDS", "3600")),
+            audio_retention_days=float(os.getenv("AUDIO_RETENTION_DAYS", "30")),
+            audio_gc_interval_seconds=float(os.getenv("AUDIO_GC_INTERVAL_SECONDS", str(6 * 3600))),
+            memory_enabled=os.getenv("MEMORY_ENABLED", "true").lower() in ("1", "true", "yes"),
+            memory_top_k=int(os.getenv("MEMORY_TOP_K", "3")),
+            memory_min_score=float(os.getenv("MEMORY_MIN_SCORE", "0.2")),
+            memory_max_rows=int(os.getenv("MEMORY_MAX_ROWS", "100000")),
+            archive_after_days=int(os.getenv("ARCHIVE_AFTER_DAYS", "90")),
+            archive_interval_seconds=float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "0")),
+            reply_cache_enabled=os.getenv("REPLY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+            reply_cache_max_entries=int(os.getenv("REPLY_CACHE_MAX_ENTRIES", "10000")),
+            reply_cache_ttl_seconds=float(os.getenv("REPLY_CACHE_TTL_SECONDS", str(6 * 3600))),
+            reply_cache_variants=int(os.getenv("REPLY_CACHE_VARIANTS", "3")),
+            summary_prewarm_interval_seconds=float(os.getenv("SUMMARY_PREWARM_INTERVAL_SECONDS", "300")),
+            summary_prewarm_lead_minutes=float(os.getenv("SUMMARY_PREWARM_LEAD_MINUTES", "30")),
+            summary_prewarm_max_in_flight=int(os.getenv("SUMMARY_PREWARM_MAX_IN_FLIGHT", "2")),
+            usage_flush_seconds=float(os.getenv("USAGE_FLUSH_SECONDS", "10")),
+            usage_daily_token_quota=int(os.getenv("USAGE_DAILY_TOKEN_QUOTA", "0")),
+            usage_daily_tts_char_quota=int(os.getenv("USAGE_DAILY_TTS_CHAR_QUOTA", "0")),
+            admin_token=os.getenv("ADMIN_TOKEN") or None,
+        )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Load the settings on first use and reuse them afterwards."""
+    return Settings.from_env()
@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from llm.llm_client import in_flight_calls
+from llm.usage import usage_ledger
+from local_dates import DEFAULT_TIMEZONE, to_local
+
+PREWARM_COLLECTION = "summary_prewarm"
+HABIT_COLLECTION = "summary_habit"
+# Local times of day (minutes after midnight) of a user's last requests that predictions use
+HISTORY_SIZE = 14
+MIN_HISTORY = 3
+# A day's summary is regenerated at most this many times before the user asks
+MAX_GENERATIONS = 3
+# How long a worker owns a user-day it is generating
+CLAIM_SECONDS = 600
+
+
+def entries_fingerprint(entries_collection, discord_id: str, date_str: str) -> str:
+    """
+    Fingerprint of the user's own entries on a local day. Bot messages (follow-ups logged in
+    the background) don't make a summary stale, new, deleted or archived user entries do.
+    """
+    ids = [str(doc["_id"]) for doc in entries_collection.find(
+        {"discordId": discord_id, "localDate": date_str, "role": "user"}, {"_id": 1}
+    ).sort("timestamp", 1)]
+    return f"{len(ids)}:{hashlib.sha1(','.join(ids).encode()).hexdigest()[:16]}"
+
+
+def minutes_of_day(local_time: datetime) -> int:
+    return local_time.hour * 60 + local_time.minute
+
+
+class SummaryPrewarmer:
+    """
+    Generates the day's summary and audio ahead of !summary, so the request is answered
+    from summary_prewarm instead of waiting for an LLM completion and TTS.
+
+    Each user's request time is predicted from the local times of their last requests
+    (summary_habit), or from the start of their quiet hours until there are MIN_HISTORY of
+    them. run_once() generates the summaries due within lead_minutes of their predicted
+    time, but only while this worker has at most max_in_flight LLM/TTS calls running, so
+    interactive replies never wait behind it. A claim on the summary_prewarm document stops
+    two workers from generating the same user-day.
+
+    take() serves a precomputed summary if it was made with the same length, persona and
+    voice and the day's entries fingerprint hasn't changed since. Every generation is
+    counted, so waste_stats() reports how many were never served.
+    """
+
+    def __init__(self, db, build_summary: Callable, store_audio: Callable, users_collection=None,
+                 lead_minutes: float = 30, max_in_flight: int = 2, summary_length: str = "short"):
+        self.entries = db.entry
+        self.prewarmed = db[PREWARM_COLLECTION]
+        self.habits = db[HABIT_COLLECTION]
+        self.users = users_collection if users_collection is not None else db.user
+        self.build_summary = build_summary
+        self.store_audio = store_audio
+        self.lead_minutes = lead_minutes
+        self.max_in_flight = max_in_flight
+        self.summary_length = summary_length
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.generated = 0
+        self.skipped_busy = 0
+
+    def record_request(self, discord_id: str, tz_name: str, now: Optional[datetime] = None):
+        """Remember the local time of day of a request for today's summary."""
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        self.habits.update_one(
+            {"_id": discord_id},
+            {"$push": {"minutes": {"$each": [minutes_of_day(to_local(now, tz_name))], "$slice": -HISTORY_SIZE}},
+             "$set": {"updatedAt": now}},
+            upsert=True
+        )
+
+    def predict(self, user: dict, habit: Optional[dict]) -> Optional[int]:
+        """Predicted local minute of day of the user's next request, or None if there's nothing to go on."""
+        minutes = sorted((habit or {}).get("minutes") or [])
+        if len(minutes) >= MIN_HISTORY:
+            return minutes[len(minutes) // 2]
+        quiet_start = ((user or {}).get("quietHours") or {}).get("start")
+        if quiet_start:
+            hours, mins = quiet_start.split(":")
+            return int(hours) * 60 + int(mins)
+        return None
+
+    def take(self, discord_id: str, date_str: str, summary_length: str, persona: str, voice: str) -> Optional[dict]:
+        """
+        The precomputed summary for a request, if it is still valid: made with the same
+        length, persona and voice, and no user entry added or removed since. Marks it served.
+        """
+        doc = self.prewarmed.find_one({"_id": {"discordId": discord_id, "date": date_str}, "status": "ready"})
+        if doc is None:
+            self.misses += 1
+            return None
+        if (doc["summaryLength"], doc["persona"], doc["voice"]) != (summary_length, persona, voice) \
+                or doc["fingerprint"] != entries_fingerprint(self.entries, discord_id, date_str):
+            self.stale += 1
+            self.prewarmed.update_one({"_id": doc["_id"], "status": "ready"}, {"$set": {"status": "stale"}})
+            return None
+        served_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        self.prewarmed.update_one({"_id": doc["_id"]}, {"$set": {"status": "served", "servedAt": served_at}})
+        self.hits += 1
+        return doc
+
+    def due(self, now: Optional[datetime] = None) -> List[dict]:
+        """User-days whose predicted request is within lead_minutes and have no valid prewarmed summary."""
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        # "Today" is one of three dates depending on the user's timezone
+        days = [(now.date() + timedelta(days=offset)).isoformat() for offset in (-1, 0, 1)]
+        active = self.entries.distinct("discordId", {"localDate": {"$in": days}, "role": "user"})
+        if not active:
+            return []
+        users = {doc["_id"]["discordId"]: doc for doc in self.users.find(
+            {"_id.discordId": {"$in": active}}, {"quietHours": 1, "preferences": 1}
+        )}
+        habits = {doc["_id"]: doc for doc in self.habits.find({"_id": {"$in": active}})}
+        prewarmed = {(doc["_id"]["discordId"], doc["_id"]["date"]): doc for doc in self.prewarmed.find(
+            {"_id.discordId": {"$in": active}, "_id.date": {"$in": days}}
+        )}
+
+        due = []
+        for discord_id in active:
+            user = users.get(discord_id) or {}
+            preferences = user.get("preferences") or {}
+            tz_name = preferences.get("timezone") or DEFAULT_TIMEZONE
+            predicted = self.predict(user, habits.get(discord_id))
+            if predicted is None:
+                continue
+            local_now = to_local(now, tz_name)
+            minutes_left = predicted - minutes_of_day(local_now)
+            if not 0 <= minutes_left <= self.lead_minutes:
+                continue
+            # Over-quota users get their summary on request only, if they ask
+            if usage_ledger.over_token_quota(discord_id):
+                continue
+            date_str = local_now.strftime("%Y-%m-%d")
+            doc = prewarmed.get((discord_id, date_str))
+            if doc is not None and (doc.get("status") in ("served", "stale") or doc.get("generations", 0) >= MAX_GENERATIONS):
+                continue
+            due.append({
+                "discordId": discord_id,
+                "date": date_str,
+                "persona": preferences.get("persona") or "drill",
+                "voice": preferences.get("voice") or "alloy",
+                "fingerprint": doc.get("fingerprint") if doc else None,
+            })
+        return due
+
+    async def prewarm(self, job: dict, now: Optional[datetime] = None) -> bool:
+        """Generate and store one user-day's summary and audio. Returns False if it wasn't needed or failed."""
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        discord_id, date_str = job["discordId"], job["date"]
+        key = {"discordId": discord_id, "date": date_str}
+        fingerprint = await asyncio.to_thread(entries_fingerprint, self.entries, discord_id, date_str)
+        if fingerprint == job["fingerprint"]:
+            return False  # Still valid
+
+        # Claim the user-day; another worker's unexpired claim makes the upsert a duplicate
+        try:
+            self.prewarmed.update_one(
+                {"_id": key, "$or": [{"claimedUntil": {"$lt": now}}, {"claimedUntil": None}]},
+                {"$set": {"claimedUntil": now + timedelta(seconds=CLAIM_SECONDS)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+
+        content, entry_count = await self.build_summary(discord_id, date_str, self.summary_length, job["persona"])
+        if not content:
+            self.prewarmed.update_one({"_id": key}, {"$set": {"claimedUntil": None}})
+            return False
+        audio_file_path = await self.store_audio(content, job["voice"], discord_id, date_str, self.summary_length)
+        self.prewarmed.update_one({"_id": key}, {
+            "$set": {
+                "status": "ready",
+                "content": content,
+                "notes": f"Generated from {entry_count} entries",
+                "entryCount": entry_count,
+                "audio_file_path": audio_file_path,
+                "fingerprint": fingerprint,
+                "summaryLength": self.summary_length,
+                "persona": job["persona"],
+                "voice": job["voice"],
+                "generatedAt": now,
+                "claimedUntil": None
+            },
+            "$inc": {"generations": 1}
+        })
+        self.generated += 1
+        print(f"🔥 Prewarmed summary for user {discord_id} on {date_str} ({entry_count} entries)")
+        return True
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """Prewarm the summaries that are due, one at a time while this worker is idle. Returns how many were made."""
+        jobs = await asyncio.to_thread(self.due, now)
+        made = 0
+        for job in jobs:
+            if in_flight_calls() > self.max_in_flight:
+                self.skipped_busy += len(jobs) - made
+                break
+            made += await self.prewarm(job, now)
+        return made
+
+    async def run_periodically(self, interval_seconds: float):
+        """Background loop: prewarm the summaries due soon every interval_seconds."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"❌ Summary prewarm pass failed: {e}")
+
+    def waste_stats(self, days: int = 7, now: Optional[datetime] = None) -> Dict[str, object]:
+        """
+        Generations over the last `days` days that were never served: those of days the user
+        never asked about, stale ones, and every regeneration but the one served.
+        """
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        since = (now - timedelta(days=days)).strftime("%Y-%m-%d")
+        totals = {"ready": [0, 0], "served": [0, 0], "stale": [0, 0]}
+        for doc in self.prewarmed.find({"_id.date": {"$gte": since}, "generations": {"$gt": 0}}, {"status": 1, "generations": 1}):
+            counts = totals.setdefault(doc.get("status"), [0, 0])
+            counts[0] += 1
+            counts[1] += doc["generations"]
+        generations = sum(count[1] for count in totals.values())
+        wasted = generations - totals["served"][0]
+        return {
+            "days": days,
+            "generations": generations,
+            "served": totals["served"][0],
+            "stale": totals["stale"][0],
+            "neverRequested": totals["ready"][0],
+            "wasted": wasted,
+            "wasteRate": round(wasted / generations, 3) if generations else None,
+        }
+
+    def stats(self) -> Dict[str, object]:
+        """This worker's counters since it started."""
+        requests = self.hits + self.stale + self.misses
+        return {
+            "generated": self.generated,
+            "hits": self.hits,
+            "stale": self.stale,
+            "misses": self.misses,
+            "hitRate": round(self.hits / requests, 3) if requests else None,
+            "skippedBusy": self.skipped_busy,
+        }
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo import UpdateOne
+
+from llm.usage import UNATTRIBUTED, UsageLedger, usage_ledger
+
+USAGE_COLLECTION = "usage"
+SUM_FIELDS = ("llmCalls", "promptTokens", "completionTokens", "ttsCalls", "ttsChars")
+
+
+class UsageLedgerWriter:
+    """
+    Writes the in-memory usage ledger (llm/usage.py) to the usage collection: one document
+    per user per UTC day, {_id: {discordId, date}, llmCalls, promptTokens, completionTokens,
+    tasks: {<task>: {calls, tokens}}, ttsCalls, ttsChars}. Each flush is one unordered bulk
+    write of $inc upserts, however many calls were counted since the last one, followed by
+    one read of the flushed documents so quota checks see other workers' usage too.
+    """
+
+    def __init__(self, collection, ledger: UsageLedger = usage_ledger):
+        self.collection = collection
+        self.ledger = ledger
+        self.flushes = 0
+        self.written = 0
+
+    def flush(self) -> int:
+        """Write the pending counts. Returns how many user-days were updated."""
+        pending = self.ledger.take_pending()
+        if not pending:
+            return 0
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        keys = [{"discordId": discord_id, "date": date_str} for discord_id, date_str in pending]
+        try:
+            self.collection.bulk_write([
+                UpdateOne({"_id": key}, {"$inc": fields, "$set": {"updatedAt": now}}, upsert=True)
+                for key, fields in zip(keys, pending.values())
+            ], ordered=False)
+        except Exception:
+            # Nothing is lost: the counts go out with the next flush
+            self.ledger.restore(pending)
+            raise
+        self.flushes += 1
+        self.written += len(keys)
+        self.ledger.apply_totals(self.collection.find({"_id": {"$in": keys}}))
+        return len(keys)
+
+    async def run_periodically(self, interval_seconds: float):
+        """Background loop: flush every interval_seconds."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                print(f"⚠️ Usage ledger flush failed, will retry: {e}")
+
+    def report(self, start: str, end: str, discord_id: Optional[str] = None, top: int = 50) -> dict:
+        """Usage per user over start..end (YYYY-MM-DD, inclusive, UTC days), heaviest token users first."""
+        match = {"_id.date": {"$gte": start, "$lte": end}}
+        if discord_id:
+            match["_id.discordId"] = discord_id
+        group = {"_id": "$_id.discordId", "days": {"$sum": 1}}
+        group.update({field: {"$sum": f"${field}"} for field in SUM_FIELDS})
+        users = list(self.collection.aggregate([
+            {"$match": match},
+            {"$group": group},
+            {"$addFields": {"tokens": {"$add": ["$promptTokens", "$completionTokens"]}}},
+            {"$sort": {"tokens": -1, "ttsChars": -1}},
+        ]))
+        totals = {field: sum(user[field] for user in users) for field in SUM_FIELDS}
+        return {
+            "from": start,
+            "to": end,
+            "users": len([user for user in users if user["_id"] != UNATTRIBUTED]),
+            "totals": totals,
+            "top": [{"discordId": user.pop("_id"), **user} for user in users[:top]],
+            "ledger": {**self.ledger.stats(), "flushes": self.flushes, "userDaysWritten": self.written},
+        }
@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Cached marker for "no such user", so unknown users don't cost a round trip every message
+_MISSING = object()
+
+
+class UserProfileCache:
+    """
+    Bounded LRU cache of user documents with a TTL, shared by all requests in a worker.
+    Writes through the API update or invalidate the cache; other workers either wait
+    for the TTL or get invalidated by watch_user_changes().
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        # The change-stream watcher runs in its own thread
+        self._lock = threading.Lock()
+
+    def get(self, discord_id: str):
+        """Return (hit, user_doc). user_doc is None for users known not to exist."""
+        with self._lock:
+            item = self._data.get(discord_id)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[discord_id]
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(discord_id)
+            self.hits += 1
+            value = item[1]
+        return True, (None if value is _MISSING else value)
+
+    def put(self, discord_id: str, user_doc: Optional[dict]):
+        with self._lock:
+            self._data[discord_id] = (time.monotonic() + self.ttl_seconds, _MISSING if user_doc is None else user_doc)
+            self._data.move_to_end(discord_id)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, discord_id: str):
+        with self._lock:
+            self._data.pop(discord_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 3) if total else None,
+        }
+
+
+def watch_user_changes(users_collection, cache: UserProfileCache, stop: threading.Event):
+    """
+    Invalidate cached users whenever their document changes in MongoDB, so writes made
+    by other workers or replicas show up immediately. Requires a replica set; run in a thread.
+    """
+    try:
+        with users_collection.watch(max_await_time_ms=1000) as stream:
+            print("👀 Watching user changes for cache invalidation")
+            while not stop.is_set():
+                change = stream.try_next()
+                if change is None:
+                    continue
+                discord_id = (change.get("documentKey", {}).get("_id") or {}).get("discordId")
+                if discord_id:
+                    cache.invalidate(discord_id)
+                else:
+                    # Unknown key shape (e.g. drop/rename events): start over
+                    cache.clear()
+    except Exception as e:
+        print(f"⚠️ User change stream stopped, relying on TTL only: {e}")
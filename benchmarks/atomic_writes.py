@@ -0,0 +1,169 @@
+"""
+Create paths with a single atomic insert (duplicate _id -> 409) against the old
+read-then-insert (find_one, then insert_one).
+
+Latency: --writes sequential creates of new users, then of existing ones (the 409 path),
+each way. The insert-only path saves the find_one round trip on every write.
+
+Concurrency: runs the API in-process and sends --creates POST /users and POST /summaries
+requests from --concurrency threads for --distinct ids, so most requests race for an id
+someone else is creating. Every id must be created exactly once, every other request get a
+409 and none a 500. The same race against the read-then-insert pattern shows how many of
+its requests passed the existence check and then failed on the insert.
+
+    python benchmarks/atomic_writes.py --mongo-uri mongodb://localhost:27017 [--creates 500 --concurrency 200]
+"""
+import argparse
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+from pymongo import MongoClient  # noqa: E402
+from pymongo.errors import DuplicateKeyError  # noqa: E402
+
+
+def user_doc(discord_id):
+    return {
+        "_id": {"discordId": discord_id},
+        "name": discord_id,
+        "startDate": "2024-03-04T09:00:00",
+        "preferredFrequency": "dynamic",
+        "nextUpdateTime": "2024-03-04T09:00:00",
+        "quietHours": {"start": "22:00", "end": "07:00"},
+    }
+
+
+def read_then_insert(collection, doc):
+    if collection.find_one({"_id.discordId": doc["_id"]["discordId"]}):
+        return 409
+    collection.insert_one(doc)
+    return 201
+
+
+def insert_only(collection, doc):
+    try:
+        collection.insert_one(doc)
+    except DuplicateKeyError:
+        return 409
+    return 201
+
+
+def timed(write, collection, docs):
+    latencies = []
+    for doc in docs:
+        started = time.perf_counter()
+        write(collection, dict(doc))
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies) * 1000
+
+
+def latency(db, writes):
+    print(f"Write latency, p50 of {writes} sequential writes:")
+    print(f"{'':<20}{'read-then-insert':>18}{'insert only':>14}")
+    results = {}
+    for name, write in (("read-then-insert", read_then_insert), ("insert only", insert_only)):
+        collection = db[f"latency_{name.replace(' ', '_').replace('-', '_')}"]
+        collection.drop()
+        docs = [user_doc(f"user{i}") for i in range(writes)]
+        results[name] = (timed(write, collection, docs), timed(write, collection, docs))
+    for label, index in (("new (201)", 0), ("existing (409)", 1)):
+        print(f"{label:<20}{results['read-then-insert'][index]:>15.2f} ms{results['insert only'][index]:>11.2f} ms")
+
+
+def race(db, creates, distinct, concurrency):
+    """The read-then-insert pattern under the same race: check passed, insert failed."""
+    collection = db.race_read_then_insert
+    collection.drop()
+    outcomes = Counter()
+
+    def create(i):
+        try:
+            outcomes[read_then_insert(collection, user_doc(f"user{i % distinct}"))] += 1
+        except DuplicateKeyError:
+            outcomes[500] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(create, range(creates)))
+    return outcomes
+
+
+def start_api(mongo_uri, database):
+    os.environ.update({
+        "connection_string": mongo_uri,
+        "MONGO_DATABASE": database,
+        "MEMORY_ENABLED": "false",
+        "SUMMARY_PREWARM_INTERVAL_SECONDS": "0",
+    })
+    import uvicorn
+    import main as api
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def concurrent_creates(url, path, payloads, concurrency):
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+    def post(payload):
+        return session.post(f"{url}{path}", json=payload, timeout=60).status_code
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return Counter(pool.map(post, payloads))
+
+
+def main(args):
+    client = MongoClient(args.mongo_uri)
+    db = client[args.database]
+    server = None
+    try:
+        latency(db, args.writes)
+
+        server, url = start_api(args.mongo_uri, args.database)
+        db.user.drop()
+        db.summary.drop()
+        users = [user_doc(f"user{i % args.distinct}") for i in range(args.creates)]
+        summaries = [{"_id": {"discordId": f"user{i % args.distinct}", "date": "2024-03-04"}, "content": "A good day"}
+                     for i in range(args.creates)]
+        print(f"\n{args.creates} creates of {args.distinct} ids from {args.concurrency} threads:")
+        ok = True
+        for path, payloads, collection in (("/users", users, db.user), ("/summaries", summaries, db.summary)):
+            statuses = concurrent_creates(url, path, payloads, args.concurrency)
+            stored = collection.count_documents({})
+            ok &= statuses[201] == args.distinct == stored and statuses[409] == args.creates - args.distinct
+            print(f"POST {path:<12} 201: {statuses[201]}, 409: {statuses[409]}, other: "
+                  f"{sum(n for status, n in statuses.items() if status not in (201, 409))}, stored: {stored}")
+        outcomes = race(db, args.creates, args.distinct, args.concurrency)
+        print(f"read-then-insert   201: {outcomes[201]}, 409: {outcomes[409]}, "
+              f"check passed but insert failed (500 before): {outcomes[500]}")
+        print("✅ Every id created exactly once, no 500s" if ok else "❌ Unexpected statuses")
+    finally:
+        if server is not None:
+            server.should_exit = True
+        client.drop_database(args.database)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Atomic create paths: latency and concurrent creates")
+    parser.add_argument("--mongo-uri", default=os.getenv("connection_string", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="atomic_writes_benchmark")
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--creates", type=int, default=500)
+    parser.add_argument("--distinct", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=200)
+    main(parser.parse_args())
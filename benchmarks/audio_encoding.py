@@ -0,0 +1,70 @@
+"""
+Compare summary audio encodings: bytes and encode time per minute of speech.
+
+Requests the same text from the speech API as raw PCM (to measure the exact speech
+duration) and in each direct output format, then transcodes the PCM locally to
+low-bitrate Opus voice if ffmpeg is installed.
+
+    python benchmarks/audio_encoding.py [--voice alloy] [--text-file summary.txt]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dotenv import load_dotenv  # noqa: E402
+
+from llm.llm_client import get_openai_client  # noqa: E402
+from llm.tts import PCM_SAMPLE_RATE, transcode_pcm_to_opus  # noqa: E402
+
+SAMPLE_TEXT = (
+    "Solid work today, soldier. You opened with the backend API endpoints, pushed through the "
+    "authentication middleware and fixed the entry validation bug before the team meeting. "
+    "Breaks were short and on schedule. Tomorrow, lock in the Discord bot integration first thing "
+    "and finish the database connection pooling before lunch. No excuses."
+)
+
+
+async def speech(text, voice, response_format):
+    client = get_openai_client()
+    start = time.perf_counter()
+    response = await client.audio.speech.create(model="tts-1", voice=voice, input=text, response_format=response_format)
+    return response.content, time.perf_counter() - start
+
+
+def report(name, size, seconds, minutes):
+    print(f"  {name:<22} {size / minutes / 1024:8.1f} KiB/min   {seconds / minutes:6.2f} s/min")
+
+
+async def main(text, voice):
+    pcm, pcm_seconds = await speech(text, voice, "pcm")
+    minutes = len(pcm) / (PCM_SAMPLE_RATE * 2) / 60
+    print(f"🎵 {minutes * 60:.1f}s of speech, {len(text)} characters")
+    print(f"  {'encoding':<22} {'size':>15}   {'encode time':>11}")
+    report("pcm (reference)", len(pcm), pcm_seconds, minutes)
+
+    for response_format in ["mp3", "aac", "opus"]:
+        audio, seconds = await speech(text, voice, response_format)
+        report(f"api {response_format}", len(audio), seconds, minutes)
+
+    if shutil.which("ffmpeg"):
+        for bitrate in ["16k", "24k", "32k"]:
+            start = time.perf_counter()
+            audio = await transcode_pcm_to_opus(pcm, bitrate)
+            # Total cost of the transcode path: PCM download plus local encode
+            report(f"pcm + opus {bitrate}", len(audio), pcm_seconds + time.perf_counter() - start, minutes)
+    else:
+        print("  (ffmpeg not found, skipping local Opus transcodes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark summary audio encodings")
+    parser.add_argument("--voice", default="alloy")
+    parser.add_argument("--text-file")
+    args = parser.parse_args()
+    load_dotenv()
+    text = open(args.text_file).read() if args.text_file else SAMPLE_TEXT
+    asyncio.run(main(text, args.voice))
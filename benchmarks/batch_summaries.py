@@ -0,0 +1,95 @@
+"""
+Nightly summaries through the Batch API, end to end against the fake OpenAI endpoint
+(llm/fake_openai.py), including a run that stops while waiting and is resumed by batch id.
+
+Seeds --users users with a day of entries each into a scratch database, submits the day's
+summaries as one batch, gives up waiting after --stop-after seconds (as a crashed or
+redeployed job would), then resumes from the batch id alone and stores the summaries.
+
+    python benchmarks/batch_summaries.py --mongo-uri mongodb://localhost:27017 [--users 500]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+from pymongo import MongoClient  # noqa: E402
+from llm.fake_openai import FakeOpenAIServer  # noqa: E402
+from llm.llm_client import close_openai_client  # noqa: E402
+from nightly_summaries import BATCH_COLLECTION, NightlySummaries  # noqa: E402
+
+MESSAGES = ["Started on the report", "Took a short break", "Back to work", "Finished lunch",
+            "Deep work on the migration", "Team meeting", "Went for a run", "Wrapped up for the day"]
+
+
+def seed(db, users, date_str, entries_per_user):
+    db.entry.drop()
+    db.summary.drop()
+    db.summary_checkpoint.drop()
+    db[BATCH_COLLECTION].drop()
+    db.user.drop()
+    day = datetime.strptime(date_str, "%Y-%m-%d")
+    rng = random.Random(5)
+    docs = []
+    for user in range(users):
+        for i in range(entries_per_user):
+            docs.append({
+                "discordId": f"user{user}",
+                "timestamp": day + timedelta(hours=8, minutes=30 * i),
+                "localDate": date_str,
+                "content": rng.choice(MESSAGES),
+                "role": "user" if i % 2 == 0 else "bot",
+            })
+    db.entry.insert_many(docs)
+    db.user.insert_many([{"_id": {"discordId": f"user{u}"}, "preferences": {"persona": rng.choice(["coach", "mindful", "drill"])}}
+                         for u in range(users)])
+
+
+async def main(args):
+    client = MongoClient(args.mongo_uri)
+    db = client[args.database]
+    date_str = (datetime.utcnow() - timedelta(days=2)).strftime("%Y-%m-%d")
+    seed(db, args.users, date_str, args.entries)
+    server = FakeOpenAIServer(batch_seconds=args.batch_seconds, error_rate=args.error_rate, seed=1).start()
+    batch_dir = tempfile.mkdtemp()
+    try:
+        started = time.monotonic()
+        first = NightlySummaries(db, base_url=server.base_url, batch_dir=batch_dir)
+        report = await first.run(date_str, poll_interval=0.5, timeout=args.stop_after)
+        print(f"\nStopped waiting after {time.monotonic() - started:.1f}s: {report}")
+
+        # A fresh process knows nothing but the batch id
+        resumed = NightlySummaries(db, base_url=server.base_url, batch_dir=batch_dir)
+        report = await resumed.collect(report["batchId"], poll_interval=0.5)
+        elapsed = time.monotonic() - started
+        stored = db.summary.count_documents({"_id.date": date_str, "batchId": report["batchId"]})
+        print(f"\nResumed: {report}")
+        print(f"Users with entries:     {args.users}")
+        print(f"Summaries stored:       {stored} ({report['failed']} failed, generated on demand later)")
+        print(f"Chat calls avoided:     {stored} (1 batch, billed at the Batch API's half price)")
+        print(f"Wall time:              {elapsed:.1f}s")
+        print(f"Rerun finds missing:    {len(resumed.pending_users(date_str))} (the failed ones)")
+    finally:
+        await close_openai_client()
+        server.stop()
+        shutil.rmtree(batch_dir)
+        client.drop_database(args.database)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end Batch API nightly summaries against a fake endpoint")
+    parser.add_argument("--mongo-uri", default=os.getenv("connection_string", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="batch_summaries_benchmark")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--entries", type=int, default=12, help="entries per user")
+    parser.add_argument("--batch-seconds", type=float, default=4)
+    parser.add_argument("--stop-after", type=float, default=1, help="seconds before the first run stops waiting")
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,54 @@
+"""
+Measure API cold start: time from a fresh interpreter importing `main` until the
+lifespan startup hook has finished. No network is touched during startup, so a
+local stand-in connection string is enough.
+
+    python benchmarks/cold_start.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import asyncio, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+async def startup():
+    async with main.lifespan(main.app):
+        return time.perf_counter()
+ready = asyncio.run(startup())
+print(f"{imported - started:.4f} {ready - started:.4f}")
+"""
+
+
+def measure_once():
+    env = dict(os.environ)
+    env.setdefault("connection_string", "mongodb://localhost:27017")
+    env["PYTHONPATH"] = os.pathsep.join([REPO_ROOT, os.path.join(REPO_ROOT, "api")])
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=os.path.join(REPO_ROOT, "api"),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip().splitlines()[-1]
+    import_seconds, ready_seconds = (float(value) for value in output.split())
+    return import_seconds, ready_seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure API import-to-ready time")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [measure_once() for _ in range(args.runs)]
+    imports = [r[0] for r in results]
+    readies = [r[1] for r in results]
+    print(f"⏱️ Import time:        median {statistics.median(imports) * 1000:.0f} ms")
+    print(f"⏱️ Import-to-ready:    median {statistics.median(readies) * 1000:.0f} ms (target < 1000 ms)")
@@ -0,0 +1,107 @@
+"""
+Query latency of entry search for a user with a large history.
+
+Seeds a scratch database with --entries synthetic entries for one user (plus other
+users' entries around them), creates the search index, then times search_entries()
+for a few queries against a regex scan of the same user's entries.
+
+    python benchmarks/entry_search.py --mongo-uri mongodb://localhost:27017 [--entries 100000]
+
+The scratch database (default: search_benchmark) is dropped at the end.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+from pymongo import MongoClient  # noqa: E402
+
+from entry_search import ensure_search_index, search_entries  # noqa: E402
+
+WORDS = (
+    "backend api database bug fix deploy meeting review gym run workout reading book "
+    "focus break lunch coffee tired energized blocked pairing refactor tests docs email "
+    "planning design interview call sleep walk groceries study exam project deadline"
+).split()
+QUERIES = ["database", "gym workout", '"code review"', "deadline -exam", "refactor tests"]
+
+
+def seed(collection, discord_id, count, other_users, seed_value=7):
+    rng = random.Random(seed_value)
+    start = datetime.now() - timedelta(days=count // 20)
+    batch = []
+    for i in range(count * (1 + other_users)):
+        owner = discord_id if i % (1 + other_users) == 0 else f"other-{i % (1 + other_users)}"
+        words = rng.sample(WORDS, 8)
+        if rng.random() < 0.01:
+            words.insert(3, "code review")
+        batch.append({
+            "discordId": owner,
+            "timestamp": start + timedelta(minutes=i // (1 + other_users) * 72),
+            "content": " ".join(words),
+            "role": "user" if rng.random() < 0.6 else "bot",
+        })
+        if len(batch) == 10000:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def time_calls(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main(mongo_uri, database, entries, other_users, repeat):
+    client = MongoClient(mongo_uri)
+    db = client[database]
+    collection = db.entry
+    collection.drop()
+    user = "benchmark-user"
+
+    started = time.perf_counter()
+    seed(collection, user, entries, other_users)
+    print(f"Seeded {collection.estimated_document_count()} entries ({entries} for {user}) in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    ensure_search_index(collection)
+    print(f"Built text index in {time.perf_counter() - started:.1f}s\n")
+
+    print(f"{'query':<20} {'matches':>8} {'indexed p50':>12} {'p95':>8} {'regex p50':>10} {'p95':>8}")
+    try:
+        for query in QUERIES:
+            matches = collection.count_documents({"discordId": user, "$text": {"$search": query}})
+            indexed = time_calls(lambda: search_entries(collection, user, query), repeat)
+            first_word = query.strip('"').split()[0]
+            regex = time_calls(lambda: list(
+                collection.find({"discordId": user, "content": {"$regex": first_word, "$options": "i"}})
+                .sort("timestamp", -1).limit(10)
+            ), repeat)
+            print(f"{query:<20} {matches:>8} {indexed[0]:>10.1f}ms {indexed[1]:>6.1f}ms {regex[0]:>8.1f}ms {regex[1]:>6.1f}ms")
+
+        pages = time_calls(lambda: search_entries(collection, user, "database", page=20), repeat)
+        print(f"\nPage 20 of 'database': p50 {pages[0]:.1f}ms, p95 {pages[1]:.1f}ms")
+    finally:
+        client.drop_database(database)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark entry search latency")
+    parser.add_argument("--mongo-uri", default=os.getenv("connection_string", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="search_benchmark")
+    parser.add_argument("--entries", type=int, default=100000, help="entries for the searched user")
+    parser.add_argument("--other-users", type=int, default=1, help="other users with as many entries each")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.mongo_uri, args.database, args.entries, args.other_users, args.repeat)
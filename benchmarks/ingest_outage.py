@@ -0,0 +1,169 @@
+"""
+Sustained ingest through the bot's durable queue while the API is down.
+
+Runs a stand-in for POST /entries (honours Idempotency-Key) on a local port, then feeds
+messages from --users users into an IngestQueue at --rate messages/second. The API
+returns 503 between --outage-start and --outage-end seconds, and during normal operation
+drops the response of --lost-ack of the requests after storing them, to force redeliveries.
+
+Prints acks, deliveries and backlog per second, then enqueue latency, time to drain,
+duplicates absorbed by the idempotency key, lost messages and per-user ordering violations.
+
+    python benchmarks/ingest_outage.py [--rate 200 --duration 30 --outage-start 5 --outage-end 15]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "discord"))
+import requests  # noqa: E402
+
+from ingest_queue import IngestQueue, DELIVERED, RETRY, REJECTED  # noqa: E402
+
+
+class FakeEntriesAPI:
+    def __init__(self, lost_ack, latency):
+        self.down = False
+        self.lost_ack = lost_ack
+        self.latency = latency
+        self.keys = set()
+        self.last_seq = {}
+        self.duplicates = 0
+        self.out_of_order = 0
+        self.lock = threading.Lock()
+        self.rng = random.Random(3)
+
+    def handle(self, key, entry):
+        """Returns (status, drop_response)."""
+        if self.down:
+            return 503, False
+        time.sleep(self.latency)
+        with self.lock:
+            if key in self.keys:
+                self.duplicates += 1
+                return 200, False
+            self.keys.add(key)
+            seq = int(entry["content"].split("#")[1])
+            if seq < self.last_seq.get(entry["discordId"], -1):
+                self.out_of_order += 1
+            self.last_seq[entry["discordId"]] = seq
+            return 201, self.rng.random() < self.lost_ack
+
+
+def serve(api):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            entry = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            status, drop = api.handle(self.headers.get("Idempotency-Key"), entry)
+            if drop:
+                # Stored, but the client never hears back
+                self.close_connection = True
+                return
+            body = json.dumps({"entry": entry, "bot_response": None}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def main(args):
+    api = FakeEntriesAPI(args.lost_ack, args.api_latency)
+    server = serve(api)
+    url = f"http://127.0.0.1:{server.server_port}/entries"
+    session = requests.Session()
+
+    def post(item):
+        return session.post(url, json=item["payload"], headers={"Idempotency-Key": item["idempotency_key"]}, timeout=5)
+
+    async def deliver(item):
+        try:
+            response = await asyncio.to_thread(post, item)
+        except requests.RequestException:
+            return RETRY
+        if response.status_code in (200, 201):
+            return DELIVERED
+        return RETRY if response.status_code >= 500 else REJECTED
+
+    path = os.path.join(tempfile.mkdtemp(), "ingest_queue.db")
+    queue = IngestQueue(path, deliver, workers=args.workers, max_pending=args.max_pending,
+                        base_backoff=0.2, max_backoff=2.0, poll_interval=0.1)
+    queue.start()
+
+    sent = 0
+    acked = 0
+    enqueue_ms = []
+    seq = {}
+    started = time.perf_counter()
+    next_report = 1.0
+    last_delivered = 0
+    print(f"{'t':>4} {'api':>5} {'acked/s':>8} {'delivered/s':>12} {'backlog':>8}")
+    acked_at_report = 0
+    while True:
+        elapsed = time.perf_counter() - started
+        if elapsed >= args.duration:
+            break
+        api.down = args.outage_start <= elapsed < args.outage_end
+        # Send the messages due by now
+        while sent < elapsed * args.rate:
+            user = f"user-{sent % args.users}"
+            seq[user] = seq.get(user, -1) + 1
+            t0 = time.perf_counter()
+            ok = await queue.enqueue(f"msg-{sent}", user, {
+                "discordId": user, "timestamp": "2026-10-19T10:00:00", "content": f"message #{seq[user]}", "role": "user"
+            })
+            enqueue_ms.append((time.perf_counter() - t0) * 1000)
+            acked += ok
+            sent += 1
+        if elapsed >= next_report:
+            print(f"{next_report:>4.0f} {'DOWN' if api.down else 'up':>5} {acked - acked_at_report:>8} "
+                  f"{queue.delivered - last_delivered:>12} {len(queue):>8}")
+            acked_at_report, last_delivered = acked, queue.delivered
+            next_report += 1
+        await asyncio.sleep(0.005)
+
+    api.down = False
+    drain_started = time.perf_counter()
+    while len(queue) and time.perf_counter() - drain_started < 120:
+        await asyncio.sleep(0.05)
+    drain_seconds = time.perf_counter() - drain_started
+    await queue.close()
+    server.shutdown()
+
+    enqueue_ms.sort()
+    outage = args.outage_end - args.outage_start
+    print(f"\nSent {sent} messages, acknowledged {acked} ({acked / args.duration:.0f}/s sustained, API down for {outage:.0f}s)")
+    print(f"Enqueue latency: p50 {statistics.median(enqueue_ms):.2f}ms, p99 {enqueue_ms[int(len(enqueue_ms) * 0.99) - 1]:.2f}ms")
+    print(f"Backlog drained {drain_seconds:.1f}s after the run ended")
+    print(f"Stored by the API: {len(api.keys)}, lost: {acked - len(api.keys)}, "
+          f"duplicates absorbed by Idempotency-Key: {api.duplicates}, ordering violations: {api.out_of_order}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ingest queue through an API outage")
+    parser.add_argument("--rate", type=float, default=200, help="messages per second")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--outage-start", type=float, default=5)
+    parser.add_argument("--outage-end", type=float, default=15)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-pending", type=int, default=10000)
+    parser.add_argument("--lost-ack", type=float, default=0.01, help="fraction of stored requests whose response is dropped")
+    parser.add_argument("--api-latency", type=float, default=0.01, help="seconds per successful request")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""
+Simple HTTP load generator for the Echo API.
+
+Reads GET /users/{id}/entries for --users seeded users, so every request goes through a
+worker's MongoDB pool (the history_read profile) and the response serialization; compare
+requests/second across worker counts, e.g.
+    python benchmarks/load_test.py --seed --mongo-uri mongodb://localhost:27017 --database main
+    WEB_CONCURRENCY=1 gunicorn main:app -c gunicorn.conf.py
+    WEB_CONCURRENCY=4 gunicorn main:app -c gunicorn.conf.py
+    python benchmarks/load_test.py --concurrency 64 --requests 20000
+
+--url takes any endpoint; {id} is replaced with a user id from the pool (/livez, which
+touches neither MongoDB nor OpenAI, gives the server's ceiling).
+"""
+import argparse
+import itertools
+import os
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+
+def seed(mongo_uri, database, users, entries):
+    """Insert `entries` entries for each of user0..user{users-1} (existing ones are replaced)."""
+    from pymongo import MongoClient
+
+    collection = MongoClient(mongo_uri)[database].entry
+    ids = [f"user{i}" for i in range(users)]
+    collection.delete_many({"discordId": {"$in": ids}})
+    start = datetime(2024, 3, 4, 8)
+    docs = []
+    for discord_id in ids:
+        for i in range(entries):
+            timestamp = start + timedelta(minutes=30 * i)
+            docs.append({"discordId": discord_id, "timestamp": timestamp, "localDate": timestamp.strftime("%Y-%m-%d"),
+                         "content": "Worked on the report for an hour", "role": "user" if i % 2 else "bot"})
+    collection.insert_many(docs)
+    print(f"🌱 Seeded {entries} entries for each of {users} users")
+
+
+def hit(url):
+    """Send one GET request and return (ok, latency_seconds)."""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            response.read()
+            ok = response.status == 200
+    except Exception:
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+def run(url, users, concurrency, total):
+    ids = itertools.cycle(f"user{i}" for i in range(users))
+    urls = [url.replace("{id}", next(ids)) for _ in range(total)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(hit, urls))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for ok, latency in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+    print(f"📊 {total} requests to {url}, concurrency {concurrency}, {elapsed:.2f}s")
+    print(f"   Throughput: {total / elapsed:.0f} req/s")
+    print(f"   Errors: {errors}")
+    if latencies:
+        print(f"   Latency p50: {statistics.median(latencies) * 1000:.1f} ms")
+        print(f"   Latency p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test an Echo API endpoint")
+    parser.add_argument("--url", default="http://localhost:8000/users/{id}/entries")
+    parser.add_argument("--users", type=int, default=100, help="user ids {id} cycles through")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--seed", action="store_true", help="insert the users' entries and exit")
+    parser.add_argument("--entries", type=int, default=20, help="entries per user when seeding")
+    parser.add_argument("--mongo-uri", default=os.getenv("connection_string", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default=os.getenv("MONGO_DATABASE", "main"))
+    args = parser.parse_args()
+    if args.seed:
+        seed(args.mongo_uri, args.database, args.users, args.entries)
+    else:
+        run(args.url, args.users, args.concurrency, args.requests)
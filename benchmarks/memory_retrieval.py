@@ -0,0 +1,66 @@
+"""
+Memory retrieval latency for one user with a large history.
+
+Builds a MemoryIndex from --entries synthetic journal entries, then times
+search() (embed the message, score, top-k) for a set of messages.
+
+    python benchmarks/memory_retrieval.py [--entries 100000] [--repeat 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm.memory import MemoryIndex  # noqa: E402
+
+WORDS = (
+    "backend api database bug fix deploy meeting review gym run workout reading book "
+    "focus break lunch coffee tired energized blocked pairing refactor tests docs email "
+    "planning design interview call sleep walk groceries study exam project deadline "
+    "driving mum house hackathon judging ceremony dinner friends cleaning room"
+).split()
+MESSAGES = [
+    "I am driving to my mum's house which is 2 hours away.",
+    "Working on coding for 30 minutes",
+    "Taking a 15 minute coffee break",
+    "In a meeting for the next hour",
+    "Just finished my morning workout",
+]
+
+
+def main(entries, repeat, k):
+    rng = random.Random(7)
+    start = datetime.now() - timedelta(minutes=entries * 30)
+    items = [(" ".join(rng.sample(WORDS, rng.randint(5, 15))), start + timedelta(minutes=i * 30), "entry") for i in range(entries)]
+
+    index = MemoryIndex()
+    started = time.perf_counter()
+    index.add_many(items)
+    print(f"Indexed {len(index)} entries in {time.perf_counter() - started:.2f}s, {index.nbytes / 1e6:.0f} MB\n")
+
+    for message in MESSAGES:
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            index.search(message, k=k, before=datetime.now())
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        print(f"{message[:45]:<45} p50 {statistics.median(samples):.2f}ms  p95 {samples[int(len(samples) * 0.95) - 1]:.2f}ms")
+
+    started = time.perf_counter()
+    for i in range(1000):
+        index.add(f"incremental entry {i} {rng.choice(WORDS)}", datetime.now())
+    print(f"\nIncremental add: {(time.perf_counter() - started):.3f}ms per entry")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark memory retrieval latency")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+    main(args.entries, args.repeat, args.k)
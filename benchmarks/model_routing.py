@@ -0,0 +1,115 @@
+"""
+Model routing for one-turn replies while one model degrades and recovers.
+
+Starts three fake OpenAI-compatible endpoints (llm/fake_openai.py): a fast small model,
+a medium one and a slow large one. One-turn requests arrive at --rate per second, half of
+them short check-ins ("Took a short break") and half long reflective messages. After
+--healthy seconds the medium model slows to --degraded-latency seconds and fails
+--degraded-errors of its calls for --degraded seconds, then recovers for --recovered seconds.
+
+The same load runs through a static router that never reroutes and through the adaptive
+router. For each phase it prints traffic per model, reply latency and failed replies.
+
+    python benchmarks/model_routing.py [--rate 20 --latency-budget 1.5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm.fake_openai import FakeOpenAIServer  # noqa: E402
+from llm.llm_client import close_openai_client  # noqa: E402
+from llm.router import ModelRouter  # noqa: E402
+
+SHORT = "Took a short break"
+LONG = ("Spent the whole afternoon untangling the deploy pipeline. It was frustrating at first because "
+        "nothing in the logs pointed at the real problem, but once I slowed down and read the config "
+        "line by line I found it. I want to remember that patience beats guessing. ") * 2
+
+
+def routes(servers, latency_budget):
+    small, medium, large = servers
+    return {"one_turn": {
+        "latency_budget": latency_budget,
+        "temperature": 0.8,
+        "timeout": 4 * latency_budget,
+        "candidates": [
+            {"model": "small", "base_url": small.base_url, "max_input_chars": 200},
+            {"model": "medium", "base_url": medium.base_url},
+            {"model": "large", "base_url": large.base_url},
+            {"model": "small", "base_url": small.base_url},
+        ],
+    }}
+
+
+async def run(label, router, servers, args):
+    medium = servers[1]
+    medium.configure(latency=0.4, error_rate=0.0)
+    phases = [("healthy", args.healthy), ("degraded", args.degraded), ("recovered", args.recovered)]
+    results = {name: [] for name, _ in phases}
+    rng = random.Random(11)
+    tasks = []
+
+    async def request(phase, message):
+        started = time.monotonic()
+        reply = await router.chat("one_turn", message)
+        results[phase].append((time.monotonic() - started, reply is not None))
+
+    print(f"\n{label}:")
+    for phase, seconds in phases:
+        if phase == "degraded":
+            medium.configure(latency=args.degraded_latency, error_rate=args.degraded_errors)
+        elif phase == "recovered":
+            medium.configure(latency=0.4, error_rate=0.0)
+        counts_before = [dict(server.models) for server in servers]
+        phase_end = time.monotonic() + seconds
+        while time.monotonic() < phase_end:
+            tasks.append(asyncio.create_task(request(phase, SHORT if rng.random() < 0.5 else LONG)))
+            await asyncio.sleep(rng.expovariate(args.rate))
+        await asyncio.gather(*tasks)
+        tasks.clear()
+
+        served = {}
+        for server, before in zip(servers, counts_before):
+            for model, count in server.models.items():
+                served[model] = served.get(model, 0) + count - before.get(model, 0)
+        latencies = sorted(seconds for seconds, _ in results[phase])
+        failed = sum(1 for _, ok in results[phase] if not ok)
+        share = ", ".join(f"{model} {count}" for model, count in sorted(served.items()))
+        print(f"  {phase:<10} p50 {statistics.median(latencies):5.2f}s  p95 {latencies[int(len(latencies) * 0.95) - 1]:5.2f}s  "
+              f"failed {failed:>3}/{len(latencies):<4} calls: {share}")
+
+
+async def main(args):
+    servers = [
+        FakeOpenAIServer(latency=0.15, jitter=0.2, seed=1).start(),
+        FakeOpenAIServer(latency=0.4, jitter=0.3, seed=2).start(),
+        FakeOpenAIServer(latency=1.0, jitter=0.3, seed=3).start(),
+    ]
+    table = routes(servers, args.latency_budget)
+    # Static: never degraded, no failover -- every call goes to the first matching model
+    static = ModelRouter(table, max_error_rate=1.0, max_attempts=1)
+    static.routes["one_turn"] = dict(table["one_turn"], latency_budget=float("inf"))
+    await run("Static routing", static, servers, args)
+    adaptive = ModelRouter(routes(servers, args.latency_budget), probe_interval=args.probe_interval)
+    await run("Adaptive routing", adaptive, servers, args)
+    await close_openai_client()
+    for server in servers:
+        server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark latency-budgeted model routing")
+    parser.add_argument("--rate", type=float, default=20, help="requests per second")
+    parser.add_argument("--latency-budget", type=float, default=1.5)
+    parser.add_argument("--healthy", type=float, default=8)
+    parser.add_argument("--degraded", type=float, default=12)
+    parser.add_argument("--recovered", type=float, default=10)
+    parser.add_argument("--degraded-latency", type=float, default=3.0)
+    parser.add_argument("--degraded-errors", type=float, default=0.3)
+    parser.add_argument("--probe-interval", type=float, default=3.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,141 @@
+"""
+Latency of each MongoDB operation profile (api/mongo_profiles.py) against running the same
+operation through the default client, on a local replica set.
+
+Seeds --users users with --entries entries each, then for every profile runs its typical
+operation --ops times from --concurrency threads, once through the default client (primary,
+the server's default write concern) and once through the profile's client, while
+--write-load threads keep inserting into the primary:
+
+    interactive_write  insert one entry (w: majority)
+    bulk_log_write     insert a batch of 20 bot messages (w: 1)
+    history_read       the user's last 10 entries (secondaryPreferred)
+    analytics_read     entries per local day for a user (secondaryPreferred, small pool)
+
+A three-member replica set on one machine, e.g.:
+    for p in 27017 27018 27019; do mkdir -p /tmp/rs$p; mongod --replSet rs0 --port $p --dbpath /tmp/rs$p --fork --logpath /tmp/rs$p.log; done
+    mongosh --eval 'rs.initiate({_id: "rs0", members: [{_id: 0, host: "localhost:27017"}, {_id: 1, host: "localhost:27018"}, {_id: 2, host: "localhost:27019"}]})'
+
+    python benchmarks/mongo_profiles.py --mongo-uri "mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0"
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+from pymongo.errors import PyMongoError  # noqa: E402
+from mongo_profiles import MongoProfiles  # noqa: E402
+
+START = datetime(2024, 3, 4, 8)
+
+
+def seed(entries, users, per_user):
+    entries.drop()
+    entries.create_index([("discordId", 1), ("timestamp", -1)])
+    entries.create_index([("discordId", 1), ("localDate", 1), ("timestamp", 1)])
+    rng = random.Random(3)
+    docs = []
+    for user in range(users):
+        for i in range(per_user):
+            timestamp = START + timedelta(minutes=45 * i + rng.randint(0, 30))
+            docs.append({"discordId": f"user{user}", "timestamp": timestamp, "localDate": timestamp.strftime("%Y-%m-%d"),
+                         "content": "Worked on the report", "role": "user" if i % 2 else "bot"})
+        if len(docs) >= 10000:
+            entries.insert_many(docs)
+            docs = []
+    if docs:
+        entries.insert_many(docs)
+
+
+def operations(users, rng_seed=11):
+    rng = random.Random(rng_seed)
+
+    def entry(role="user"):
+        return {"discordId": f"user{rng.randrange(users)}", "timestamp": datetime.utcnow(),
+                "localDate": datetime.utcnow().strftime("%Y-%m-%d"), "content": "Back to work", "role": role}
+
+    return {
+        "interactive_write": lambda c: c.insert_one(entry()),
+        "bulk_log_write": lambda c: c.insert_many([entry("bot") for _ in range(20)]),
+        "history_read": lambda c: list(c.find({"discordId": f"user{rng.randrange(users)}"}).sort("timestamp", -1).limit(10)),
+        "analytics_read": lambda c: list(c.aggregate([
+            {"$match": {"discordId": f"user{rng.randrange(users)}"}},
+            {"$group": {"_id": "$localDate", "entries": {"$sum": 1}}},
+            {"$sort": {"_id": 1}},
+        ])),
+    }
+
+
+def run(operation, collection, ops, concurrency):
+    def timed(_):
+        started = time.perf_counter()
+        try:
+            operation(collection)
+            return time.perf_counter() - started, True
+        except PyMongoError:
+            return time.perf_counter() - started, False
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(ops)))
+    latencies = sorted(latency for latency, ok in results if ok)
+    failed = sum(1 for _, ok in results if not ok)
+    if not latencies:
+        return None, None, failed
+    return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.95) - 1] * 1000, failed
+
+
+def write_load(collection, stop, users):
+    rng = random.Random(threading.get_ident())
+    while not stop.is_set():
+        collection.insert_many([{"discordId": f"user{rng.randrange(users)}", "timestamp": datetime.utcnow(),
+                                 "content": "load", "role": "bot"} for _ in range(50)])
+
+
+def main(args):
+    mongo = MongoProfiles(args.mongo_uri, args.database)
+    default = mongo.collection("default", "entry")
+    print("Seeding...")
+    seed(default, args.users, args.entries)
+    client = mongo.client("default")
+    client.admin.command("ping")
+    print(f"Primary: {client.primary}, secondaries: {sorted(client.secondaries) or 'none (standalone: reads stay on the primary)'}")
+
+    stop = threading.Event()
+    load = [threading.Thread(target=write_load, args=(mongo.collection("default", "load"), stop, args.users), daemon=True)
+            for _ in range(args.write_load)]
+    for thread in load:
+        thread.start()
+    try:
+        print(f"\n{args.ops} operations each from {args.concurrency} threads, {args.write_load} write load threads\n")
+        print(f"{'profile':<20}{'default p50/p95':>22}{'profile p50/p95':>22}{'failed':>10}")
+        for name, operation in operations(args.users).items():
+            base = run(operation, default, args.ops, args.concurrency)
+            profiled = run(operation, mongo.collection(name, "entry"), args.ops, args.concurrency)
+
+            def fmt(result):
+                p50, p95, _ = result
+                return f"{p50:.2f}/{p95:.2f} ms" if p50 is not None else "-"
+            print(f"{name:<20}{fmt(base):>22}{fmt(profiled):>22}{f'{base[2]}/{profiled[2]}':>10}")
+    finally:
+        stop.set()
+        for thread in load:
+            thread.join()
+        client.drop_database(args.database)
+        mongo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency of the MongoDB operation profiles")
+    parser.add_argument("--mongo-uri", default=os.getenv("connection_string", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="mongo_profiles_benchmark")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--entries", type=int, default=200, help="entries per user")
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--write-load", type=int, default=4, help="threads inserting into the primary meanwhile")
+    main(parser.parse_args())
@@ -0,0 +1,133 @@
+"""
+A burst of follow-ups firing in the same minute, with users chatting at the same time.
+
+Sends --followups follow-ups spread over --channels channels all at once, while interactive
+replies arrive at --reply-rate per second on other channels, against a stand-in for
+Discord's rate limits (50 requests/s per bot, 5 messages per 5s per channel). A request
+over a limit gets a 429 and, like discord.py, sleeps until the bucket resets and tries
+again; a global 429 blocks every send until it clears.
+
+Runs the burst twice: every send fired straight at the channel (what the bot used to do),
+then through OutboundDispatcher. Prints 429s, reply latency and how long the burst took.
+
+    python benchmarks/outbound_dispatch.py [--followups 1000 --channels 300 --reply-rate 5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "discord"))
+from dispatcher import OutboundDispatcher, INTERACTIVE, FOLLOWUP  # noqa: E402
+
+
+class FakeDiscord:
+    GLOBAL_LIMIT = 50  # per second
+    CHANNEL_LIMIT = 5  # per 5 seconds
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.global_window = (0, 0)  # (window start, count)
+        self.global_blocked_until = 0
+        self.channel_windows = {}
+        self.rate_limited = 0
+
+    def _hit(self, channel_id, now):
+        """Seconds to wait before retrying, or 0 if the request goes through."""
+        if now < self.global_blocked_until:
+            return self.global_blocked_until - now
+        start, count = self.global_window
+        if now - start >= 1:
+            start, count = now, 0
+        if count >= self.GLOBAL_LIMIT:
+            self.global_blocked_until = start + 1
+            return start + 1 - now
+        start_c, count_c = self.channel_windows.get(channel_id, (now, 0))
+        if now - start_c >= 5:
+            start_c, count_c = now, 0
+        if count_c >= self.CHANNEL_LIMIT:
+            return start_c + 5 - now
+        self.global_window = (start, count + 1)
+        self.channel_windows[channel_id] = (start_c, count_c + 1)
+        return 0
+
+    async def send(self, channel_id):
+        while True:
+            while time.monotonic() < self.global_blocked_until:
+                await asyncio.sleep(self.global_blocked_until - time.monotonic())
+            retry_after = self._hit(channel_id, time.monotonic())
+            if not retry_after:
+                await asyncio.sleep(self.latency)
+                return
+            self.rate_limited += 1
+            await asyncio.sleep(retry_after)
+
+
+class FakeChannel:
+    def __init__(self, discord, channel_id):
+        self.discord = discord
+        self.id = channel_id
+
+    async def send(self, content=None, **kwargs):
+        await self.discord.send(self.id)
+        return content
+
+
+async def run(args, use_dispatcher):
+    discord = FakeDiscord(args.latency)
+    rng = random.Random(5)
+    followup_channels = [FakeChannel(discord, i) for i in range(args.channels)]
+    reply_channels = [FakeChannel(discord, args.channels + i) for i in range(args.channels)]
+    dispatcher = OutboundDispatcher(followup_jitter=args.jitter)
+    if use_dispatcher:
+        dispatcher.start()
+
+    async def send(channel, content, priority):
+        if use_dispatcher:
+            await dispatcher.send(channel, content, priority=priority)
+        else:
+            await channel.send(content)
+
+    reply_latency = []
+
+    async def reply(channel):
+        started = time.monotonic()
+        await send(channel, "reply", INTERACTIVE)
+        reply_latency.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    burst = asyncio.gather(*[
+        send(followup_channels[i % args.channels], f"follow-up {i}", FOLLOWUP) for i in range(args.followups)
+    ])
+    replies = []
+    while not burst.done():
+        replies.append(asyncio.create_task(reply(rng.choice(reply_channels))))
+        await asyncio.sleep(rng.expovariate(args.reply_rate))
+    burst_seconds = time.monotonic() - started
+    await asyncio.gather(*replies)
+    await dispatcher.close()
+
+    reply_latency.sort()
+    print(f"\n{'Dispatcher' if use_dispatcher else 'Direct sends'}:")
+    print(f"  429 responses:      {discord.rate_limited}")
+    print(f"  follow-up burst:    {burst_seconds:.1f}s for {args.followups} messages")
+    print(f"  reply latency:      p50 {statistics.median(reply_latency) * 1000:.0f}ms, "
+          f"p95 {reply_latency[int(len(reply_latency) * 0.95) - 1] * 1000:.0f}ms, max {reply_latency[-1] * 1000:.0f}ms "
+          f"({len(reply_latency)} replies)")
+    if use_dispatcher:
+        print(f"  route waits:        {dispatcher.stats()['routeWaits']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark outbound Discord sends during a follow-up burst")
+    parser.add_argument("--followups", type=int, default=1000)
+    parser.add_argument("--channels", type=int, default=300)
+    parser.add_argument("--reply-rate", type=float, default=5, help="interactive replies per second")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per successful send")
+    parser.add_argument("--jitter", type=float, default=0, help="dispatcher follow-up jitter in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args, use_dispatcher=False))
+    asyncio.run(run(args, use_dispatcher=True))
@@ -0,0 +1,106 @@
+"""
+Reply latency of quick-reply buttons against typed check-ins, through the real POST /entries.
+
+Starts a fake OpenAI-compatible endpoint (llm/fake_openai.py) with --latency seconds per call,
+points every LLM route at it, and runs the API in-process against --mongo-uri with the reply
+cache and memories off, so every typed message pays for one LLM round trip. Then posts
+--requests typed check-ins and as many button presses and compares their latency.
+
+    python benchmarks/quick_replies.py --mongo-uri mongodb://localhost:27017 [--latency 0.8]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "api"))
+from llm.fake_openai import FakeOpenAIServer  # noqa: E402
+from llm.reply_cache import reply_cache  # noqa: E402
+from llm.router import MODEL_ROUTES, router  # noqa: E402
+
+MESSAGES = ["Starting on the report now", "Taking a break", "Done for today", "Back to the migration",
+            "Going for a walk", "Starting the code review"]
+OPTIONS = ["start_task", "break", "done"]
+LABELS = {"start_task": "Starting task", "break": "Taking a break", "done": "Done for today"}
+
+
+def fake_routes(base_url):
+    """MODEL_ROUTES with every candidate pointed at the fake endpoint."""
+    routes = json.loads(json.dumps(MODEL_ROUTES))
+    for route in routes.values():
+        for candidate in route["candidates"]:
+            candidate["base_url"] = base_url
+    return routes
+
+
+def percentile(ordered, fraction):
+    return ordered[max(int(len(ordered) * fraction) - 1, 0)]
+
+
+def report(label, latencies, failed):
+    ordered = sorted(latencies)
+    print(f"{label:<8} p50 {statistics.median(ordered) * 1000:7.1f} ms   p95 {percentile(ordered, 0.95) * 1000:7.1f} ms"
+          f"   max {ordered[-1] * 1000:7.1f} ms   without reply: {failed}")
+
+
+def main(args):
+    server = FakeOpenAIServer(latency=args.latency, jitter=args.jitter, seed=3).start()
+    # Same process as the API: point the shared router at the fake and turn the cache off
+    router.routes = fake_routes(server.base_url)
+    reply_cache.enabled = False
+    os.environ.update({
+        "MEMORY_ENABLED": "false",
+        "connection_string": args.mongo_uri,
+        "MONGO_DATABASE": args.database,
+    })
+    from fastapi.testclient import TestClient
+    import main as api
+
+    rng = random.Random(7)
+    results = {"text": ([], 0), "button": ([], 0)}
+    try:
+        with TestClient(api.app) as client:
+            for i in range(args.requests):
+                for source in ("text", "button"):
+                    option = rng.choice(OPTIONS)
+                    payload = {
+                        "discordId": f"user{i % args.users}",
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "content": rng.choice(MESSAGES) if source == "text" else LABELS[option],
+                        "role": "user",
+                        "source": source,
+                    }
+                    if source == "button":
+                        payload["quickReply"] = option
+                    started = time.perf_counter()
+                    response = client.post("/entries", json=payload)
+                    elapsed = time.perf_counter() - started
+                    latencies, failed = results[source]
+                    latencies.append(elapsed)
+                    if response.status_code != 201 or not response.json().get("bot_response"):
+                        results[source] = (latencies, failed + 1)
+        print(f"\n{args.requests} requests each, fake LLM latency {args.latency}s")
+        report("text", *results["text"])
+        report("button", *results["button"])
+        print(f"LLM calls:   {server.requests} for {args.requests} typed messages, 0 for button presses")
+    finally:
+        server.stop()
+        from pymongo import MongoClient
+        MongoClient(args.mongo_uri).drop_database(args.database)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quick-reply buttons vs typed check-ins through POST /entries")
+    parser.add_argument("--mongo-uri", default=os.getenv("connection_string", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="quick_replies_benchmark")
+    parser.add_argument("--requests", type=int, default=100, help="requests per source")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.8, help="seconds per fake LLM call")
+    parser.add_argument("--jitter", type=float, default=0.3, help="sigma of the lognormal latency multiplier")
+    main(parser.parse_args())
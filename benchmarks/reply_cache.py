@@ -0,0 +1,111 @@
+"""
+Replays a message log through the one-turn reply cache (llm/reply_cache.py) and reports
+the hit rate and how many LLM calls it saves. No LLM is called: every miss counts as one
+call and stores a numbered fake reply.
+
+The log is a JSON array or JSON lines of entries with "content" (and optionally "role",
+"persona" and "timestamp", in which order it is replayed), e.g. an export of the entry
+collection:
+
+    mongoexport --uri ... --collection entry --query '{"role": "user"}' --out entries.jsonl
+    python benchmarks/reply_cache.py --log entries.jsonl
+
+Without --log a synthetic week of check-ins from --users users is generated.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm.oneTurnCall import extract_time_from_message  # noqa: E402
+from llm.reply_cache import ReplyCache  # noqa: E402
+
+CHECK_INS = [
+    ["Took a short break", "taking a short break", "short break!", "Took a quick break", "on a short break now"],
+    ["Back to work", "back to work now", "ok back to work", "Back at work", "getting back to work"],
+    ["Finished lunch", "finished my lunch", "Just finished lunch!", "lunch finished", "done with lunch"],
+    ["Starting my workout", "starting a workout", "Workout time", "starting the workout now"],
+    ["Coffee break", "coffee break ☕", "quick coffee break", "grabbing a coffee"],
+    ["Going for a walk", "going on a walk", "Out for a walk", "taking a walk"],
+    ["In a meeting", "in a meeting now", "meeting time", "in meetings"],
+    ["Didn't finish my task", "did not finish the task", "couldn't finish my task"],
+    ["Finished my task", "finished the task", "task finished!"],
+    ["Reading for {n} minutes", "reading {n} mins", "Going to read for {n} minutes"],
+    ["Studying for {n} hours", "study session, {n} hours", "studying {n}h"],
+]
+WORDS = ("refactor deploy pipeline flaky test review design interview report budget essay chapter "
+         "garden groceries dentist recital invoice migration presentation onboarding").split()
+
+
+def synthetic_log(users, days, seed):
+    rng = random.Random(seed)
+    personas = {user: rng.choice(["coach", "coach", "mindful", "drill"]) for user in range(users)}
+    log = []
+    for _ in range(days):
+        for user in range(users):
+            for _ in range(rng.randint(3, 10)):
+                if rng.random() < 0.7:
+                    message = rng.choice(rng.choice(CHECK_INS)).format(n=rng.choice([15, 30, 45, 1, 2]))
+                else:
+                    # Something specific that won't repeat
+                    message = f"Working on the {' '.join(rng.sample(WORDS, 3))} for {rng.choice(['ticket', 'client', 'class'])} #{rng.randint(1, 9999)}"
+                log.append({"content": message, "persona": personas[user]})
+    return log
+
+
+def load_log(path):
+    with open(path) as f:
+        text = f.read().strip()
+    entries = json.loads(text) if text.startswith("[") else [json.loads(line) for line in text.splitlines() if line.strip()]
+    entries = [entry for entry in entries if entry.get("role", "user") == "user" and entry.get("content")]
+    if all("timestamp" in entry for entry in entries):
+        entries.sort(key=lambda entry: str(entry["timestamp"]))
+    return entries
+
+
+def main(args):
+    log = load_log(args.log) if args.log else synthetic_log(args.users, args.days, args.seed)
+    cache = ReplyCache(max_entries=args.max_entries, variants=args.variants)
+    llm_calls = 0
+    matches = {}
+    started = time.perf_counter()
+    for entry in log:
+        message = entry["content"]
+        lookup = cache.lookup(entry.get("persona", "coach"), message, extract_time_from_message(message))
+        if lookup is not None and lookup.reply is not None:
+            if lookup.similar and len(matches) < args.show_matches:
+                matches.setdefault(message, lookup.entry.key[2])
+            continue
+        llm_calls += 1
+        if lookup is not None:
+            cache.store(lookup, {"reply": f"reply {llm_calls}", "time": "30m", "nextCheckIn": "How did it go?"})
+    elapsed = time.perf_counter() - started
+
+    stats = cache.stats()
+    print(f"Messages replayed:     {len(log)}")
+    print(f"Cacheable:             {stats['lookups']} ({stats['lookups'] / len(log):.0%})")
+    print(f"LLM calls without:     {len(log)}")
+    print(f"LLM calls with cache:  {llm_calls}")
+    print(f"LLM calls saved:       {stats['llmCallsSaved']} ({stats['llmCallsSaved'] / len(log):.0%} of all messages)")
+    print(f"Hit rate (cacheable):  {stats['hitRate']:.0%}, of which near-duplicate hits {stats['similarHits']}")
+    print(f"Cache entries:         {stats['entries']} ({args.variants} variants each)")
+    print(f"Lookup cost:           {elapsed / len(log) * 1e6:.0f} us per message")
+    if matches:
+        print("\nNear-duplicate matches (message -> cached normalized text):")
+        for message, matched in matches.items():
+            print(f"  {message!r:40} -> {matched!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a message log through the one-turn reply cache")
+    parser.add_argument("--log", help="JSON array or JSON lines of entries (default: synthetic check-ins)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--variants", type=int, default=3)
+    parser.add_argument("--max-entries", type=int, default=10000)
+    parser.add_argument("--show-matches", type=int, default=15)
+    main(parser.parse_args())
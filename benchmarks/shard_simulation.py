@@ -0,0 +1,101 @@
+"""
+Simulated gateway: replay MESSAGE_CREATE events across N shard processes and
+report events/second, to show how the bot scales when split by SHARD_IDS.
+
+Each simulated event does the bot's per-message work: decode the gateway payload,
+look up the user's preferences in the shard-local TTL cache (fetching from a
+simulated API on a miss), simulate the API round trip, and build the reply.
+
+    python benchmarks/shard_simulation.py --events 10000 --shards 1 2 4
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "discord"))
+from followups import shard_for_guild  # noqa: E402
+from user_state import TTLCache  # noqa: E402
+
+
+def make_events(count, guilds, users, seed=7):
+    rng = random.Random(seed)
+    guild_ids = [rng.getrandbits(63) for _ in range(guilds)]
+    events = []
+    for i in range(count):
+        payload = {
+            "op": 0,
+            "t": "MESSAGE_CREATE",
+            "d": {
+                "id": str(i),
+                "guild_id": guild_ids[rng.randrange(guilds)],
+                "author": {"id": str(rng.randrange(users))},
+                "content": "Working on the backend for the next 30 minutes " * 4,
+            },
+        }
+        events.append(json.dumps(payload))
+    return events
+
+
+def run_shard(args):
+    """Handle every event routed to this process's shards; returns the number handled."""
+    events, api_latency, concurrency, cpu_rounds = args
+
+    async def handle(raw, cache, semaphore):
+        async with semaphore:
+            event = json.loads(raw)["d"]
+            user_id = event["author"]["id"]
+            if cache.get(user_id) is None:
+                await asyncio.sleep(api_latency)  # preferences fetch
+                cache.set(user_id, {"persona": "drill", "voice": "alloy"})
+            await asyncio.sleep(api_latency)  # POST /entries
+            digest = event["content"].encode()
+            for _ in range(cpu_rounds):  # message parsing, formatting, gateway encoding
+                digest = hashlib.sha256(digest).digest()
+
+    async def main():
+        cache = TTLCache(ttl_seconds=60)
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(handle(raw, cache, semaphore) for raw in events))
+        return len(events)
+
+    return asyncio.run(main())
+
+
+def simulate(events, shard_count, api_latency, concurrency, cpu_rounds):
+    partitions = [[] for _ in range(shard_count)]
+    for raw in events:
+        guild_id = json.loads(raw)["d"]["guild_id"]
+        partitions[shard_for_guild(guild_id, shard_count)].append(raw)
+
+    start = time.perf_counter()
+    with Pool(processes=shard_count) as pool:
+        handled = sum(pool.map(run_shard, [(p, api_latency, concurrency, cpu_rounds) for p in partitions]))
+    elapsed = time.perf_counter() - start
+    return handled, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate gateway load across shard processes")
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--guilds", type=int, default=500)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--api-latency", type=float, default=0.02, help="simulated API round trip in seconds")
+    parser.add_argument("--concurrency", type=int, default=200, help="in-flight events per shard process")
+    parser.add_argument("--cpu-rounds", type=int, default=2000, help="CPU work per event")
+    args = parser.parse_args()
+
+    events = make_events(args.events, args.guilds, args.users)
+    baseline = None
+    for shard_count in args.shards:
+        handled, elapsed = simulate(events, shard_count, args.api_latency, args.concurrency, args.cpu_rounds)
+        rate = handled / elapsed
+        baseline = baseline or rate
+        print(f"🧩 {shard_count} shard process(es): {handled} events in {elapsed:.2f}s "
+              f"= {rate:.0f} events/s ({rate / baseline:.2f}x)")
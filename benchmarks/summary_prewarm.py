@@ -0,0 +1,164 @@
+"""
+Summary prewarming over simulated days: how many !summary requests are served from a
+prewarmed summary, and how many prewarmed summaries are never used.
+
+Seeds --users users into a scratch database, each with a habitual time of day to ask for
+their summary (around their quiet hours start, with day-to-day noise). Over --days days a
+simulated clock steps every --step minutes: users write entries through the day, the
+prewarmer runs, and users ask for the day's summary at their time. Some add an entry between
+the prewarm and their request (the prewarmed one is stale), and some days they don't ask.
+
+Generation is simulated; a request not served from the prewarm is charged --generate-seconds
+(an LLM completion plus TTS), one that is pays for the lookup and fingerprint check, measured.
+
+    python benchmarks/summary_prewarm.py --mongo-uri mongodb://localhost:27017 [--users 200 --days 14]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+from pymongo import MongoClient  # noqa: E402
+from local_dates import get_zone  # noqa: E402
+from summary_prewarm import HABIT_COLLECTION, PREWARM_COLLECTION, SummaryPrewarmer  # noqa: E402
+
+TIMEZONES = ["UTC", "America/Vancouver", "Europe/Berlin", "Asia/Tokyo"]
+
+
+def seed_users(db, users, rng):
+    for name in ("entry", "user", PREWARM_COLLECTION, HABIT_COLLECTION):
+        db[name].drop()
+    db.entry.create_index([("discordId", 1), ("localDate", 1), ("timestamp", 1)])
+    habits = {}
+    docs = []
+    for user in range(users):
+        habit = rng.randint(20 * 60, 22 * 60 + 30)  # minutes after local midnight
+        habits[f"user{user}"] = habit
+        docs.append({
+            "_id": {"discordId": f"user{user}"},
+            # Quiet hours start is a rough guess of the habit until requests are seen
+            "quietHours": {"start": f"{(habit + rng.randint(-60, 60)) // 60:02d}:00", "end": "07:00"},
+            "preferences": {"persona": rng.choice(["coach", "mindful", "drill"]), "voice": "alloy",
+                            "timezone": rng.choice(TIMEZONES)},
+        })
+    db.user.insert_many(docs)
+    return habits, {doc["_id"]["discordId"]: doc["preferences"]["timezone"] for doc in docs}
+
+
+def plan_day(users, habits, timezones, day, rng, args):
+    """The day's entries and requests as (utc time, kind, discord_id, local date)."""
+    events = []
+    for discord_id in users:
+        zone = get_zone(timezones[discord_id])
+        local_midnight = datetime.combine(day, datetime.min.time(), tzinfo=zone)
+
+        def at(minutes):
+            return (local_midnight + timedelta(minutes=minutes)).astimezone(get_zone("UTC")).replace(tzinfo=None)
+
+        request = habits[discord_id] + rng.gauss(0, args.noise_minutes)
+        for minutes in range(9 * 60, int(request) - 45, rng.randint(50, 90)):
+            events.append((at(minutes), "entry", discord_id, day.isoformat()))
+        if rng.random() < args.late_entry_rate:
+            events.append((at(request - rng.uniform(1, 10)), "entry", discord_id, day.isoformat()))
+        if rng.random() >= args.skip_rate:
+            events.append((at(request), "request", discord_id, day.isoformat()))
+    return events
+
+
+async def main(args):
+    client = MongoClient(args.mongo_uri)
+    db = client[args.database]
+    rng = random.Random(17)
+    habits, timezones = seed_users(db, args.users, rng)
+    users = sorted(habits)
+    generated = []
+
+    async def build_summary(discord_id, date_str, summary_length, persona):
+        generated.append((discord_id, date_str))
+        return f"Summary of {date_str} for {discord_id}", db.entry.count_documents({"discordId": discord_id, "localDate": date_str})
+
+    async def store_audio(text, voice, discord_id, date_str, profile):
+        return f"{discord_id}_{date_str}.mp3"
+
+    prewarmer = SummaryPrewarmer(db, build_summary, store_audio, lead_minutes=args.lead_minutes)
+    start = datetime(2024, 3, 4)
+    personas = {doc["_id"]["discordId"]: doc["preferences"]["persona"] for doc in db.user.find()}
+    events = sorted(event for offset in range(args.days)
+                    for event in plan_day(users, habits, timezones, (start + timedelta(days=offset)).date(), rng, args))
+    lookups, outcomes = [], {"hit": 0, "stale": 0, "miss": 0}
+    per_day = {}  # local date -> [requests, served prewarmed]
+    try:
+        clock = events[0][0].replace(minute=0, second=0)
+        step = timedelta(minutes=args.step)
+        i = 0
+        while i < len(events):
+            clock += step
+            batch = []
+            while i < len(events) and events[i][0] <= clock:
+                batch.append(events[i])
+                i += 1
+            entries = [{"discordId": d, "timestamp": t, "localDate": local, "content": "Worked on it", "role": "user"}
+                       for t, kind, d, local in batch if kind == "entry"]
+            if entries:
+                db.entry.insert_many(entries)
+            await prewarmer.run_once(clock)
+            for when, kind, discord_id, local in batch:
+                if kind != "request":
+                    continue
+                prewarmer.record_request(discord_id, timezones[discord_id], now=when)
+                before = prewarmer.stale
+                started = time.perf_counter()
+                doc = prewarmer.take(discord_id, local, "short", personas[discord_id], "alloy")
+                elapsed = time.perf_counter() - started
+                day = per_day.setdefault(local, [0, 0])
+                day[0] += 1
+                if doc is not None:
+                    outcomes["hit"] += 1
+                    day[1] += 1
+                    lookups.append(elapsed)
+                elif prewarmer.stale != before:
+                    outcomes["stale"] += 1
+                else:
+                    outcomes["miss"] += 1
+
+        print(f"\n{'day':<12}{'requests':>10}{'prewarmed':>11}")
+        for day, (requests, hits) in sorted(per_day.items()):
+            print(f"{day:<12}{requests:>10}{hits:>11}")
+        total = sum(outcomes.values())
+        waste = prewarmer.waste_stats(days=args.days + 1, now=start + timedelta(days=args.days + 1))
+        print(f"\nRequests:              {total}")
+        print(f"Served prewarmed:      {outcomes['hit']} ({outcomes['hit'] / total:.0%}), "
+              f"stale {outcomes['stale']}, not prewarmed {outcomes['miss']}")
+        if lookups:
+            print(f"Prewarmed latency:     p50 {statistics.median(lookups) * 1000:.1f} ms "
+                  f"(vs {args.generate_seconds:.1f}s generating on request)")
+        mean = (outcomes["hit"] * statistics.mean(lookups or [0])
+                + (outcomes["stale"] + outcomes["miss"]) * args.generate_seconds) / total
+        print(f"Mean !summary latency: {mean:.2f}s (was {args.generate_seconds:.1f}s)")
+        print(f"Generations:           {len(generated)} prewarmed + {outcomes['stale'] + outcomes['miss']} on request "
+              f"(was {total} on request)")
+        print(f"Waste:                 {waste['wasted']} of {waste['generations']} prewarmed never served "
+              f"({waste['wasteRate']:.0%}: {waste['neverRequested']} never asked for, {waste['stale']} stale, rest regenerated)")
+    finally:
+        client.drop_database(args.database)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated days of summary prewarming")
+    parser.add_argument("--mongo-uri", default=os.getenv("connection_string", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="summary_prewarm_benchmark")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--step", type=int, default=5, help="minutes between prewarm passes")
+    parser.add_argument("--lead-minutes", type=float, default=30)
+    parser.add_argument("--noise-minutes", type=float, default=15, help="day-to-day spread of a user's request time")
+    parser.add_argument("--late-entry-rate", type=float, default=0.1, help="share of days with an entry just before asking")
+    parser.add_argument("--skip-rate", type=float, default=0.1, help="share of days the user doesn't ask")
+    parser.add_argument("--generate-seconds", type=float, default=6.0, help="LLM completion plus TTS")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,119 @@
+"""
+Working set and query latency of the entry collection before and after archiving.
+
+Seeds a scratch database with --users users writing --per-day entries a day for --days
+days, with a daily summary for every day, then measures collStats and the latency of
+the API's hot queries, runs the archive job (ARCHIVE_AFTER_DAYS horizon), and measures again.
+
+    python benchmarks/tiering.py --mongo-uri mongodb://localhost:27017 [--days 365 --after-days 90]
+
+The scratch database (default: tiering_benchmark) is dropped at the end.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+from pymongo import MongoClient  # noqa: E402
+
+from archive import EntryArchiver, collection_size, ensure_archive_collection  # noqa: E402
+from entry_search import ensure_search_index, search_entries  # noqa: E402
+
+WORDS = "backend api database bug fix deploy meeting review gym run workout reading focus break lunch coffee".split()
+
+
+def seed(db, users, days, per_day):
+    rng = random.Random(7)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    for user in range(users):
+        entries, summaries = [], []
+        for day in range(days):
+            midnight = today - timedelta(days=day)
+            for i in range(per_day):
+                entries.append({
+                    "discordId": f"user-{user}",
+                    "timestamp": midnight + timedelta(minutes=8 * 60 + i * 30),
+                    "localDate": midnight.strftime("%Y-%m-%d"),
+                    "content": " ".join(rng.sample(WORDS, 10)),
+                    "role": "user" if i % 2 == 0 else "bot",
+                })
+            summaries.append({
+                "_id": {"discordId": f"user-{user}", "date": midnight.strftime("%Y-%m-%d")},
+                "content": "Summary of the day",
+                "level": "day",
+            })
+        db.entry.insert_many(entries, ordered=False)
+        db.summary.insert_many(summaries, ordered=False)
+
+
+def latency(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return f"p50 {statistics.median(samples):6.1f}ms  p95 {samples[int(len(samples) * 0.95) - 1]:6.1f}ms"
+
+
+def measure(db, label, users, repeat):
+    size = collection_size(db, "entry")
+    print(f"\n{label}: {size['documents']} hot entries, {size['dataBytes'] / 1e6:.1f} MB data, "
+          f"{size['storageBytes'] / 1e6:.1f} MB on disk, {size['indexBytes'] / 1e6:.1f} MB indexes")
+    rng = random.Random(1)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    queries = {
+        "last 10 entries": lambda: list(db.entry.find({"discordId": f"user-{rng.randrange(users)}"}).sort("timestamp", -1).limit(10)),
+        "today's entries": lambda: list(db.entry.find({"discordId": f"user-{rng.randrange(users)}", "timestamp": {"$gte": today}})),
+        "all user entries": lambda: list(db.entry.find({"discordId": f"user-{rng.randrange(users)}"})),
+        "search": lambda: search_entries(db.entry, f"user-{rng.randrange(users)}", "database deploy"),
+    }
+    for name, query in queries.items():
+        print(f"  {name:<18} {latency(query, repeat)}")
+
+
+def main(mongo_uri, database, users, days, per_day, after_days, repeat):
+    client = MongoClient(mongo_uri)
+    db = client[database]
+    client.drop_database(database)
+    try:
+        seed(db, users, days, per_day)
+        db.entry.create_index([("discordId", 1), ("timestamp", -1)])
+        db.entry.create_index([("discordId", 1), ("localDate", 1), ("timestamp", 1)])
+        ensure_search_index(db.entry)
+        ensure_archive_collection(db)
+        ensure_search_index(db.entry_archive)
+
+        measure(db, "Before archiving", users, repeat)
+
+        archiver = EntryArchiver(db, after_days=after_days, max_days_per_run=10000)
+        started = time.perf_counter()
+        while asyncio.run(archiver.run_once())["days"]:
+            pass
+        print(f"\nArchive job took {time.perf_counter() - started:.1f}s")
+        db.command("compact", "entry")
+
+        measure(db, f"After archiving (> {after_days} days)", users, repeat)
+        archived = collection_size(db, "entry_archive")
+        print(f"\nArchive: {archived['documents']} entries, {archived['storageBytes'] / 1e6:.1f} MB on disk (zstd)")
+    finally:
+        client.drop_database(database)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark hot/cold entry tiering")
+    parser.add_argument("--mongo-uri", default=os.getenv("connection_string", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="tiering_benchmark")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--per-day", type=int, default=20)
+    parser.add_argument("--after-days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.mongo_uri, args.database, args.users, args.days, args.per_day, args.after_days, args.repeat)
@@ -0,0 +1,164 @@
+"""
+Per-user usage accounting (llm/usage.py, api/usage_ledger.py): counting in memory and
+flushing batched $inc updates against one $inc update_one per LLM/TTS call.
+
+Replays --calls calls (chat completions and TTS requests) from --users users, Zipf-like so
+a few users make most of them, spread over --seconds seconds of traffic with a flush every
+--flush-seconds, and reports MongoDB write requests (a flush is one bulk_write), upserted
+user-day documents and the time spent writing each way. Both ways must end with the same
+totals.
+
+Then replays one heavy user against --token-quota and --tts-quota with flushes in between,
+and shows when their replies switch to cached-only and their audio is skipped.
+
+    python benchmarks/usage_ledger.py --mongo-uri mongodb://localhost:27017 [--calls 20000 --users 500]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+from pymongo import MongoClient  # noqa: E402
+from llm.usage import UsageLedger, for_user, usage_day  # noqa: E402
+from usage_ledger import SUM_FIELDS, UsageLedgerWriter  # noqa: E402
+
+TASKS = ["one_turn", "one_turn", "one_turn", "rolling_summary", "summary"]
+
+
+def workload(calls, users, seconds, rng_seed=5):
+    """(second, discordId, kind, task, amount) per call, in time order."""
+    rng = random.Random(rng_seed)
+    weights = [1 / (rank + 1) for rank in range(users)]
+    ids = rng.choices([f"user{i}" for i in range(users)], weights=weights, k=calls)
+    events = []
+    for discord_id in ids:
+        second = rng.uniform(0, seconds)
+        if rng.random() < 0.1:
+            events.append((second, discord_id, "tts", None, rng.randint(200, 1500)))
+        else:
+            usage = types.SimpleNamespace(prompt_tokens=rng.randint(300, 1500), completion_tokens=rng.randint(30, 300))
+            events.append((second, discord_id, "chat", rng.choice(TASKS), usage))
+    return sorted(events, key=lambda event: event[0])
+
+
+def per_call(collection, events):
+    """One $inc upsert per call, as if each call wrote its own usage."""
+    date_str = usage_day()
+    started = time.perf_counter()
+    for _, discord_id, kind, task, amount in events:
+        if kind == "chat":
+            tokens = amount.prompt_tokens + amount.completion_tokens
+            fields = {"llmCalls": 1, "promptTokens": amount.prompt_tokens, "completionTokens": amount.completion_tokens,
+                      f"tasks.{task}.calls": 1, f"tasks.{task}.tokens": tokens}
+        else:
+            fields = {"ttsCalls": 1, "ttsChars": amount}
+        collection.update_one({"_id": {"discordId": discord_id, "date": date_str}}, {"$inc": fields}, upsert=True)
+    return len(events), time.perf_counter() - started
+
+
+def record(ledger, kind, task, amount):
+    if kind == "chat":
+        ledger.record_chat(task, amount)
+    else:
+        ledger.record_tts(amount)
+
+
+def batched(collection, events, flush_seconds):
+    """The ledger: count in memory, flush every flush_seconds of (simulated) traffic."""
+    ledger = UsageLedger()
+    writer = UsageLedgerWriter(collection, ledger)
+    recording = writing = 0.0
+    next_flush = flush_seconds
+    for second, discord_id, kind, task, amount in events:
+        while second >= next_flush:
+            started = time.perf_counter()
+            writer.flush()
+            writing += time.perf_counter() - started
+            next_flush += flush_seconds
+        started = time.perf_counter()
+        with for_user(discord_id):
+            record(ledger, kind, task, amount)
+        recording += time.perf_counter() - started
+    started = time.perf_counter()
+    writer.flush()
+    writing += time.perf_counter() - started
+    return writer, recording, writing
+
+
+def totals(collection):
+    return {field: sum(doc.get(field, 0) for doc in collection.find()) for field in SUM_FIELDS}
+
+
+def quotas(collection, token_quota, tts_quota, flush_every):
+    """One heavy user: a chat call per check-in and an audio summary every 10th, flushing every flush_every calls."""
+    ledger = UsageLedger(daily_token_quota=token_quota, daily_tts_char_quota=tts_quota)
+    writer = UsageLedgerWriter(collection, ledger)
+    usage = types.SimpleNamespace(prompt_tokens=900, completion_tokens=150)
+    first_cached = first_silent = None
+    calls = 0
+    for i in range(1, 2001):
+        with for_user("heavy"):
+            if not ledger.over_token_quota("heavy"):
+                ledger.record_chat("one_turn", usage)
+                calls += 1
+            elif first_cached is None:
+                first_cached = (i, ledger.used("heavy")["tokens"])
+            if i % 10 == 0:
+                if not ledger.over_tts_quota("heavy"):
+                    ledger.record_tts(1200)
+                elif first_silent is None:
+                    first_silent = (i, ledger.used("heavy")["ttsChars"])
+        if i % flush_every == 0:
+            writer.flush()
+    writer.flush()
+    return first_cached, first_silent, calls, ledger
+
+
+def main(args):
+    client = MongoClient(args.mongo_uri)
+    db = client[args.database]
+    try:
+        events = workload(args.calls, args.users, args.seconds)
+        print(f"{len(events)} calls from {args.users} users over {args.seconds:.0f}s, flushing every {args.flush_seconds:.0f}s\n")
+
+        db.usage_per_call.drop()
+        writes, per_call_seconds = per_call(db.usage_per_call, events)
+
+        db.usage_batched.drop()
+        writer, recording, writing = batched(db.usage_batched, events, args.flush_seconds)
+
+        print(f"{'':<22}{'requests':>10}{'upserts':>10}{'time writing':>15}")
+        print(f"{'$inc per call':<22}{writes:>10}{writes:>10}{per_call_seconds * 1000:>12.0f} ms")
+        print(f"{'batched ledger':<22}{writer.flushes:>10}{writer.written:>10}{writing * 1000:>12.0f} ms")
+        print(f"Recording in memory: {recording / len(events) * 1e6:.1f} µs per call")
+        same = totals(db.usage_per_call) == totals(db.usage_batched)
+        print("✅ Same totals both ways" if same else "❌ Totals differ")
+
+        db.usage_quota.drop()
+        first_cached, first_silent, calls, ledger = quotas(db.usage_quota, args.token_quota, args.tts_quota, args.quota_flush_every)
+        print(f"\nHeavy user, token quota {args.token_quota}, TTS quota {args.tts_quota} chars, flush every {args.quota_flush_every} calls:")
+        if first_cached:
+            print(f"- Cached-only replies from check-in {first_cached[0]} ({first_cached[1]} tokens used), {calls} LLM calls in total")
+        if first_silent:
+            print(f"- Audio skipped from check-in {first_silent[0]} ({first_silent[1]} TTS chars used)")
+        print(f"- Degraded: {ledger.degraded}")
+    finally:
+        client.drop_database(args.database)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched usage ledger vs per-call writes, and quota degradation")
+    parser.add_argument("--mongo-uri", default=os.getenv("connection_string", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="usage_ledger_benchmark")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=600, help="simulated traffic duration")
+    parser.add_argument("--flush-seconds", type=float, default=10)
+    parser.add_argument("--token-quota", type=int, default=200000)
+    parser.add_argument("--tts-quota", type=int, default=20000)
+    parser.add_argument("--quota-flush-every", type=int, default=20, help="check-ins between flushes in the quota run")
+    main(parser.parse_args())
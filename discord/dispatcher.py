@@ -0,0 +1,294 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections import deque
+
+import discord
+from discord.ext import commands
+
+# Message priorities, lower is sent first
+INTERACTIVE = 0  # replies to something a user just did
+FOLLOWUP = 1  # scheduled check-ins; can wait and be spread out
+PRIORITY_NAMES = {INTERACTIVE: "interactive", FOLLOWUP: "followup"}
+
+
+class RateWindow:
+    """
+    At most `limit` sends in any `per` seconds. Discord's buckets reset on fixed windows,
+    so a sliding window over the last `limit` send times never overshoots one.
+    """
+
+    def __init__(self, limit, per):
+        self.limit = limit
+        self.per = per
+        self.sent_at = deque(maxlen=limit)
+        self.paused_until = 0.0
+
+    def wait_time(self, now):
+        """Seconds until a send is allowed (0 if it is allowed now)."""
+        wait = self.paused_until - now
+        if len(self.sent_at) == self.limit:
+            wait = max(wait, self.sent_at[0] + self.per - now)
+        return max(0.0, wait)
+
+    def take(self, now):
+        self.sent_at.append(now)
+
+    def pause(self, seconds, now):
+        """Discord told us to back off: nothing for `seconds`."""
+        self.paused_until = max(self.paused_until, now + seconds)
+
+    def idle(self, now):
+        return self.wait_time(now) == 0 and (not self.sent_at or now - self.sent_at[-1] >= self.per)
+
+
+def route_key(target):
+    """The rate-limit route a send to target counts against (message sends are limited per channel)."""
+    if isinstance(target, commands.Context):
+        return target.channel.id
+    if isinstance(target, (discord.User, discord.Member)):
+        return ("dm", target.id)
+    return target.id
+
+
+class OutboundDispatcher:
+    """
+    Single path for the bot's Discord sends, paced to stay inside Discord's rate limits
+    instead of running into 429s.
+
+    - Every channel has its own queue; its messages go out one at a time, in order.
+    - A global budget (global_limit per second) caps all sends; each channel has a route
+      budget (route_limit per route_window seconds) matching Discord's per-channel limit.
+    - INTERACTIVE messages always go before FOLLOWUP ones, and follow-ups may only use
+      followup_share of the global budget, so replies keep moving during a follow-up burst.
+    - Follow-ups are delayed by a random 0..jitter seconds, which spreads out the bursts
+      of check-ins that were all scheduled for the same minute.
+    - A 429 that still gets through pauses that route for Discord's retry_after and
+      the message is sent again.
+    """
+
+    def __init__(self, global_limit=45, route_limit=5, route_window=5.0,
+                 followup_share=0.8, followup_jitter=15.0, max_in_flight=10):
+        self.route_limit = route_limit
+        self.route_window = route_window
+        self.followup_jitter = followup_jitter
+        self.max_in_flight = max_in_flight
+        self._global = RateWindow(global_limit, 1.0)
+        self._followups = RateWindow(max(1, int(global_limit * followup_share)), 1.0)
+        self._routes = {}
+        self._seq = itertools.count()
+        self._channels = {}  # route key -> heap of (priority, seq, item)
+        self._ready = []  # heap of (priority, seq, route key) for channels that can send next
+        self._delayed = []  # heap of (due, seq, item): follow-ups waiting out their jitter
+        self._throttled = []  # heap of (available_at, seq, route key): channels out of route budget
+        self._parked = set()
+        self._busy = set()
+        self._in_flight = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._last_prune = time.monotonic()
+        self._latency = {priority: deque(maxlen=1000) for priority in PRIORITY_NAMES}
+        self.sent = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.route_waits = 0
+
+    async def send(self, target, content=None, priority=INTERACTIVE, jitter=None, **kwargs):
+        """
+        Queue a message for target (a channel, user or command context) and wait until
+        Discord has it. Returns the sent discord.Message; send errors are raised here.
+        jitter overrides followup_jitter for a FOLLOWUP message.
+        """
+        item = {
+            "target": target,
+            "key": route_key(target),
+            "content": content,
+            "kwargs": kwargs,
+            "priority": priority,
+            "seq": next(self._seq),
+            "queued_at": time.monotonic(),
+            "future": asyncio.get_running_loop().create_future(),
+        }
+        if jitter is None:
+            jitter = self.followup_jitter if priority == FOLLOWUP else 0
+        if jitter > 0:
+            heapq.heappush(self._delayed, (item["queued_at"] + random.uniform(0, jitter), item["seq"], item))
+        else:
+            self._enqueue(item)
+        self._wakeup.set()
+        return await item["future"]
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop sending; callers still waiting on a queued message get CancelledError."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        pending = [entry[-1] for queue in self._channels.values() for entry in queue] + [entry[-1] for entry in self._delayed]
+        for item in pending:
+            item["future"].cancel()
+        if pending:
+            print(f"⚠️ Dropped {len(pending)} unsent messages on shutdown")
+
+    def stats(self):
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for queue in self._channels.values():
+            for priority, _, _ in queue:
+                queued[PRIORITY_NAMES[priority]] += 1
+        latency = {}
+        for priority, samples in self._latency.items():
+            ordered = sorted(samples)
+            latency[PRIORITY_NAMES[priority]] = {
+                "p50": round(ordered[len(ordered) // 2] * 1000) if ordered else None,
+                "p95": round(ordered[int(len(ordered) * 0.95) - 1] * 1000) if ordered else None,
+                "max": round(ordered[-1] * 1000) if ordered else None,
+            }
+        return {
+            "queued": queued,
+            "delayedFollowups": len(self._delayed),
+            "channelsWaiting": sum(1 for queue in self._channels.values() if queue),
+            "inFlight": self._in_flight,
+            "sent": self.sent,
+            "failed": self.failed,
+            "rateLimited": self.rate_limited,
+            "routeWaits": self.route_waits,
+            "sendLatencyMs": latency,
+        }
+
+    def _route(self, key):
+        bucket = self._routes.get(key)
+        if bucket is None:
+            bucket = self._routes[key] = RateWindow(self.route_limit, self.route_window)
+        return bucket
+
+    def _enqueue(self, item):
+        key = item["key"]
+        queue = self._channels.setdefault(key, [])
+        heapq.heappush(queue, (item["priority"], item["seq"], item))
+        # A new head (first message, or one that outranks the old head) needs a ready entry;
+        # the outranked entry is skipped as stale when it comes up
+        if queue[0][2] is item:
+            self._mark_ready(key)
+
+    def _mark_ready(self, key):
+        queue = self._channels.get(key)
+        if queue and key not in self._busy and key not in self._parked:
+            heapq.heappush(self._ready, (queue[0][0], queue[0][1], key))
+
+    def _promote(self, now):
+        while self._delayed and self._delayed[0][0] <= now:
+            item = heapq.heappop(self._delayed)[2]
+            item["queued_at"] = now  # latency counts from when the follow-up was due
+            self._enqueue(item)
+        while self._throttled and self._throttled[0][0] <= now:
+            key = heapq.heappop(self._throttled)[2]
+            self._parked.discard(key)
+            self._mark_ready(key)
+        if now - self._last_prune > 60:
+            # Forget idle channels whose budget has fully recovered
+            for key in [key for key, queue in self._channels.items() if not queue and key not in self._busy]:
+                del self._channels[key]
+            for key in [key for key, bucket in self._routes.items() if key not in self._channels and bucket.idle(now)]:
+                del self._routes[key]
+            self._last_prune = now
+
+    def _next_item(self, now):
+        """The next message to send and 0, or None and how long until one might be sendable."""
+        while self._ready:
+            priority, seq, key = self._ready[0]
+            queue = self._channels.get(key)
+            if key in self._busy or key in self._parked or not queue or queue[0][1] != seq:
+                heapq.heappop(self._ready)  # stale
+                continue
+            if priority == FOLLOWUP:
+                wait = self._followups.wait_time(now)
+                if wait > 0:
+                    return None, wait
+            route = self._route(key)
+            wait = route.wait_time(now)
+            if wait > 0:
+                heapq.heappop(self._ready)
+                heapq.heappush(self._throttled, (now + wait, next(self._seq), key))
+                self._parked.add(key)
+                self.route_waits += 1
+                continue
+
+            heapq.heappop(self._ready)
+            item = heapq.heappop(queue)[2]
+            if item["future"].done():
+                # The caller gave up (e.g. a cancelled follow-up)
+                self._mark_ready(key)
+                continue
+            route.take(now)
+            if priority == FOLLOWUP:
+                self._followups.take(now)
+            return item, 0
+        return None, None
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            self._promote(now)
+            item = None
+            wait = self._global.wait_time(now)
+            if wait == 0 and self._in_flight < self.max_in_flight:
+                item, wait = self._next_item(now)
+
+            if item is None:
+                timers = [when - now for when in (self._delayed[0][0] if self._delayed else None,
+                                                  self._throttled[0][0] if self._throttled else None) if when is not None]
+                if wait:
+                    timers.append(wait)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, min(timers)) if timers else None)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._global.take(now)
+            self._busy.add(item["key"])
+            self._in_flight += 1
+            asyncio.create_task(self._deliver(item))
+
+    async def _deliver(self, item):
+        key = item["key"]
+        future = item["future"]
+        try:
+            message = await item["target"].send(item["content"], **item["kwargs"])
+        except discord.HTTPException as e:
+            if e.status == 429:
+                # discord.py gave up retrying: back off this route and send it again
+                self.rate_limited += 1
+                self._route(key).pause(getattr(e, "retry_after", None) or 1.0, time.monotonic())
+                attachment = item["kwargs"].get("file")
+                if attachment is not None:
+                    attachment.reset()
+                heapq.heappush(self._channels.setdefault(key, []), (item["priority"], item["seq"], item))
+            else:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+        except Exception as e:
+            self.failed += 1
+            if not future.done():
+                future.set_exception(e)
+        else:
+            self.sent += 1
+            self._latency[item["priority"]].append(time.monotonic() - item["queued_at"])
+            if not future.done():
+                future.set_result(message)
+        finally:
+            self._busy.discard(key)
+            self._in_flight -= 1
+            self._mark_ready(key)
+            self._wakeup.set()
@@ -0,0 +1,103 @@
+import asyncio
+from collections import deque
+
+import requests
+
+
+class EntryLogQueue:
+    """
+    Write-behind log for bot-authored entries.
+
+    Entries are buffered in memory and sent to POST /entries/bulk in batches, either when
+    max_batch entries are waiting or every flush_interval seconds, so logging never sits
+    on the path of a Discord send. Failed batches, and the entries of a batch the API
+    couldn't insert, go back to the front of the queue and are retried with exponential
+    backoff. close() flushes whatever is left.
+    """
+
+    def __init__(self, api_url, max_batch=50, flush_interval=2.0, max_pending=10000, max_backoff=60.0):
+        self.api_url = api_url
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_backoff = max_backoff
+        self._pending = deque()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._failures = 0
+
+    def add(self, entry_payload):
+        """Queue an entry for logging. Never blocks."""
+        if len(self._pending) >= self.max_pending:
+            dropped = self._pending.popleft()
+            print(f"⚠️ Entry log queue full, dropping oldest entry from {dropped.get('timestamp')}")
+        self._pending.append(entry_payload)
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self, timeout=10.0):
+        """Stop the background flusher and flush what's left, giving up after timeout seconds."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._pending and loop.time() < deadline:
+            if not await self.flush():
+                await asyncio.sleep(0.5)
+        if self._pending:
+            print(f"❌ Shutting down with {len(self._pending)} unlogged bot entries")
+
+    async def flush(self):
+        """Send one batch. Returns True if all of it was logged."""
+        if not self._pending:
+            return True
+
+        batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+        retry = await asyncio.to_thread(self._post_batch, batch)
+        if retry:
+            # Put them back in order so they're retried before newer entries
+            self._pending.extendleft(reversed(retry))
+        return not retry
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            while self._pending:
+                if await self.flush():
+                    self._failures = 0
+                    if len(self._pending) < self.max_batch:
+                        break
+                else:
+                    self._failures += 1
+                    backoff = min(self.max_backoff, self.flush_interval * 2 ** self._failures)
+                    print(f"⏳ Retrying entry log flush in {backoff:.0f}s ({len(self._pending)} pending)")
+                    await asyncio.sleep(backoff)
+
+    def _post_batch(self, batch):
+        """Returns the entries to send again: all of them if the request failed."""
+        try:
+            response = requests.post(f"{self.api_url}entries/bulk", json=batch, timeout=10)
+            if response.status_code == 201:
+                # Entries that failed to insert (other than ones already stored) come back by index
+                retry = [batch[i] for i in response.json().get("retry", [])]
+                print(f"📤 Logged {len(batch) - len(retry)} bot entries" + (f", {len(retry)} to retry" if retry else ""))
+                return retry
+            print(f"❌ Error logging bot entries: {response.status_code}")
+        except Exception as e:
+            print(f"❌ Exception logging bot entries: {e}")
+        return batch
@@ -3,27 +3,154 @@
 
 import asyncio
 import datetime
+import functools
+import io
+from collections import deque
 from datetime import time
 
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
-from discord.ext import commands
 import os
+import sys
 import requests
 
+from entry_log import EntryLogQueue
+from ingest_queue import IngestQueue, DELIVERED, RETRY, REJECTED
+from dispatcher import OutboundDispatcher, INTERACTIVE, FOLLOWUP
+from followups import FollowupScheduler
+from user_state import UserPreferences, DEFAULT_PREFERENCES
+
+# The profiling package is shared with the API and lives in the repo root (the image copies
+# it next to the bot). Appended, so this repo's discord/ directory never shadows discord.py
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from profiling import MODES as PROFILE_MODES, profiler, task_report
+
 load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 API_HOST = os.getenv("API_HOST", "uvic-hackathon-api")
 API_PORT = os.getenv("API_PORT", "8000")
 ECHO_API_URL = f"http://{API_HOST}:{API_PORT}/"
-DEFAULT_PERSONA = "drill"  # Can be "coach", "mindful", or "drill"
+DEFAULT_PERSONA = DEFAULT_PREFERENCES["persona"]  # Can be "coach", "mindful", or "drill"
+VALID_PERSONAS = ["coach", "mindful", "drill"]
+VALID_VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
+
+# Sharding: leave both unset to let Discord pick the shard count and run every shard here.
+# To split across processes, give each one the same SHARD_COUNT and its own SHARD_IDS, e.g.
+# SHARD_COUNT=4 SHARD_IDS=0,1 for the first replica and SHARD_COUNT=4 SHARD_IDS=2,3 for the second.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = [int(s) for s in os.getenv("SHARD_IDS").split(",")] if os.getenv("SHARD_IDS") else None
+PREFERENCES_TTL_SECONDS = int(os.getenv("PREFERENCES_TTL_SECONDS", "60"))
+# Bot messages are logged in batches of up to ENTRY_LOG_BATCH_SIZE, at least every ENTRY_LOG_FLUSH_SECONDS
+ENTRY_LOG_BATCH_SIZE = int(os.getenv("ENTRY_LOG_BATCH_SIZE", "50"))
+ENTRY_LOG_FLUSH_SECONDS = float(os.getenv("ENTRY_LOG_FLUSH_SECONDS", "2"))
+# User messages are queued on disk before they're sent to the API (see ingest_queue.py)
+INGEST_QUEUE_PATH = os.getenv("INGEST_QUEUE_PATH", "ingest_queue.db")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+INGEST_MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", "10000"))
+# Reaction added as soon as a message is safely queued
+RECEIVED_REACTION = "📥"
+# Outbound pacing, see dispatcher.py. Discord allows 50 requests/s per bot and 5 messages/5s per channel
+OUTBOUND_GLOBAL_LIMIT = int(os.getenv("OUTBOUND_GLOBAL_LIMIT", "45"))
+OUTBOUND_MAX_IN_FLIGHT = int(os.getenv("OUTBOUND_MAX_IN_FLIGHT", "10"))
+# Follow-ups go out up to this many seconds late (at most 10% of their delay) to smooth bursts
+FOLLOWUP_JITTER_SECONDS = float(os.getenv("FOLLOWUP_JITTER_SECONDS", "15"))
+# Discord user ids allowed to run the !profile and !tasks commands (comma separated)
+ADMIN_USER_IDS = {int(i) for i in os.getenv("ADMIN_USER_IDS", "").split(",") if i.strip()}
+# Quick-reply buttons under check-ins: (option, label, emoji). The options and labels are
+# QUICK_REPLY_OPTIONS in llm/PROMPTS.py, which the API answers from a precomputed table.
+QUICK_REPLY_BUTTONS = [
+    ("start_task", "Starting task", "▶️"),
+    ("break", "Taking a break", "☕"),
+    ("done", "Done for today", "🏁"),
+]
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+entry_log = EntryLogQueue(ECHO_API_URL, max_batch=ENTRY_LOG_BATCH_SIZE, flush_interval=ENTRY_LOG_FLUSH_SECONDS)
+
+class EchoBot(commands.AutoShardedBot):
+    """Bot that runs the write-behind entry log, the ingest queue and the outbound dispatcher for its lifetime."""
+
+    async def setup_hook(self):
+        global ingest_queue
+        entry_log.start()
+        dispatcher.start()
+        # Messages queued before a restart are delivered as soon as we're back
+        ingest_queue = IngestQueue(
+            INGEST_QUEUE_PATH,
+            deliver_user_message,
+            workers=INGEST_WORKERS,
+            max_pending=INGEST_MAX_PENDING
+        )
+        ingest_queue.start()
+        # Persistent view: buttons on check-ins sent before a restart keep working
+        self.add_view(QuickReplyView())
+
+    async def close(self):
+        # Flush logged bot messages before the connection goes away
+        await entry_log.close()
+        if ingest_queue:
+            await ingest_queue.close()
+        await dispatcher.close()
+        await super().close()
+
+bot = EchoBot(
+    command_prefix='!',
+    intents=intents,
+    shard_count=SHARD_COUNT,
+    shard_ids=SHARD_IDS
+)
+user_preferences = UserPreferences(ECHO_API_URL, ttl_seconds=PREFERENCES_TTL_SECONDS)
+followups = FollowupScheduler(SHARD_IDS)
+dispatcher = OutboundDispatcher(
+    global_limit=OUTBOUND_GLOBAL_LIMIT,
+    followup_jitter=FOLLOWUP_JITTER_SECONDS,
+    max_in_flight=OUTBOUND_MAX_IN_FLIGHT
+)
+ingest_queue = None
+# Seconds from a user's message (or button press) to the bot's reply, by entry source
+reply_latency = {"text": deque(maxlen=1000), "button": deque(maxlen=1000)}
+
+class QuickReplyView(discord.ui.View):
+    """Quick-reply buttons sent with check-ins. Fixed custom ids and no timeout, so one view handles every message."""
+
+    def __init__(self):
+        super().__init__(timeout=None)
+        for option, label, emoji in QUICK_REPLY_BUTTONS:
+            button = discord.ui.Button(
+                label=label,
+                emoji=emoji,
+                style=discord.ButtonStyle.secondary,
+                custom_id=f"quick_reply:{option}"
+            )
+            button.callback = functools.partial(on_quick_reply, option, label)
+            self.add_item(button)
+
+async def on_quick_reply(option, label, interaction):
+    """A quick-reply button was pressed: queue it like a message, answered without an LLM call."""
+    user_id = str(interaction.user.id)
+    entry_payload = {
+        "discordId": user_id,
+        "timestamp": interaction.created_at.isoformat(),
+        "content": label,
+        "role": "user",
+        "source": "button",
+        "quickReply": option,
+        "notes": None
+    }
+    # The interaction id is unique per press, so redeliveries are harmless
+    queued = await ingest_queue.enqueue(f"button-{interaction.id}", user_id, entry_payload, channel_id=interaction.channel_id)
+    try:
+        if queued:
+            # Acknowledge without a message of its own; the reply follows through the dispatcher
+            await interaction.response.defer()
+        else:
+            await interaction.response.send_message("⏳ I'm a bit behind right now. Please try again in a minute.", ephemeral=True)
+    except discord.DiscordException as e:
+        print(f"⚠️ Couldn't acknowledge button press {interaction.id}: {e}")
 
 async def send_welcome_message(member, ctx=None):
     """Send welcome DM to a member. If DMs are disabled, post a notice in the server.
@@ -43,17 +170,17 @@ Example: "Just finished my morning workout" or "Starting work on my project"
     """.strip()
     
     try:
-        await member.send(welcome_text)
+        await dispatcher.send(member, welcome_text)
         # If called from a command, acknowledge in the channel
         if ctx:
-            await ctx.send(f"✅ {member.mention}, I've sent you a welcome DM!")
+            await dispatcher.send(ctx, f"✅ {member.mention}, I've sent you a welcome DM!")
     except discord.Forbidden:
         # Can't DM the user; notify in a server channel
         notice = f"{member.mention}, I couldn't send you a DM. Please enable DMs from server members to receive the welcome message."
         
         # If called from a command, send the notice there
         if ctx:
-            await ctx.send(notice)
+            await dispatcher.send(ctx, notice)
         else:
             # Called from on_member_join, find an appropriate channel
             guild = member.guild
@@ -70,7 +197,7 @@ Example: "Just finished my morning workout" or "Starting work on my project"
                         break
             
             if target_channel:
-                await target_channel.send(notice)
+                await dispatcher.send(target_channel, notice)
             else:
                 # As a last resort, log to console
                 print(f"Couldn't DM {member.name} and found no channel to notify them in {guild.name}.")
@@ -87,81 +214,117 @@ async def welcome(ctx):
     """Send a welcome DM to the user who invoked the command."""
     await send_welcome_message(ctx.author, ctx=ctx)
 
-def post_user_message_and_get_response(content, user_id, persona=DEFAULT_PERSONA):
+def post_user_message_and_get_response(entry_payload, idempotency_key):
     """
     Posts a user message to the API and gets the bot response.
+    The persona is left to the API, which uses the user's stored preference.
     
     Returns:
-        dict with 'entry' and 'bot_response' (if available)
+        requests.Response: 201 with 'entry' and 'bot_response' (if available),
+        or 200 if the API already has this message
     """
-    entry_payload = {
-        "discordId": user_id,
-        "timestamp": datetime.datetime.now().isoformat(),
-        "content": content,
-        "role": "user",
-        "notes": None
-    }
     print(f"📤 Posting user entry: {entry_payload}")
-
     response = requests.post(
-        f"{ECHO_API_URL}entries?persona={persona}", 
-        json=entry_payload
+        f"{ECHO_API_URL}entries",
+        json=entry_payload,
+        headers={"Idempotency-Key": idempotency_key},
+        timeout=60
     )
-    
     if response.status_code == 201:
-        data = response.json()
-        print(f"📥 Received response: {data}")
-        return data
-    else:
+        print(f"📥 Received response: {response.json()}")
+    elif response.status_code != 200:
         print(f"❌ Error posting entry: {response.status_code}")
-        return None
+    return response
+
+@profiler.counted
+async def deliver_user_message(item):
+    """Ingest queue consumer: send one queued user message to the API and reply to it."""
+    try:
+        response = await asyncio.to_thread(post_user_message_and_get_response, item["payload"], item["idempotency_key"])
+    except requests.RequestException as e:
+        print(f"❌ API unreachable: {e}")
+        return RETRY
+    
+    if response.status_code == 429 or response.status_code >= 500:
+        return RETRY
+    if response.status_code not in (200, 201):
+        return REJECTED
+    # 200: stored by an earlier attempt whose response never reached us, so the user hasn't
+    # been replied to yet; the API returns the reply it generated then
+    
+    channel = bot.get_channel(item["channel_id"])
+    if channel is None:
+        try:
+            channel = await bot.fetch_channel(item["channel_id"])
+        except discord.DiscordException as e:
+            print(f"⚠️ Can't reply to queued message {item['idempotency_key']}: {e}")
+            return DELIVERED
+    await reply_to_entry(response.json(), item["user_id"], channel)
+    payload = item["payload"]
+    sent_at = datetime.datetime.fromisoformat(payload["timestamp"])
+    reply_latency.setdefault(payload.get("source", "text"), deque(maxlen=1000)).append(
+        (datetime.datetime.now(datetime.timezone.utc) - sent_at).total_seconds()
+    )
+    return DELIVERED
 
 def post_bot_message(content, user_id):
-    """Posts a bot message to the API (without expecting a bot response)."""
+    """Queues a bot message for logging to the API (without expecting a bot response)."""
     entry_payload = {
         "discordId": user_id,
-        "timestamp": datetime.datetime.now().isoformat(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
         "content": content,
         "role": "bot",
         "notes": None
     }
-    print(f"📤 Posting bot entry: {entry_payload}")
-
-    try:
-        response = requests.post(ECHO_API_URL + "entries", json=entry_payload)
-        if response.status_code != 201:
-            print(f"❌ Error posting bot message: {response.status_code}")
-    except Exception as e:
-        print(f"❌ Exception posting bot message: {e}")
+    entry_log.add(entry_payload)
 
-async def send_bot_message(message, user_id, channel):
-    """Send a bot message to Discord and log it to the API."""
+async def send_bot_message(message, user_id, channel, priority=INTERACTIVE, jitter=None, quick_replies=False):
+    """Send a bot message to Discord, with the quick-reply buttons if asked; logging to the API happens in the background."""
     post_bot_message(message, user_id)
-    await channel.send(message)
+    if quick_replies:
+        await dispatcher.send(channel, message, priority=priority, jitter=jitter, view=QuickReplyView())
+    else:
+        await dispatcher.send(channel, message, priority=priority, jitter=jitter)
+
+def download_audio(url, destination):
+    """Stream an audio file to disk. Returns the HTTP status code."""
+    with requests.get(url, stream=True, timeout=30) as response:
+        if response.status_code == 200:
+            with open(destination, "wb") as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    f.write(chunk)
+        return response.status_code
 
-async def send_audio_file(ctx, audio_file_path):
-    """Send an audio file to Discord channel by downloading from API."""
+async def send_audio_file(ctx, audio_file_path, audio_url=None):
+    """
+    Send an audio file to Discord channel.
+    Downloads straight from the audio storage when the API gave us a direct URL,
+    otherwise through the API.
+    """
     try:
         # Extract filename from the path
         filename = os.path.basename(audio_file_path)
+        temp_file_path = f"temp_{filename}"
         
-        # Download audio file from API
-        print(f"🎵 Downloading audio file from API: {filename}")
-        response = requests.get(f"{ECHO_API_URL}audio/{filename}")
+        status = None
+        if audio_url:
+            print(f"🎵 Downloading audio file from storage: {filename}")
+            try:
+                status = await asyncio.to_thread(download_audio, audio_url, temp_file_path)
+            except requests.RequestException as e:
+                print(f"⚠️ Direct audio download failed, falling back to the API: {e}")
+        if status != 200:
+            print(f"🎵 Downloading audio file from API: {filename}")
+            status = await asyncio.to_thread(download_audio, f"{ECHO_API_URL}audio/{filename}", temp_file_path)
         
-        if response.status_code != 200:
-            print(f"❌ Failed to download audio file: HTTP {response.status_code}")
-            await ctx.send("📢 Audio file not available.")
+        if status != 200:
+            print(f"❌ Failed to download audio file: HTTP {status}")
+            await dispatcher.send(ctx, "📢 Audio file not available.")
             return
         
-        # Save to temporary file
-        temp_file_path = f"temp_{filename}"
-        with open(temp_file_path, "wb") as f:
-            f.write(response.content)
-        
         # Send the audio file
-        audio_file = discord.File(temp_file_path, filename="summary.mp3")
-        await ctx.send("🎵 Here's your daily summary audio:", file=audio_file)
+        audio_file = discord.File(temp_file_path, filename=f"summary{os.path.splitext(filename)[1] or '.mp3'}")
+        await dispatcher.send(ctx, "🎵 Here's your daily summary audio:", file=audio_file)
         print(f"✅ Audio file sent successfully: {filename}")
         
         # Clean up temporary file
@@ -173,7 +336,7 @@ async def send_audio_file(ctx, audio_file_path):
         
     except Exception as e:
         print(f"❌ Error sending audio file: {e}")
-        await ctx.send("📢 Failed to send audio file.")
+        await dispatcher.send(ctx, "📢 Failed to send audio file.")
         raise
 
 def format_time_duration(seconds):
@@ -200,13 +363,19 @@ async def schedule_followup_message(message, user_id, channel, delay_seconds):
     formatted_time = format_time_duration(delay_seconds)
     print(f"⏰ Scheduling followup message in {formatted_time}")
     await asyncio.sleep(delay_seconds)
-    await send_bot_message(message, user_id, channel)
+    jitter = min(FOLLOWUP_JITTER_SECONDS, delay_seconds / 10)
+    await send_bot_message(message, user_id, channel, priority=FOLLOWUP, jitter=jitter, quick_replies=True)
 
 @bot.event
 async def on_ready():
     print(f'✅ We have logged in as {bot.user}')
+    print(f'🧩 Running shards {sorted(bot.shards)} of {bot.shard_count}')
     print(f'🎭 Default persona: {DEFAULT_PERSONA}')
 
+@bot.event
+async def on_shard_ready(shard_id):
+    print(f'🧩 Shard {shard_id} ready, pending follow-ups: {followups.pending().get(shard_id, 0)}')
+
 @bot.event
 async def on_message(message):
     # Return early if the message is from the bot
@@ -218,60 +387,82 @@ async def on_message(message):
     # Process commands if message starts with !
     if message.content.startswith("!"):
         await bot.process_commands(message)
-    else:
-        # Post user message and get bot response
-        response_data = post_user_message_and_get_response(
-            message.content, 
-            user_id, 
-            persona=DEFAULT_PERSONA
-        )
+        return
+
+    entry_payload = {
+        "discordId": user_id,
+        "timestamp": message.created_at.isoformat(),
+        "content": message.content,
+        "role": "user",
+        "source": "text",
+        "notes": None
+    }
+    # The Discord message id doubles as the idempotency key, so redeliveries are harmless
+    queued = await ingest_queue.enqueue(str(message.id), user_id, entry_payload, channel_id=message.channel.id)
+    try:
+        if queued:
+            await message.add_reaction(RECEIVED_REACTION)
+        else:
+            await dispatcher.send(message.channel, "⏳ I'm a bit behind right now. Please send that again in a minute.")
+    except discord.DiscordException as e:
+        print(f"⚠️ Couldn't acknowledge message {message.id}: {e}")
+
+async def reply_to_entry(response_data, user_id, channel):
+    """Send the API's reply to a user entry and schedule its follow-up."""
+    if response_data and response_data.get("bot_response"):
+        bot_response = response_data["bot_response"]
         
-        if response_data and response_data.get("bot_response"):
-            bot_response = response_data["bot_response"]
-            
-            # Send immediate reply
-            timeout_seconds = bot_response.get("timeout_seconds", 30)  # Default 30 seconds
-            formatted_time = format_time_duration(timeout_seconds)
+        # Send immediate reply
+        timeout_seconds = bot_response.get("timeout_seconds", 30)  # Default 30 seconds
+        formatted_time = format_time_duration(timeout_seconds)
 
-            initial_reply = bot_response.get("reply", "Log received!")  + f"\nI'll check back in {formatted_time}."
-            await send_bot_message(initial_reply, user_id, message.channel)
-            
-            # Schedule followup message
-            followup_message = bot_response.get("followup_message", "How did it go?")
-            
-            # Create background task for followup
-            asyncio.create_task(
-                schedule_followup_message(
-                    followup_message, 
-                    user_id, 
-                    message.channel, 
-                    timeout_seconds
-                )
+        # Schedule followup message (none after e.g. "Done for today")
+        followup_message = bot_response.get("followup_message", "How did it go?")
+        if followup_message is None:
+            await send_bot_message(bot_response.get("reply", "Log received!"), user_id, channel)
+            return
+
+        initial_reply = bot_response.get("reply", "Log received!")  + f"\nI'll check back in {formatted_time}."
+        await send_bot_message(initial_reply, user_id, channel, quick_replies=True)
+        
+        # Create background task for followup, owned by the shard that serves the channel
+        guild = getattr(channel, "guild", None)
+        shard_id = guild.shard_id if guild else 0
+        followups.schedule(
+            shard_id,
+            schedule_followup_message(
+                followup_message, 
+                user_id, 
+                channel, 
+                timeout_seconds
             )
-        else:
-            # Fallback if no bot response
-            await send_bot_message("Log received!", user_id, message.channel)
+        )
+    else:
+        # Fallback if no bot response
+        await send_bot_message("Log received!", user_id, channel)
 
 @bot.command()
 async def hello(ctx):
     """Greet the user."""
-    await ctx.send(f"Hello {ctx.author.mention}! 👋")
+    await dispatcher.send(ctx, f"Hello {ctx.author.mention}! 👋")
 
 @bot.command()
-async def summary(ctx, persona: str = DEFAULT_PERSONA, voice: str = "alloy"):
+async def summary(ctx, persona: str = None, voice: str = None):
     """
     Get your daily summary.
     Usage: !summary [persona] [voice]
-    Personas: coach, mindful, drill
-    Voices: alloy, echo, fable, onyx, nova, shimmer
+    Personas: coach, mindful, drill (default: your !persona)
+    Voices: alloy, echo, fable, onyx, nova, shimmer (default: your !voice)
     """
     user_id = str(ctx.author.id)
-    summary_date = datetime.datetime.now().strftime("%Y-%m-%d")
+    summary_date = "today"  # resolved by the API in the user's timezone
+    preferences = await user_preferences.get(user_id)
+    persona = persona or preferences["persona"]
+    voice = voice or preferences["voice"]
     
     # Validate voice parameter
-    valid_voices = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
-    if voice not in valid_voices:
-        await ctx.send(f"❌ Invalid voice. Choose from: {', '.join(valid_voices)}")
+    if voice not in VALID_VOICES:
+        await dispatcher.send(ctx, f"❌ Invalid voice. Choose from: {', '.join(VALID_VOICES)}")
         return
     
     try:
@@ -286,38 +477,204 @@ async def summary(ctx, persona: str = DEFAULT_PERSONA, voice: str = "alloy"):
         if audio_file_path:
             try:
                 print(f"🎵 Sending audio file to Discord: {audio_file_path}")
-                await send_audio_file(ctx, audio_file_path)
+                await send_audio_file(ctx, audio_file_path, summary_data.get("audio_url"))
             except Exception as e:
                 print(f"❌ Failed to send audio file: {e}")
-                await ctx.send("📢 Summary audio is available but couldn't be sent. Try again later.")
+                await dispatcher.send(ctx, "📢 Summary audio is available but couldn't be sent. Try again later.")
         else:
-            print(f"ℹ️ No audio file available for user {user_id} on {summary_date}")
-            await ctx.send("📝 Text summary sent. Audio version not available.")
+            print(f"ℹ️ No audio file available for user {user_id} today")
+            await dispatcher.send(ctx, "📝 Text summary sent. Audio version not available.")
             
     except Exception as e:
         error_msg = f"❌ Error getting summary: {str(e)}"
         print(error_msg)
-        await ctx.send(error_msg)
+        await dispatcher.send(ctx, error_msg)
 
 @bot.command()
 async def persona(ctx, new_persona: str = None):
     """
-    Check or change the bot persona.
+    Check or change your bot persona.
     Usage: !persona [coach|mindful|drill]
     """
-    global DEFAULT_PERSONA
-    
-    valid_personas = ["coach", "mindful", "drill"]
+    user_id = str(ctx.author.id)
     
     if new_persona is None:
         # Just show current persona
-        await ctx.send(f"🎭 Current persona: **{DEFAULT_PERSONA}**\nAvailable: {', '.join(valid_personas)}")
-    elif new_persona.lower() in valid_personas:
-        # Change persona
-        DEFAULT_PERSONA = new_persona.lower()
-        await ctx.send(f"🎭 Persona changed to: **{DEFAULT_PERSONA}**")
+        preferences = await user_preferences.get(user_id)
+        await dispatcher.send(ctx, f"🎭 Current persona: **{preferences['persona']}**\nAvailable: {', '.join(VALID_PERSONAS)}")
+    elif new_persona.lower() in VALID_PERSONAS:
+        # Change persona for this user only
+        try:
+            preferences = await user_preferences.update(user_id, name=ctx.author.name, persona=new_persona.lower())
+            await dispatcher.send(ctx, f"🎭 Persona changed to: **{preferences['persona']}**")
+        except Exception as e:
+            await dispatcher.send(ctx, f"❌ Couldn't change persona: {e}")
+    else:
+        await dispatcher.send(ctx, f"❌ Invalid persona. Choose from: {', '.join(VALID_PERSONAS)}")
+
+@bot.command()
+async def voice(ctx, new_voice: str = None):
+    """
+    Check or change the voice used for your audio summaries.
+    Usage: !voice [alloy|echo|fable|onyx|nova|shimmer]
+    """
+    user_id = str(ctx.author.id)
+    
+    if new_voice is None:
+        preferences = await user_preferences.get(user_id)
+        await dispatcher.send(ctx, f"🗣️ Current voice: **{preferences['voice']}**\nAvailable: {', '.join(VALID_VOICES)}")
+    elif new_voice.lower() in VALID_VOICES:
+        try:
+            preferences = await user_preferences.update(user_id, name=ctx.author.name, voice=new_voice.lower())
+            await dispatcher.send(ctx, f"🗣️ Voice changed to: **{preferences['voice']}**")
+        except Exception as e:
+            await dispatcher.send(ctx, f"❌ Couldn't change voice: {e}")
+    else:
+        await dispatcher.send(ctx, f"❌ Invalid voice. Choose from: {', '.join(VALID_VOICES)}")
+
+@bot.command()
+async def timezone(ctx, new_timezone: str = None):
+    """
+    Check or change the timezone your days are counted in.
+    Usage: !timezone [Area/City], e.g. !timezone America/Vancouver
+    """
+    user_id = str(ctx.author.id)
+    
+    if new_timezone is None:
+        preferences = await user_preferences.get(user_id)
+        await dispatcher.send(ctx, f"🌍 Current timezone: **{preferences['timezone']}**\nChange it with `!timezone Area/City`, e.g. `!timezone America/Vancouver`")
+        return
+    try:
+        preferences = await user_preferences.update(user_id, name=ctx.author.name, timezone=new_timezone)
+        await dispatcher.send(ctx, f"🌍 Timezone changed to: **{preferences['timezone']}**")
+    except Exception as e:
+        await dispatcher.send(ctx, f"❌ Couldn't change timezone: {e}")
+
+@bot.command()
+async def search(ctx, *, query: str = None):
+    """
+    Search your past entries.
+    Usage: !search <words or "a phrase">
+    """
+    if not query:
+        await dispatcher.send(ctx, '🔎 Usage: `!search <words or "a phrase">`')
+        return
+    
+    user_id = str(ctx.author.id)
+    try:
+        results = await asyncio.to_thread(search_entries, user_id, query)
+    except Exception as e:
+        await dispatcher.send(ctx, f"❌ Search failed: {e}")
+        return
+    
+    if not results["results"]:
+        await dispatcher.send(ctx, f"🔎 No entries found for **{query}**.")
+        return
+    
+    lines = [f"🔎 Entries matching **{query}**:"]
+    for result in results["results"]:
+        entry = result["entry"]
+        content = entry["content"] if len(entry["content"]) <= 150 else entry["content"][:147] + "..."
+        lines.append(f"• `{entry['timestamp'][:10]}` {content}")
+    if results["has_more"]:
+        lines.append("_More results available, try a more specific search._")
+    await dispatcher.send(ctx, "\n".join(lines)[:2000])  # Discord message limit
+
+@bot.command()
+async def queues(ctx):
+    """Show how far behind the bot is: queued inbound messages and outbound sends."""
+    inbound = ingest_queue.stats()
+    outbound = dispatcher.stats()
+    latency = outbound["sendLatencyMs"]
+    await dispatcher.send(ctx, "\n".join([
+        f"📥 Inbound: {inbound['pending']} queued (oldest {inbound['oldestSeconds']}s), {inbound['rejected']} rejected",
+        f"📤 Outbound: {outbound['queued']['interactive']} replies and {outbound['queued']['followup']} follow-ups queued, "
+        f"{outbound['delayedFollowups']} follow-ups smoothing, {outbound['rateLimited']} rate limited",
+        f"⏱️ Send latency p50/p95: replies {latency['interactive']['p50']}/{latency['interactive']['p95']}ms, "
+        f"follow-ups {latency['followup']['p50']}/{latency['followup']['p95']}ms",
+        f"💬 Reply latency p50/p95: text {format_latency(reply_latency['text'])}, buttons {format_latency(reply_latency['button'])}",
+    ]))
+
+def format_latency(samples):
+    """p50/p95 of latency samples in seconds, as "p50/p95ms"."""
+    if not samples:
+        return "-"
+    ordered = sorted(samples)
+    return f"{round(ordered[len(ordered) // 2] * 1000)}/{round(ordered[int(len(ordered) * 0.95) - 1] * 1000)}ms"
+
+def report_file(text, filename):
+    """A text report as a Discord attachment (reports are longer than a message allows)."""
+    return discord.File(io.BytesIO(text.encode()), filename=filename)
+
+@bot.command()
+async def profile(ctx, *args):
+    """
+    Admin only. Profile the bot: !profile [30s | 100msgs] [sample | cprofile] [memory]
+    Runs for the given seconds or until that many user messages have been handled, then
+    replies with the hottest functions and the full profile as an attachment
+    (collapsed stacks for flamegraph.pl/speedscope in sample mode).
+    """
+    if ctx.author.id not in ADMIN_USER_IDS:
+        return
+    seconds = messages = None
+    mode = "sample"
+    memory = False
+    for arg in args:
+        arg = arg.lower()
+        try:
+            if arg.endswith("msgs") or arg.endswith("msg"):
+                messages = int(arg.rstrip("sgm"))
+            elif arg.endswith("s"):
+                seconds = float(arg[:-1])
+            elif arg in PROFILE_MODES:
+                mode = arg
+            elif arg == "memory":
+                memory = True
+            else:
+                raise ValueError(arg)
+        except ValueError:
+            await dispatcher.send(ctx, "❌ Usage: `!profile [30s | 100msgs] [sample | cprofile] [memory]`")
+            return
+
+    await dispatcher.send(ctx, f"🔬 Profiling ({mode}) for {f'{messages} messages' if messages else f'{seconds or 10:g}s'}...")
+    try:
+        report = await profiler.profile(seconds=seconds, requests=messages, mode=mode, memory=memory)
+    except RuntimeError as e:
+        await dispatcher.send(ctx, f"⚠️ {e}")
+        return
+
+    lines = [f"🔬 {report['seconds']}s, {report['requests'] if report['requests'] is not None else 'all'} messages"]
+    if mode == "sample":
+        lines[0] += f", {report['samples']} samples, event loop busy {report['loopBusy']:.0%}"
+        lines += [f"`{top['ownSamples']:>5}` {top['function']}" for top in report["top"][:8]]
+        attachment = report_file(report["collapsed"], f"profile-{report['pid']}.collapsed.txt")
     else:
-        await ctx.send(f"❌ Invalid persona. Choose from: {', '.join(valid_personas)}")
+        lines[0] += f", {report['calls']} calls"
+        attachment = report_file(report["table"], f"profile-{report['pid']}.txt")
+    if memory:
+        lines.append(f"🧠 Traced {report['memory']['tracedKB']:.0f} KB (peak {report['memory']['peakKB']:.0f} KB), largest growth:")
+        lines += [f"`{top['sizeDiffKB']:>+8.1f} KB` {top['location']}" for top in report["memory"]["top"][:5]]
+    await dispatcher.send(ctx, "\n".join(lines)[:2000], file=attachment)
+
+@bot.command()
+async def tasks(ctx):
+    """Admin only. The bot's asyncio tasks (pending follow-ups among them), grouped by where they wait."""
+    if ctx.author.id not in ADMIN_USER_IDS:
+        return
+    report = task_report()
+    lines = [f"🧵 {report['tasks']} tasks"]
+    lines += [f"`{group['count']:>6}` {group['coroutine']} at {group['waitingAt']}" for group in report["groups"][:15]]
+    await dispatcher.send(ctx, "\n".join(lines)[:2000], file=report_file(report["collapsed"], "tasks.collapsed.txt"))
+
+def search_entries(user_id, query, page_size=5):
+    """Search a user's own entries through the API."""
+    response = requests.get(
+        f"{ECHO_API_URL}users/{user_id}/entries/search",
+        params={"q": query, "role": "user", "page_size": page_size},
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()
 
 def get_summary(user_id, date, persona=DEFAULT_PERSONA, voice="alloy"):
     """Fetch summary from the API."""
@@ -0,0 +1,48 @@
+import asyncio
+
+
+def shard_for_guild(guild_id, shard_count):
+    """Discord's shard routing: which shard receives events for a guild. DMs always go to shard 0."""
+    if guild_id is None:
+        return 0
+    return (guild_id >> 22) % shard_count
+
+
+class FollowupScheduler:
+    """
+    Owns the pending follow-up tasks of the shards running in this process.
+
+    Follow-ups are partitioned by the shard that received the user's message, so when the
+    bot is split across processes each follow-up is scheduled and sent exactly once, by
+    the process that owns that shard.
+    """
+
+    def __init__(self, shard_ids=None):
+        # None means this process owns every shard (AutoShardedBot default)
+        self.shard_ids = set(shard_ids) if shard_ids is not None else None
+        self._tasks = {}
+
+    def owns(self, shard_id):
+        return self.shard_ids is None or shard_id in self.shard_ids
+
+    def schedule(self, shard_id, coro):
+        """Run coro as a follow-up owned by shard_id. Returns the task, or None if another process owns the shard."""
+        if not self.owns(shard_id):
+            coro.close()
+            print(f"⚠️ Shard {shard_id} is not owned by this process, dropping follow-up")
+            return None
+
+        task = asyncio.create_task(coro)
+        shard_tasks = self._tasks.setdefault(shard_id, set())
+        shard_tasks.add(task)
+        task.add_done_callback(shard_tasks.discard)
+        return task
+
+    def pending(self):
+        """Number of pending follow-ups per shard."""
+        return {shard_id: len(tasks) for shard_id, tasks in self._tasks.items() if tasks}
+
+    def cancel_all(self):
+        for tasks in self._tasks.values():
+            for task in list(tasks):
+                task.cancel()
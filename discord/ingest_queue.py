@@ -0,0 +1,193 @@
+import asyncio
+import json
+import sqlite3
+import time
+from collections import deque
+
+# Outcomes a deliver() callback reports for a queued message
+DELIVERED = "delivered"  # done, remove from the queue
+RETRY = "retry"  # temporary failure (API down, 5xx, 429), try again later
+REJECTED = "rejected"  # the API refused it (4xx), keep it aside in the dead-letter table
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    channel_id INTEGER,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pending_user ON pending (user_id, id);
+CREATE TABLE IF NOT EXISTS rejected (
+    id INTEGER PRIMARY KEY,
+    idempotency_key TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    rejected_at REAL NOT NULL
+);
+"""
+
+
+class IngestQueue:
+    """
+    Durable queue for user messages on their way to POST /entries.
+
+    A message is committed to a local SQLite database (WAL mode) before the bot
+    acknowledges it, so nothing is lost if the API is slow, down or restarting, or if
+    the bot itself restarts. A pool of `workers` consumers hands messages to `deliver`:
+    - each user's messages are delivered one at a time, oldest first;
+    - a message is only removed after `deliver` reports DELIVERED, so delivery is
+      at-least-once and the API de-duplicates on the idempotency key;
+    - failures are retried with exponential backoff, holding back that user's later messages;
+    - enqueue() waits while max_pending messages are queued (backpressure) and gives up
+      after enqueue_timeout seconds.
+    """
+
+    def __init__(self, path, deliver, workers=4, max_pending=10000, enqueue_timeout=5.0,
+                 base_backoff=1.0, max_backoff=60.0, poll_interval=1.0):
+        self.deliver = deliver
+        self.workers = workers
+        self.max_pending = max_pending
+        self.enqueue_timeout = enqueue_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL survives a process crash; only an OS crash can lose the last commits
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._busy_users = set()
+        self._ready = deque()
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._tasks = []
+        self.delivered = 0
+        self.retried = 0
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    async def enqueue(self, idempotency_key, user_id, payload, channel_id=None):
+        """
+        Durably queue a message. Returns False if the queue stayed full for enqueue_timeout
+        seconds. Queuing the same idempotency key twice is a no-op.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.enqueue_timeout
+        while len(self) >= self.max_pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            self._space.clear()
+            try:
+                await asyncio.wait_for(self._space.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return False
+
+        self.db.execute(
+            "INSERT OR IGNORE INTO pending (idempotency_key, user_id, channel_id, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+            (idempotency_key, user_id, channel_id, json.dumps(payload), time.time())
+        )
+        self._wakeup.set()
+        return True
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        """Stop the consumers. Anything not yet delivered stays on disk for the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        remaining = len(self)
+        if remaining:
+            print(f"💾 {remaining} queued messages will be delivered after restart")
+        self.db.close()
+
+    def stats(self):
+        oldest = self.db.execute("SELECT MIN(created_at) FROM pending").fetchone()[0]
+        return {
+            "pending": len(self),
+            "rejected": self.db.execute("SELECT COUNT(*) FROM rejected").fetchone()[0],
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "oldestSeconds": round(time.time() - oldest, 1) if oldest else 0,
+        }
+
+    def _claim(self):
+        """The oldest message of a user no other worker is busy with, if it is due."""
+        if not self._ready:
+            # Fetch due heads of several users at once rather than querying per claim
+            rows = self.db.execute(
+                """
+                SELECT id, idempotency_key, user_id, channel_id, payload, attempts FROM pending p
+                WHERE id = (SELECT MIN(id) FROM pending WHERE user_id = p.user_id) AND next_attempt_at <= ?
+                ORDER BY id LIMIT ?
+                """,
+                (time.time(), len(self._busy_users) + self.workers * 8)
+            ).fetchall()
+            self._ready = deque(row for row in rows if row[2] not in self._busy_users)
+        if not self._ready:
+            return None
+        row = self._ready.popleft()
+        self._busy_users.add(row[2])
+        return {
+            "id": row[0], "idempotency_key": row[1], "user_id": row[2],
+            "channel_id": row[3], "payload": json.loads(row[4]), "attempts": row[5],
+        }
+
+    async def _worker(self):
+        while True:
+            item = self._claim()
+            if item is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                try:
+                    outcome = await self.deliver(item)
+                except Exception as e:
+                    print(f"❌ Delivering queued message {item['idempotency_key']} failed: {e}")
+                    outcome = RETRY
+                self._finish(item, outcome)
+            finally:
+                self._busy_users.discard(item["user_id"])
+                # This user's next message (if any) is now claimable
+                self._wakeup.set()
+
+    def _finish(self, item, outcome):
+        if outcome == DELIVERED:
+            self.db.execute("DELETE FROM pending WHERE id = ?", (item["id"],))
+            self.delivered += 1
+            self._space.set()
+        elif outcome == REJECTED:
+            with self.db:
+                self.db.execute("BEGIN")
+                self.db.execute(
+                    "INSERT INTO rejected (id, idempotency_key, user_id, payload, attempts, rejected_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (item["id"], item["idempotency_key"], item["user_id"], json.dumps(item["payload"]), item["attempts"] + 1, time.time())
+                )
+                self.db.execute("DELETE FROM pending WHERE id = ?", (item["id"],))
+            print(f"🗑️ API rejected queued message {item['idempotency_key']}, moved to the dead-letter table")
+            self._space.set()
+        else:
+            attempts = item["attempts"] + 1
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1))
+            self.db.execute(
+                "UPDATE pending SET attempts = ?, next_attempt_at = ? WHERE id = ?",
+                (attempts, time.time() + backoff, item["id"])
+            )
+            self.retried += 1
+            if attempts == 1 or attempts % 10 == 0:
+                print(f"⏳ Delivery of {item['idempotency_key']} failed {attempts} time(s), retrying in {backoff:.0f}s ({len(self)} queued)")
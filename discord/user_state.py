@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import requests
+
+DEFAULT_PREFERENCES = {"persona": "drill", "voice": "alloy", "timezone": "UTC"}
+
+
+class TTLCache:
+    """Small in-process cache whose entries expire after ttl_seconds."""
+
+    def __init__(self, ttl_seconds=60, max_size=10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._data = {}
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key, value):
+        if key not in self._data and len(self._data) >= self.max_size:
+            # Dicts keep insertion order, so this evicts the oldest entry
+            self._data.pop(next(iter(self._data)))
+        self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+
+class UserPreferences:
+    """
+    Per-user persona, voice and timezone, stored by the API so every shard process sees the same value.
+    Each shard keeps a local TTL cache, so a change made through another shard shows up
+    here after at most ttl_seconds.
+    """
+
+    def __init__(self, api_url, ttl_seconds=60):
+        self.api_url = api_url
+        self._cache = TTLCache(ttl_seconds=ttl_seconds)
+
+    async def get(self, user_id):
+        """Get a user's preferences, from the local cache if possible."""
+        cached = self._cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        preferences = await asyncio.to_thread(self._fetch, user_id)
+        if preferences is None:
+            # API unavailable: use the defaults without caching them
+            return dict(DEFAULT_PREFERENCES)
+        self._cache.set(user_id, preferences)
+        return preferences
+
+    async def update(self, user_id, name=None, **changes):
+        """Store new preferences for a user and refresh the local cache. Raises on API errors."""
+        preferences = await asyncio.to_thread(self._patch, user_id, name, changes)
+        self._cache.set(user_id, preferences)
+        return preferences
+
+    def _fetch(self, user_id):
+        try:
+            response = requests.get(f"{self.api_url}users/{user_id}/preferences", timeout=5)
+            if response.status_code == 200:
+                return {**DEFAULT_PREFERENCES, **response.json()}
+            print(f"❌ Error fetching preferences: {response.status_code}")
+        except Exception as e:
+            print(f"❌ Exception fetching preferences: {e}")
+        return None
+
+    def _patch(self, user_id, name, changes):
+        response = requests.patch(
+            f"{self.api_url}users/{user_id}/preferences",
+            params={"name": name} if name else None,
+            json=changes,
+            timeout=5,
+        )
+        if response.status_code != 200:
+            detail = response.json().get("detail", response.status_code) if response.content else response.status_code
+            raise Exception(f"API returned {detail}")
+        return {**DEFAULT_PREFERENCES, **response.json()}
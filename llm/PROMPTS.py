@@ -32,6 +32,48 @@ Journal entries to analyze:
 Please provide your {summary_length} daily summary now ({summary_instruction}):
 """
 
+PERIOD_SUMMARY_TEMPLATE = """
+You are Echo, an intelligent micro-journaling assistant with a {persona_name} personality. Your task is to review a user's {period_label} from their summaries and provide a {summary_length} summary of the {period_name}.
+
+PERSONA: {persona_name}
+DESCRIPTION: {persona_description}
+TONE: {persona_tone}
+EXAMPLE PROMPTS: {persona_examples}
+
+Each summary below covers one part of the {period_name} and is labelled with its date or range.
+
+Your goal is to:
+1. Identify the main themes and progress across the {period_name}
+2. Note patterns in productivity and energy from day to day
+3. Highlight the most significant accomplishments and any recurring blockers
+4. Offer actionable suggestions for the next {period_name}
+5. Keep the tone {persona_tone}
+
+Summaries to analyze:
+{summaries}
+
+Please provide your {summary_length} summary of the {period_name} now ({summary_instruction}):
+"""
+
+ROLLING_SUMMARY_TEMPLATE = """
+You are Echo, a micro-journaling assistant. You keep compact running notes of a user's day
+so that the end-of-day summary never has to re-read every entry.
+
+Running notes so far (empty at the start of the day):
+{previous_summary}
+
+New journal entries since those notes were written:
+{entries}
+
+Update the running notes to include the new entries:
+- Keep every task, accomplishment, blocker, break and mood change, with approximate times
+- Merge repeated or trivial updates; bot check-ins only matter for what the user answered
+- Write neutral factual notes, no advice and no persona
+- **MAXIMUM {max_words} words**
+
+Updated running notes:
+"""
+
 ONE_TURN_CALL_TEMPLATE = """
 You are Echo, an intelligent micro-journaling assistant with a {persona_name} personality.
 
@@ -40,7 +82,7 @@ DESCRIPTION: {persona_description}
 TONE: {persona_tone}
 EXAMPLE PROMPTS: {persona_examples}
 
-User message: "{user_message}"
+{memory_context}User message: "{user_message}"
 
 CRITICAL TIME EXTRACTION INSTRUCTIONS:
 Analyze the user's message carefully to determine the most relevant time period. Look for:
@@ -94,6 +136,13 @@ Examples:
 Make sure your response matches the {persona_tone} tone and personality.
 """
 
+# Inserted into ONE_TURN_CALL_TEMPLATE when past entries/summaries relevant to the message were recalled
+MEMORY_CONTEXT_TEMPLATE = """RELEVANT MEMORIES (earlier entries from this user, most relevant first):
+{memories}
+Use these only if they genuinely help, e.g. to notice progress or a recurring pattern. Never list them back.
+
+"""
+
 # Persona definitions
 PERSONAS = {
     "coach": {
@@ -147,4 +196,67 @@ SUMMARY_CONFIGS = {
 6. **Provide 2-3 detailed paragraphs** - be comprehensive but {persona_tone}""",
         "instruction": "2-3 paragraphs"
     }
-}
\ No newline at end of file
+}
+
+# Quick-reply buttons on check-in messages: option -> button label
+QUICK_REPLY_OPTIONS = {
+    "start_task": "Starting task",
+    "break": "Taking a break",
+    "done": "Done for today",
+}
+
+# Precomputed replies to the quick-reply buttons, answered without an LLM call.
+# time is when to check in next (as in the one-turn reply); None means no follow-up.
+QUICK_REPLIES = {
+    "coach": {
+        "start_task": {
+            "replies": ["Let's go! Lock in and make it count.", "Game time. One focused block, one real win."],
+            "time": "45m",
+            "nextCheckIn": "How did that block go? What did you get done?",
+        },
+        "break": {
+            "replies": ["Good call, recharge so you come back stronger.", "Breaks are part of the game plan. Enjoy it!"],
+            "time": "15m",
+            "nextCheckIn": "Break's over, champ. What's the next win?",
+        },
+        "done": {
+            "replies": ["Great work today! Rest up, tomorrow we go again.", "That's a wrap. Proud of the effort you put in today!"],
+            "time": None,
+            "nextCheckIn": None,
+        },
+    },
+    "mindful": {
+        "start_task": {
+            "replies": ["Take a breath and settle in. One thing at a time.", "Beginning is often the hardest part. Be gentle with yourself as you start."],
+            "time": "45m",
+            "nextCheckIn": "How did that time feel? What did you notice?",
+        },
+        "break": {
+            "replies": ["A pause is a kindness to yourself. Enjoy it.", "Step away and let your mind rest for a moment."],
+            "time": "15m",
+            "nextCheckIn": "Welcome back. How are you feeling now?",
+        },
+        "done": {
+            "replies": ["Well done for today. Let yourself fully rest this evening.", "You showed up today, and that matters. Rest well."],
+            "time": None,
+            "nextCheckIn": None,
+        },
+    },
+    "drill": {
+        "start_task": {
+            "replies": ["Move out! Full focus until the job is done.", "About time. Execute and report back."],
+            "time": "45m",
+            "nextCheckIn": "Report! Is the task complete, soldier?",
+        },
+        "break": {
+            "replies": ["Fifteen minutes. Not a second more.", "Granted. Hydrate and get back to your post."],
+            "time": "15m",
+            "nextCheckIn": "Break's over! What's your status?",
+        },
+        "done": {
+            "replies": ["Dismissed. Be back at 0800 ready to work.", "Mission complete for today. Rest up, soldier."],
+            "time": None,
+            "nextCheckIn": None,
+        },
+    },
+}
@@ -0,0 +1,7 @@
+"""LLM helpers for Echo: one-turn replies, daily summaries and text-to-speech."""
+from .summarizer import generate_summarizer, generate_rolling_summary, generate_period_summary
+from .oneTurnCall import generate_one_turn_response, quick_reply_response
+from .tts import text_to_speech
+
+__all__ = ["generate_summarizer", "generate_rolling_summary", "generate_period_summary",
+           "generate_one_turn_response", "quick_reply_response", "text_to_speech"]
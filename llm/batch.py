@@ -0,0 +1,97 @@
+"""
+OpenAI Batch API helpers for LLM calls that can wait (nightly summaries).
+
+A batch is a JSONL file of chat completion requests that OpenAI works through within
+24 hours, at half the price and against a separate rate limit, so it never competes with
+interactive replies. Requests use the model chat() would pick first for the task.
+"""
+import asyncio
+import json
+import time
+
+from .llm_client import get_openai_client
+from .router import router
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+# Statuses after which a batch won't change any more
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def chat_request(custom_id, task, prompt, input_chars=None, persona=None, summary_length=None):
+    """One line of a batch input file: the chat completion chat(task, prompt, ...) would send."""
+    route = router.routes[task]
+    candidates = router.candidates(task, len(prompt) if input_chars is None else input_chars, persona, summary_length)
+    candidate = candidates[0]
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": candidate["model"],
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": candidate.get("temperature", route["temperature"]),
+        },
+    }
+
+
+def write_batch_file(path, requests):
+    with open(path, "w") as f:
+        for request in requests:
+            f.write(json.dumps(request) + "\n")
+
+
+async def submit_batch(path, base_url=None, api_key_env=None, metadata=None):
+    """Upload a batch input file and start the batch. Returns the Batch object."""
+    client = get_openai_client(base_url, api_key_env)
+    with open(path, "rb") as f:
+        uploaded = await client.files.create(file=f, purpose="batch")
+    return await client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+        metadata=metadata
+    )
+
+
+async def wait_for_batch(batch_id, base_url=None, api_key_env=None, poll_interval=60.0, timeout=None):
+    """
+    Poll a batch until it reaches a final status, or until timeout seconds have passed.
+    Returns the last Batch object seen.
+    """
+    client = get_openai_client(base_url, api_key_env)
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        batch = await client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(f"⏳ Batch {batch_id}: {batch.status}"
+              + (f", {counts.completed}/{counts.total} done, {counts.failed} failed" if counts else ""))
+        if batch.status in FINAL_STATUSES or (deadline is not None and time.monotonic() >= deadline):
+            return batch
+        await asyncio.sleep(poll_interval)
+
+
+async def batch_results(batch, base_url=None, api_key_env=None):
+    """
+    Read a finished batch's output.
+    Returns (replies, errors): custom_id -> reply text, and custom_id -> error message.
+    """
+    client = get_openai_client(base_url, api_key_env)
+    replies, errors = {}, {}
+    if batch.output_file_id:
+        output = await client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if response.get("status_code") == 200:
+                replies[result["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+            else:
+                errors[result["custom_id"]] = json.dumps(result.get("error") or response.get("body"))
+    if batch.error_file_id:
+        output = await client.files.content(batch.error_file_id)
+        for line in output.text.splitlines():
+            if line.strip():
+                result = json.loads(line)
+                errors[result["custom_id"]] = json.dumps(result.get("error") or (result.get("response") or {}).get("body"))
+    return replies, errors
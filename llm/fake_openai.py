@@ -0,0 +1,219 @@
+"""
+Stand-in for an OpenAI-compatible chat completions endpoint, for testing the model router
+without an API key. Each server has a latency profile (base latency, extra latency per 1000
+prompt characters, random jitter) and an error rate, which can be changed while it runs:
+
+    python -m llm.fake_openai --port 9101 --latency 0.3 --per-kchar 0.05 --error-rate 0.02
+    curl -X POST localhost:9101/control -d '{"latency": 6, "error_rate": 0.5}'
+
+Point a route candidate at it with "base_url": "http://localhost:9101/v1".
+
+It also fakes the Files and Batches endpoints of the Batch API (see llm/batch.py). A batch
+takes batch_seconds to complete, and each request in it fails with probability error_rate.
+"""
+import itertools
+import json
+import random
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ONE_TURN_REPLY = {"reply": "Nice work, keep it going!", "time": "30m", "nextCheckIn": "How did it go?"}
+
+
+class FakeOpenAIServer:
+    def __init__(self, port=0, latency=0.3, per_kchar=0.0, jitter=0.2, error_rate=0.0, batch_seconds=2.0, seed=None):
+        self.profile = {"latency": latency, "per_kchar": per_kchar, "jitter": jitter, "error_rate": error_rate,
+                        "batch_seconds": batch_seconds}
+        self.requests = 0
+        self.models = {}
+        self.files = {}  # id -> {"filename", "purpose", "content"}
+        self.batches = {}
+        self._ids = itertools.count(1)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def start(self):
+        """Serve from a background thread."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def configure(self, **profile):
+        """Change the latency profile or error rate of a running server."""
+        with self._lock:
+            self.profile.update(profile)
+
+    def _complete(self, body, simulate_latency=True):
+        """Returns (status, response body) after the simulated latency."""
+        prompt = "".join(message.get("content", "") for message in body.get("messages", []))
+        with self._lock:
+            profile = dict(self.profile)
+            self.requests += 1
+            self.models[body.get("model")] = self.models.get(body.get("model"), 0) + 1
+            # Lognormal jitter: mostly close to the base latency, with a long tail
+            delay = (profile["latency"] + profile["per_kchar"] * len(prompt) / 1000) * self._rng.lognormvariate(0, profile["jitter"])
+            failed = self._rng.random() < profile["error_rate"]
+        if simulate_latency:
+            time.sleep(delay)
+        if failed:
+            return 500, {"error": {"message": "simulated server error", "type": "server_error"}}
+        content = json.dumps(ONE_TURN_REPLY) if "JSON" in prompt else f"Fake summary from {body.get('model')}."
+        return 200, {
+            "id": f"chatcmpl-fake-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        }
+
+    def _store_file(self, filename, purpose, content):
+        file_id = f"file-fake-{next(self._ids)}"
+        self.files[file_id] = {"filename": filename, "purpose": purpose, "content": content}
+        return self._file_object(file_id)
+
+    def _file_object(self, file_id):
+        stored = self.files[file_id]
+        return {"id": file_id, "object": "file", "bytes": len(stored["content"]), "created_at": int(time.time()),
+                "filename": stored["filename"], "purpose": stored["purpose"], "status": "processed"}
+
+    def _create_batch(self, body):
+        if body.get("input_file_id") not in self.files:
+            return 400, {"error": {"message": "unknown input_file_id", "type": "invalid_request_error"}}
+        batch_id = f"batch_fake_{next(self._ids)}"
+        with self._lock:
+            self.batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": body.get("endpoint"),
+                "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window", "24h"),
+                "status": "validating", "created_at": int(time.time()), "output_file_id": None, "error_file_id": None,
+                "request_counts": {"total": 0, "completed": 0, "failed": 0}, "metadata": body.get("metadata"),
+            }
+        threading.Thread(target=self._run_batch, args=(batch_id,), daemon=True).start()
+        return 200, dict(self.batches[batch_id])
+
+    def _run_batch(self, batch_id):
+        batch = self.batches[batch_id]
+        lines = [json.loads(line) for line in self.files[batch["input_file_id"]]["content"].decode().splitlines() if line.strip()]
+        with self._lock:
+            batch["status"] = "in_progress"
+            batch["request_counts"]["total"] = len(lines)
+            duration = self.profile["batch_seconds"]
+        outputs, errors = [], []
+        for line in lines:
+            time.sleep(duration / max(len(lines), 1))
+            status, response = self._complete(line["body"], simulate_latency=False)
+            result = {"id": f"batch_req_{next(self._ids)}", "custom_id": line["custom_id"],
+                      "response": {"status_code": status, "request_id": f"req_{next(self._ids)}", "body": response},
+                      "error": None}
+            with self._lock:
+                if status == 200:
+                    outputs.append(result)
+                    batch["request_counts"]["completed"] += 1
+                else:
+                    errors.append(result)
+                    batch["request_counts"]["failed"] += 1
+        output_file = self._store_file(f"{batch_id}_output.jsonl", "batch_output",
+                                       "".join(json.dumps(r) + "\n" for r in outputs).encode())
+        error_file = self._store_file(f"{batch_id}_error.jsonl", "batch_output",
+                                      "".join(json.dumps(r) + "\n" for r in errors).encode()) if errors else None
+        with self._lock:
+            batch["output_file_id"] = output_file["id"]
+            batch["error_file_id"] = error_file["id"] if error_file else None
+            batch["status"] = "completed"
+            batch["completed_at"] = int(time.time())
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.headers.get("Content-Type", "").startswith("multipart/form-data"):
+                    self._upload(raw)
+                    return
+                body = json.loads(raw or b"{}")
+                if self.path == "/control":
+                    fake.configure(**body)
+                    status, response = 200, fake.profile
+                elif self.path.endswith("/chat/completions"):
+                    status, response = fake._complete(body)
+                elif self.path.endswith("/batches"):
+                    status, response = fake._create_batch(body)
+                else:
+                    status, response = 404, {"error": {"message": f"unknown path {self.path}"}}
+                self._respond(status, json.dumps(response).encode())
+
+            def do_GET(self):
+                parts = self.path.rstrip("/").split("/")
+                if len(parts) >= 2 and parts[-2] == "batches" and parts[-1] in fake.batches:
+                    with fake._lock:
+                        self._respond(200, json.dumps(fake.batches[parts[-1]]).encode())
+                elif len(parts) >= 3 and parts[-1] == "content" and parts[-2] in fake.files:
+                    self._respond(200, fake.files[parts[-2]]["content"], "application/octet-stream")
+                elif len(parts) >= 2 and parts[-2] == "files" and parts[-1] in fake.files:
+                    self._respond(200, json.dumps(fake._file_object(parts[-1])).encode())
+                else:
+                    self._respond(404, json.dumps({"error": {"message": f"unknown path {self.path}"}}).encode())
+
+            def _upload(self, raw):
+                """POST /files: multipart form with "purpose" and "file"."""
+                form = BytesParser(policy=HTTP).parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + raw)
+                fields = {part.get_param("name", header="content-disposition"): part for part in form.iter_parts()}
+                upload = fields["file"]
+                response = fake._store_file(upload.get_filename() or "upload.jsonl",
+                                            fields["purpose"].get_content().strip(),
+                                            upload.get_payload(decode=True))
+                self._respond(200, json.dumps(response).encode())
+
+            def _respond(self, status, data, content_type="application/json"):
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client timed out and hung up
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions endpoint")
+    parser.add_argument("--port", type=int, default=9101)
+    parser.add_argument("--latency", type=float, default=0.3, help="base seconds per request")
+    parser.add_argument("--per-kchar", type=float, default=0.0, help="extra seconds per 1000 prompt characters")
+    parser.add_argument("--jitter", type=float, default=0.2, help="sigma of the lognormal latency multiplier")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--batch-seconds", type=float, default=2.0, help="time a batch takes to complete")
+    args = parser.parse_args()
+    server = FakeOpenAIServer(args.port, args.latency, args.per_kchar, args.jitter, args.error_rate, args.batch_seconds)
+    print(f"🧪 Fake OpenAI endpoint on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
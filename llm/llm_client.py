@@ -0,0 +1,64 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+
+# One client (and therefore one HTTP connection pool) per endpoint and process.
+# Clients are created on the first call, i.e. after gunicorn has forked the worker,
+# and closed by the API's lifespan hook on shutdown.
+_clients = {}
+_in_flight = 0
+
+def get_openai_client(base_url=None, api_key_env=None):
+    """
+    Get the shared OpenAI client, creating it on first use.
+    base_url selects another OpenAI-compatible endpoint (see router.MODEL_ROUTES), whose
+    API key is read from api_key_env if it needs one.
+    """
+    client = _clients.get(base_url)
+    if client is None:
+        api_key = os.getenv(api_key_env or 'OPENAI_API_KEY')
+        if not api_key:
+            if base_url is None:
+                raise ValueError("❌ OPENAI_API_KEY not found in environment variables")
+            api_key = "unused"
+        # Imported here so importing the llm package stays cheap
+        from openai import AsyncOpenAI
+        client = _clients[base_url] = AsyncOpenAI(api_key=api_key, base_url=base_url)
+    return client
+
+async def close_openai_client():
+    """Close the shared OpenAI clients and their connection pools."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.close()
+
+@asynccontextmanager
+async def track_call():
+    """Count an LLM/TTS call as in flight for the duration of the block."""
+    global _in_flight
+    _in_flight += 1
+    try:
+        yield
+    finally:
+        _in_flight -= 1
+
+def in_flight_calls():
+    """Number of LLM/TTS calls currently running in this process."""
+    return _in_flight
+
+async def drain(timeout=30.0):
+    """
+    Wait for in-flight LLM/TTS calls to finish.
+
+    Args:
+        timeout (float): Maximum number of seconds to wait
+
+    Returns:
+        int: Number of calls still running when we stopped waiting
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while _in_flight and loop.time() < deadline:
+        await asyncio.sleep(0.1)
+    return _in_flight
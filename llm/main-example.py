@@ -1,14 +1,17 @@
+# Run from the repo root: python -m llm.main-example
+import os
 import asyncio
 import json
-from summarizer import generate_summarizer
-from tts import text_to_speech
+from dotenv import load_dotenv
+from .summarizer import generate_summarizer
+from .tts import text_to_speech
 
 async def main():
     """Simple POC that generates a summary and converts it to audio"""
     
     # Load sample entries
     try:
-        with open("sample_entries.json", 'r') as file:
+        with open(os.path.join(os.path.dirname(__file__), "sample_entries.json"), 'r') as file:
             entries = json.load(file)
     except FileNotFoundError:
         print("❌ sample_entries.json not found")
@@ -35,4 +38,5 @@ async def main():
         print("❌ Failed to generate summary")
 
 if __name__ == "__main__":
+    load_dotenv()
     asyncio.run(main())
@@ -0,0 +1,158 @@
+"""
+Long-term memory for one-turn replies: a per-user retrieval index over past entries
+and daily summaries.
+
+Texts are embedded with a hashing vectorizer (words and word pairs hashed into
+EMBEDDING_DIM signed buckets, L2-normalised), so no model or network call is needed.
+Vectors are float32 and stored dimension-major: a query only has a handful of
+non-zero buckets, so scoring reads just those rows instead of the whole matrix.
+"""
+import re
+import zlib
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+EMBEDDING_DIM = 256
+# Prompt budget for recalled memories
+MEMORY_MAX_CHARS = 800
+MEMORY_MAX_ITEM_CHARS = 200
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from have i im in is it its just me my of on or so "
+    "that the this to was we were will with you your".split()
+)
+
+
+@lru_cache(maxsize=200_000)
+def _bucket(feature: str) -> Tuple[int, float]:
+    # crc32 rather than hash(): the same text must map to the same buckets in every process
+    h = zlib.crc32(feature.encode())
+    return h % EMBEDDING_DIM, 1.0 if h & 0x80000000 else -1.0
+
+
+def _features(text: str) -> List[str]:
+    # "mum's" and "mum" are the same word for recall purposes
+    words = [w.removesuffix("'s").replace("'", "") for w in _TOKEN.findall(text.lower())]
+    words = [w for w in words if w not in _STOPWORDS and len(w) > 1]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def embed_many(texts: List[str]) -> np.ndarray:
+    """Hashing-vectorizer embeddings as an (EMBEDDING_DIM x len(texts)) float32 matrix of unit columns."""
+    rows, columns, signs = [], [], []
+    for column, text in enumerate(texts):
+        for feature in _features(text):
+            bucket, sign = _bucket(feature)
+            rows.append(bucket)
+            columns.append(column)
+            signs.append(sign)
+    vectors = np.zeros((EMBEDDING_DIM, len(texts)), dtype=np.float32)
+    np.add.at(vectors, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), np.array(signs, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=0)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def embed(text: str) -> np.ndarray:
+    """Embedding of one text: float32, unit length (or all zeros)."""
+    return embed_many([text])[:, 0]
+
+
+def to_epoch(timestamp: datetime) -> float:
+    """Seconds since the epoch; naive datetimes (as stored in MongoDB) are UTC."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+class MemoryIndex:
+    """One user's memories: texts, timestamps and a growable (EMBEDDING_DIM x capacity) float32 matrix."""
+
+    def __init__(self, capacity: int = 256):
+        self.vectors = np.zeros((EMBEDDING_DIM, capacity), dtype=np.float32)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.texts: List[str] = []
+        self.kinds: List[str] = []
+
+    def __len__(self):
+        return len(self.texts)
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.timestamps.nbytes
+
+    def _reserve(self, extra: int):
+        capacity = self.vectors.shape[1]
+        needed = len(self) + extra
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        vectors = np.zeros((EMBEDDING_DIM, capacity), dtype=np.float32)
+        vectors[:, :len(self)] = self.vectors[:, :len(self)]
+        timestamps = np.zeros(capacity, dtype=np.float64)
+        timestamps[:len(self)] = self.timestamps[:len(self)]
+        self.vectors, self.timestamps = vectors, timestamps
+
+    def add_many(self, items: Iterable[Tuple[str, datetime, str]]):
+        """Add (text, timestamp, kind) memories, e.g. kind "entry" or "summary"."""
+        items = [item for item in items if item[0] and item[0].strip()]
+        if not items:
+            return
+        self._reserve(len(items))
+        start, end = len(self), len(self) + len(items)
+        self.vectors[:, start:end] = embed_many([text for text, _, _ in items])
+        self.timestamps[start:end] = [to_epoch(timestamp) for _, timestamp, _ in items]
+        self.texts.extend(text for text, _, _ in items)
+        self.kinds.extend(kind for _, _, kind in items)
+
+    def add(self, text: str, timestamp: datetime, kind: str = "entry"):
+        self.add_many([(text, timestamp, kind)])
+
+    def search(self, query: str, k: int = 3, before: Optional[datetime] = None, min_score: float = 0.2) -> List[dict]:
+        """
+        Top-k memories by cosine similarity to query, best first.
+        Memories at or after `before` (e.g. the message being answered) are skipped.
+        """
+        n = len(self)
+        q = embed(query)
+        nonzero = np.flatnonzero(q)
+        if n == 0 or nonzero.size == 0:
+            return []
+        # Only the query's non-zero dimensions contribute to the dot product
+        scores = q[nonzero] @ self.vectors[nonzero, :n]
+        if before is not None:
+            scores[self.timestamps[:n] >= to_epoch(before)] = -1.0
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "text": self.texts[i],
+                "kind": self.kinds[i],
+                "timestamp": datetime.fromtimestamp(self.timestamps[i], tz=timezone.utc),
+                "score": float(scores[i]),
+            }
+            for i in top if scores[i] >= min_score
+        ]
+
+
+def format_memories(memories: List[dict], max_chars: int = MEMORY_MAX_CHARS) -> str:
+    """Memories as prompt lines ("- [2025-10-12] ..."), cut off at max_chars in total."""
+    lines = []
+    used = 0
+    for memory in memories:
+        text = " ".join(memory["text"].split())
+        if len(text) > MEMORY_MAX_ITEM_CHARS:
+            text = text[:MEMORY_MAX_ITEM_CHARS - 3] + "..."
+        label = "summary of " if memory["kind"] == "summary" else ""
+        line = f"- [{label}{memory['timestamp']:%Y-%m-%d}] {text}"
+        if used + len(line) > max_chars:
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
@@ -1,34 +1,11 @@
-import os
 import json
+import random
 import re
 import asyncio
-from dotenv import load_dotenv
-from openai import AsyncOpenAI
-from PROMPTS import PERSONAS, ONE_TURN_CALL_TEMPLATE
-
-load_dotenv()
-
-def get_openai_client():
-    """Get OpenAI client, raising an exception if API key is not found."""
-    if not os.getenv('OPENAI_API_KEY'):
-        raise ValueError("❌ OPENAI_API_KEY not found in environment variables")
-    return AsyncOpenAI()
-
-client = None
-
-async def chat(message, temperature=0.7):
-    """Send a message to OpenAI and get response."""
-    try:
-        openai_client = get_openai_client()
-        response = await openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": message}],
-            temperature=temperature
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return None
+from .router import chat
+from .PROMPTS import PERSONAS, ONE_TURN_CALL_TEMPLATE, MEMORY_CONTEXT_TEMPLATE, QUICK_REPLIES
+from .memory import format_memories
+from .reply_cache import reply_cache
 
 def extract_time_from_message(message):
     """Extract time information from user message."""
@@ -65,7 +42,22 @@ def extract_time_from_message(message):
     
     return None
 
-async def generate_one_turn_response(user_message, persona="coach", default_time="30sec"):
+def quick_reply_response(option, persona="coach"):
+    """
+    The precomputed response to a quick-reply button (see QUICK_REPLIES), in the same shape
+    as generate_one_turn_response. time and nextCheckIn are None when no follow-up is due.
+    Raises KeyError for an unknown option.
+    """
+    if persona not in QUICK_REPLIES:
+        persona = "coach"
+    config = QUICK_REPLIES[persona][option]
+    return {
+        "reply": random.choice(config["replies"]),
+        "time": config["time"],
+        "nextCheckIn": config["nextCheckIn"]
+    }
+
+async def generate_one_turn_response(user_message, persona="coach", default_time="30sec", memories=None, cached_only=False):
     """
     Generate a one-turn response based on user message and persona.
     
@@ -73,6 +65,10 @@ async def generate_one_turn_response(user_message, persona="coach", default_time
         user_message (str): The user's message
         persona (str): The persona to use ("coach", "mindful", "drill")
         default_time (str): Default time period if no time is mentioned (default: "30sec")
+        memories (list): Recalled memories from llm.memory, most relevant first (optional).
+            Not used for short check-ins answered through the shared reply cache.
+        cached_only (bool): Answer from the reply cache or with the generic reply, never
+            calling the LLM (used for users over their daily token quota, see llm.usage).
     
     Returns:
         dict: {
@@ -87,6 +83,25 @@ async def generate_one_turn_response(user_message, persona="coach", default_time
             persona = "coach"
         
         persona_config = PERSONAS[persona]
+
+        # Repetitive check-ins are answered from the reply cache once it has a few variants
+        cache_lookup = reply_cache.lookup(persona, user_message, extract_time_from_message(user_message))
+        if cache_lookup is not None:
+            if cache_lookup.reply is not None:
+                return cache_lookup.reply
+            # The reply will be shared with other users, so it can't draw on this user's memories
+            memories = None
+
+        if cached_only:
+            return {
+                "reply": "Thanks for the update!",
+                "time": extract_time_from_message(user_message) or default_time,
+                "nextCheckIn": "What's next on your agenda?"
+            }
+        
+        # Recalled memories, capped at MEMORY_MAX_CHARS
+        memory_lines = format_memories(memories) if memories else ""
+        memory_context = MEMORY_CONTEXT_TEMPLATE.format(memories=memory_lines) if memory_lines else ""
         
         # Create prompt for LLM using the template
         prompt = ONE_TURN_CALL_TEMPLATE.format(
@@ -94,13 +109,14 @@ async def generate_one_turn_response(user_message, persona="coach", default_time
             persona_description=persona_config["description"],
             persona_tone=persona_config["tone"],
             persona_examples=persona_config["examples"],
+            memory_context=memory_context,
             user_message=user_message,
             time_period=default_time,  # Pass default time to LLM to use if no time found
             default_time=default_time
         )
 
         # Get LLM response
-        llm_response = await chat(prompt, temperature=0.8)
+        llm_response = await chat("one_turn", prompt, input_chars=len(user_message), persona=persona)
         
         if not llm_response:
             return {
@@ -112,11 +128,14 @@ async def generate_one_turn_response(user_message, persona="coach", default_time
         # Parse JSON response
         try:
             parsed_response = json.loads(llm_response.strip())
-            return {
+            response = {
                 "reply": parsed_response.get("reply", "Thanks for the update!"),
                 "time": parsed_response.get("time", default_time),  # LLM now determines the time
                 "nextCheckIn": parsed_response.get("nextCheckIn", "What's next on your agenda?")
             }
+            if cache_lookup is not None:
+                reply_cache.store(cache_lookup, response)
+            return response
         except json.JSONDecodeError:
             # Fallback if JSON parsing fails
             return {
@@ -163,4 +182,7 @@ async def main():
             print(f"   Next check-in: {response['nextCheckIn']}")
 
 if __name__ == "__main__":
+    # Run from the repo root: python -m llm.oneTurnCall
+    from dotenv import load_dotenv
+    load_dotenv()
     asyncio.run(main())
@@ -0,0 +1,241 @@
+"""
+Reply cache for repetitive check-ins ("took a short break", "back to work", "finished lunch").
+
+Messages are normalized (case, punctuation, filler words, durations, simple suffixes) and
+keyed on (persona, parsed duration, normalized text). Near duplicates that don't normalize
+to the same text are found with MinHash over character 3-grams, banded into an LSH index,
+and accepted if they differ by at most one word (or a misspelling), so "Taking a quick
+break!" finds the entry of "took a quick break" but "took a long break" doesn't.
+
+Each entry collects up to `variants` different LLM replies before it is served from, then
+hands them out in rotation so the same check-in doesn't always get the same answer.
+Entries expire after ttl_seconds and the least recently used are dropped beyond max_entries.
+
+Only short messages are cached, and the cache is shared by all users: replies built from a
+user's recalled memories must never be stored in it.
+"""
+import re
+import time
+import zlib
+from collections import OrderedDict
+from random import Random
+
+import numpy as np
+
+# Longer messages are personal enough to always get their own reply
+MAX_MESSAGE_CHARS = 80
+NUM_HASHES = 64
+BANDS = 16  # of NUM_HASHES // BANDS rows: pairs at Jaccard 0.6 become candidates ~90% of the time
+SIMILARITY_THRESHOLD = 0.6
+
+# a * crc32 + b stays below 2**63, so the hashes can be computed in uint64
+_PRIME = (1 << 31) - 1
+_rng = Random(20240611)  # fixed: signatures must be comparable across restarts and workers
+_A = np.array([_rng.randrange(1, _PRIME) for _ in range(NUM_HASHES)], dtype=np.uint64)[:, None]
+_B = np.array([_rng.randrange(0, _PRIME) for _ in range(NUM_HASHES)], dtype=np.uint64)[:, None]
+
+_DURATION = re.compile(r"\b\d+\s*(?::\s*\d+|hours?|hrs?|minutes?|mins?|seconds?|secs?|h|m|s)?\b")
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+_FILLER = frozenset(
+    "a an the i im i'm am is are was my me for to of at on in so and ok okay just now again "
+    "gonna going bit some really very lol haha yeah yep well then still ive i've".split()
+)
+_NEGATIONS = frozenset("not no never didn't didnt can't cant couldn't couldnt won't wont don't dont haven't havent".split())
+
+
+_IRREGULAR = {"took": "take", "went": "go", "got": "get", "ate": "eat", "did": "do", "done": "do", "began": "begin"}
+
+
+def stem(word):
+    """Crude stemmer, only ever compared with itself: taking/took/take -> tak, getting/got -> get."""
+    word = _IRREGULAR.get(word, word)
+    if word.endswith("ing") and len(word) > 5:
+        word = word[:-3]
+    elif word.endswith("ed") and len(word) > 4:
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        word = word[:-1]
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "aeiouls":
+        word = word[:-1]  # gett -> get
+    if len(word) > 3 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def normalize(message):
+    """Lowercased, stemmed words without punctuation, durations or filler words."""
+    text = _DURATION.sub(" ", message.lower().replace("’", "'"))
+    return " ".join(word if word in _NEGATIONS else stem(word) for word in _TOKEN.findall(text) if word not in _FILLER)
+
+
+def shingles(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def signature(normalized):
+    """MinHash signature of the character 3-grams of a normalized message."""
+    hashes = np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingles(normalized)), dtype=np.uint64)
+    return tuple(((_A * hashes + _B) % _PRIME).min(axis=1).tolist())
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def same_words(a, b):
+    """
+    Whether two normalized messages say the same thing: the same words except for one added
+    or dropped word ("took short break" / "short break") or one misspelled one. Similar
+    3-grams alone would also match "took short break" and "took long break".
+    """
+    only_a, only_b = set(a.split()) - set(b.split()), set(b.split()) - set(a.split())
+    if len(only_a) + len(only_b) <= 1:
+        return True
+    if len(only_a) == len(only_b) == 1:
+        x, y = shingles(only_a.pop()), shingles(only_b.pop())
+        return len(x & y) / len(x | y) >= 0.5
+    return False
+
+
+class CacheEntry:
+    def __init__(self, key, sig, now):
+        self.key = key
+        self.signature = sig
+        self.created = now
+        self.variants = []
+        self.next = 0
+        self.hits = 0
+
+
+class Lookup:
+    """Result of ReplyCache.lookup: the cached reply (None on a miss) and where to store a new one."""
+
+    def __init__(self, key, sig, entry=None, reply=None, similar=False):
+        self.key = key
+        self.signature = sig
+        self.entry = entry
+        self.reply = reply
+        self.similar = similar
+
+
+class ReplyCache:
+    def __init__(self, max_entries=10000, ttl_seconds=6 * 3600, variants=3, enabled=True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.variants = variants
+        self.enabled = enabled
+        self._entries = OrderedDict()  # key -> CacheEntry, least recently used first
+        self._bands = {}  # (persona, duration, band, rows) -> set of keys
+        self.lookups = 0
+        self.hits = 0
+        self.similar_hits = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def cacheable(self, message):
+        return self.enabled and len(message) <= MAX_MESSAGE_CHARS and bool(normalize(message))
+
+    def lookup(self, persona, message, duration=None):
+        """
+        Find a cached reply for the message. Returns None if the message isn't cacheable,
+        otherwise a Lookup; on a miss (Lookup.reply is None) pass it to store() with the new reply.
+        duration is the time parsed from the message, e.g. "30m" (see extract_time_from_message).
+        """
+        if not self.enabled or len(message) > MAX_MESSAGE_CHARS:
+            return None
+        normalized = normalize(message)
+        if not normalized:
+            return None
+        self.lookups += 1
+        now = time.monotonic()
+        key = (persona, duration, normalized)
+        entry = self._live(key, now)
+        sig = entry.signature if entry else signature(normalized)
+        similar = False
+        if entry is None:
+            entry = self._similar(persona, duration, normalized, sig, now)
+            similar = entry is not None
+        if entry is None or len(entry.variants) < self.variants:
+            # Still collecting variants: this one goes to the LLM too
+            return Lookup(key, sig, entry)
+
+        self._entries.move_to_end(entry.key)
+        reply = entry.variants[entry.next % len(entry.variants)]
+        entry.next += 1
+        entry.hits += 1
+        self.hits += 1
+        self.similar_hits += similar
+        return Lookup(key, sig, entry, dict(reply), similar)
+
+    def store(self, lookup, reply):
+        """Add an LLM reply as a variant of the entry lookup() found (or a new one)."""
+        entry = lookup.entry
+        if entry is None or entry.key not in self._entries:
+            entry = CacheEntry(lookup.key, lookup.signature, time.monotonic())
+            self._entries[entry.key] = entry
+            for band in self._band_keys(entry.key, entry.signature):
+                self._bands.setdefault(band, set()).add(entry.key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evicted += 1
+        if len(entry.variants) < self.variants and reply not in entry.variants:
+            entry.variants.append(dict(reply))
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "similarHits": self.similar_hits,
+            "hitRate": round(self.hits / self.lookups, 3) if self.lookups else None,
+            "llmCallsSaved": self.hits,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and now - entry.created > self.ttl_seconds:
+            self._remove(key)
+            self.expired += 1
+            return None
+        return entry
+
+    def _similar(self, persona, duration, normalized, sig, now):
+        negations = _NEGATIONS.intersection(normalized.split())
+        best, best_score = None, SIMILARITY_THRESHOLD
+        candidates = set()
+        for band in self._band_keys((persona, duration, normalized), sig):
+            candidates.update(self._bands.get(band, ()))
+        for key in candidates:
+            entry = self._live(key, now)
+            if entry is None:
+                continue
+            # "finished lunch" and "not finished lunch" share most of their words
+            if _NEGATIONS.intersection(key[2].split()) != negations or not same_words(normalized, key[2]):
+                continue
+            score = similarity(sig, entry.signature)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def _band_keys(self, key, sig):
+        rows = NUM_HASHES // BANDS
+        persona, duration, _ = key
+        return [(persona, duration, band, sig[band * rows:(band + 1) * rows]) for band in range(BANDS)]
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        for band in self._band_keys(key, entry.signature):
+            keys = self._bands.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._bands[band]
+
+
+# Shared by every one-turn reply in the process. The API configures it from its settings
+# on startup (REPLY_CACHE_* in the environment or .env, see api/settings.py)
+reply_cache = ReplyCache()
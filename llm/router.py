@@ -0,0 +1,223 @@
+import json
+import time
+
+from .llm_client import get_openai_client, track_call
+from .usage import usage_ledger
+
+# Model candidates per task, in order of preference. A candidate is only considered when the
+# request matches its conditions (min/max_input_chars on the user-supplied text, personas,
+# summary_lengths), and is skipped while it is degraded: its observed latency is over the
+# task's latency_budget (seconds) or its error rate is over max_error_rate.
+# A candidate may point at another OpenAI-compatible endpoint with base_url (+ api_key_env).
+# Replace the whole table with a JSON file of the same shape via LLM_ROUTES_FILE (see api/settings.py).
+MODEL_ROUTES = {
+    "one_turn": {
+        "latency_budget": 4.0,
+        "temperature": 0.8,
+        "candidates": [
+            # Long reflective messages get a stronger model in the mindful persona
+            {"model": "gpt-4.1-mini", "min_input_chars": 400, "personas": ["mindful"]},
+            # "Took a short break" doesn't need more than the smallest model
+            {"model": "gpt-4.1-nano", "max_input_chars": 200},
+            {"model": "gpt-4o-mini"},
+            {"model": "gpt-4.1-nano"},
+        ],
+    },
+    "rolling_summary": {
+        "latency_budget": 20.0,
+        "temperature": 0.3,
+        "candidates": [
+            {"model": "gpt-4.1-nano"},
+            {"model": "gpt-4o-mini"},
+        ],
+    },
+    "summary": {
+        "latency_budget": 15.0,
+        "temperature": 0.7,
+        "candidates": [
+            {"model": "gpt-4.1-mini", "summary_lengths": ["long"]},
+            {"model": "gpt-4o-mini"},
+            {"model": "gpt-4.1-mini"},
+        ],
+    },
+    "period_summary": {
+        "latency_budget": 30.0,
+        "temperature": 0.7,
+        "candidates": [
+            {"model": "gpt-4.1-mini", "summary_lengths": ["medium", "long"]},
+            {"model": "gpt-4o-mini"},
+            {"model": "gpt-4.1-mini"},
+        ],
+    },
+}
+
+# Weight of the newest call in the latency and error rate moving averages
+EWMA_ALPHA = 0.2
+# A degraded model gets one request every probe_interval seconds, to notice when it recovers
+PROBE_INTERVAL_SECONDS = 30.0
+
+
+def load_routes(path=None):
+    """MODEL_ROUTES, or the table in the JSON file at path."""
+    if not path:
+        return MODEL_ROUTES
+    with open(path) as f:
+        return json.load(f)
+
+
+class ModelHealth:
+    """Moving averages of one model's latency and error rate on one task."""
+
+    def __init__(self):
+        self.latency = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.last_call = 0.0
+        self.degraded = False
+        self.pending = {}  # start times of calls still running
+
+    def record(self, seconds, ok):
+        self.calls += 1
+        self.errors += not ok
+        self.latency = seconds if self.latency is None else (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * seconds
+        self.error_rate = (1 - EWMA_ALPHA) * self.error_rate + EWMA_ALPHA * (0.0 if ok else 1.0)
+
+    def reset(self):
+        self.latency = None
+        self.error_rate = 0.0
+
+    def is_degraded(self, latency_budget, max_error_rate, now):
+        if self.error_rate > max_error_rate or (self.latency is not None and self.latency > latency_budget):
+            return True
+        # Calls running past the budget give it away before they complete; a single slow
+        # outlier doesn't, so it takes at least two and a third of those running
+        overdue = sum(1 for started in self.pending.values() if now - started > latency_budget)
+        return overdue >= 2 and 3 * overdue >= len(self.pending)
+
+
+class ModelRouter:
+    """
+    Picks the model for each LLM call from the task's candidates and fails over between them.
+
+    Latency and errors are tracked per task and model, so traffic moves off a model as soon
+    as it gets slow or starts failing and comes back once probes see it healthy again.
+    """
+
+    def __init__(self, routes=None, max_error_rate=0.3, max_attempts=2, probe_interval=PROBE_INTERVAL_SECONDS):
+        self.routes = routes if routes is not None else MODEL_ROUTES
+        self.max_error_rate = max_error_rate
+        self.max_attempts = max_attempts
+        self.probe_interval = probe_interval
+        self._health = {}
+
+    def health(self, task, model):
+        key = (task, model)
+        if key not in self._health:
+            self._health[key] = ModelHealth()
+        return self._health[key]
+
+    def candidates(self, task, input_chars=0, persona=None, summary_length=None):
+        """Candidates for a request, in the order they will be tried."""
+        route = self.routes[task]
+        eligible, seen = [], set()
+        for candidate in route["candidates"]:
+            if candidate["model"] in seen:
+                continue
+            if input_chars < candidate.get("min_input_chars", 0):
+                continue
+            if "max_input_chars" in candidate and input_chars > candidate["max_input_chars"]:
+                continue
+            if persona and "personas" in candidate and persona not in candidate["personas"]:
+                continue
+            if summary_length and "summary_lengths" in candidate and summary_length not in candidate["summary_lengths"]:
+                continue
+            seen.add(candidate["model"])
+            eligible.append(candidate)
+
+        now = time.monotonic()
+        healthy, probes, degraded = [], [], []
+        for candidate in eligible:
+            health = self.health(task, candidate["model"])
+            was_degraded = health.degraded
+            health.degraded = health.is_degraded(route["latency_budget"], self.max_error_rate, now)
+            if health.degraded != was_degraded:
+                state = "degraded" if health.degraded else "recovered"
+                print(f"🔀 {candidate['model']} {state} for {task} "
+                      f"(latency {health.latency or 0:.1f}s, errors {health.error_rate:.0%})")
+            if not health.degraded:
+                healthy.append(candidate)
+            elif now - health.last_call >= self.probe_interval:
+                probes.append(candidate)
+            else:
+                degraded.append(candidate)
+        # Degraded models are the last resort, fastest and most reliable first. A model degraded
+        # only by overdue calls has no latency yet, and is slower than the budget anyway
+        def cost(candidate):
+            health = self.health(task, candidate["model"])
+            latency = health.latency if health.latency is not None else float("inf")
+            return latency * (1 + health.error_rate)
+        degraded.sort(key=cost)
+        return probes[:1] + healthy + probes[1:] + degraded
+
+    async def chat(self, task, message, input_chars=None, persona=None, summary_length=None, temperature=None):
+        """
+        Send a single-message chat completion for task. Returns the reply text, or None
+        if every model tried failed.
+        input_chars is the length of the user-supplied part of the message (defaults to all of it).
+        """
+        route = self.routes[task]
+        candidates = self.candidates(task, len(message) if input_chars is None else input_chars, persona, summary_length)
+        for candidate in candidates[:self.max_attempts]:
+            health = self.health(task, candidate["model"])
+            started = health.last_call = time.monotonic()
+            call = object()
+            health.pending[call] = started
+            try:
+                client = get_openai_client(candidate.get("base_url"), candidate.get("api_key_env")).with_options(
+                    # Fail over to the next model instead of retrying a struggling one
+                    max_retries=0,
+                    timeout=candidate.get("timeout", route.get("timeout", 2 * route["latency_budget"]))
+                )
+                async with track_call():
+                    response = await client.chat.completions.create(
+                        model=candidate["model"],
+                        messages=[{"role": "user", "content": message}],
+                        temperature=candidate.get("temperature", temperature if temperature is not None else route["temperature"])
+                    )
+            except Exception as e:
+                del health.pending[call]
+                health.record(time.monotonic() - started, ok=False)
+                print(f"❌ {candidate['model']} failed for {task}: {e}")
+                continue
+            del health.pending[call]
+            elapsed = time.monotonic() - started
+            if health.degraded and elapsed <= route["latency_budget"]:
+                # A probe came back healthy: trust it rather than waiting for the averages to decay
+                health.reset()
+            health.record(elapsed, ok=True)
+            usage_ledger.record_chat(task, response.usage)
+            return response.choices[0].message.content
+        return None
+
+    def stats(self):
+        """Per task and model: calls, errors, moving average latency and error rate."""
+        stats = {}
+        for (task, model), health in self._health.items():
+            stats.setdefault(task, {})[model] = {
+                "calls": health.calls,
+                "errors": health.errors,
+                "latencySeconds": round(health.latency, 3) if health.latency is not None else None,
+                "errorRate": round(health.error_rate, 3),
+                "degraded": health.degraded,
+            }
+        return stats
+
+
+# Shared by every LLM call in the process, so they all learn from the same observations
+router = ModelRouter()
+
+
+async def chat(task, message, **kwargs):
+    """Route a chat completion through the shared router. See ModelRouter.chat."""
+    return await router.chat(task, message, **kwargs)
@@ -1,57 +1,137 @@
 import os
+import re
 import json
 import asyncio
-from dotenv import load_dotenv
-from openai import AsyncOpenAI
-from PROMPTS import SUMMARY_TEMPLATE, PERSONAS, SUMMARY_CONFIGS
+from .router import chat
+from .PROMPTS import SUMMARY_TEMPLATE, ROLLING_SUMMARY_TEMPLATE, PERIOD_SUMMARY_TEMPLATE, PERSONAS, SUMMARY_CONFIGS
 
-load_dotenv()
+# Bot check-ins are trimmed to this many characters before they go into a prompt
+MAX_BOT_ENTRY_CHARS = 120
+# Word budget of the running notes kept for a day (see generate_rolling_summary)
+ROLLING_SUMMARY_MAX_WORDS = 250
 
-def get_openai_client():
-    """Get OpenAI client, raising an exception if API key is not found."""
-    if not os.getenv('OPENAI_API_KEY'):
-        raise ValueError("❌ OPENAI_API_KEY not found in environment variables")
-    return AsyncOpenAI()
+def compact_entry_content(entry):
+    """
+    Shorten a bot check-in: drop the "I'll check back in ..." line and, if it is still
+    long, keep only the first sentence. User entries are returned unchanged.
+    """
+    content = entry.get('content', 'No content')
+    if entry.get('role') != "bot":
+        return content
+    content = re.sub(r"\s*I'll check back in [^\n]*", "", content).strip()
+    if len(content) > MAX_BOT_ENTRY_CHARS:
+        content = re.split(r"(?<=[.!?])\s", content, maxsplit=1)[0]
+    if len(content) > MAX_BOT_ENTRY_CHARS:
+        content = content[:MAX_BOT_ENTRY_CHARS - 1].rstrip() + "…"
+    return content
 
-client = None
+def format_entries(entries):
+    """Render entries one per line for a prompt, with bot check-ins compacted."""
+    entries_text = ""
+    for entry in entries:
+        entries_text += f"[{entry.get('timestamp', 'Unknown')}] ({entry.get('source', 'unknown')}, {entry.get('role', 'unknown')}): {compact_entry_content(entry)}\n"
+    return entries_text
 
-async def chat(message):
-    try:
-        openai_client = get_openai_client()
-        response = await openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": message}],
-            temperature=0.7
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return None
+async def generate_rolling_summary(previous_summary, new_entries, max_words=ROLLING_SUMMARY_MAX_WORDS):
+    """
+    Fold new entries into a day's running notes.
+    
+    Args:
+        previous_summary (str): Running notes so far, or None at the start of the day
+        new_entries (list): Entries since the notes were last updated
+        max_words (int): Word budget for the updated notes
+    
+    Returns:
+        str: Updated running notes, or None if the LLM call failed
+    """
+    prompt = ROLLING_SUMMARY_TEMPLATE.format(
+        previous_summary=previous_summary or "(none yet)",
+        entries=format_entries(new_entries),
+        max_words=max_words
+    )
+    return await chat("rolling_summary", prompt)
 
-async def generate_summarizer(entries, summary_length="short", persona="coach"):
+async def generate_period_summary(summaries, period_label, period_name="week", summary_length="short", persona="coach"):
+    """
+    Reduce several summaries (daily, or intermediate ones) into one summary of a longer period.
+    
+    Args:
+        summaries (list): (label, summary text) pairs, e.g. ("2025-10-19", "...")
+        period_label (str): Human-readable period, e.g. "week of 2025-10-13"
+        period_name (str): "week" or "month"
+        summary_length (str): "short", "medium" or "long"
+        persona (str): The persona to use ("coach", "mindful", "drill")
+    
+    Returns:
+        str: The period summary, or None if the LLM call failed
+    """
     try:
-        entries_text = ""
-        for entry in entries:
-            entries_text += f"[{entry.get('timestamp', 'Unknown')}] ({entry.get('source', 'unknown')}, {entry.get('role', 'unknown')}): {entry.get('content', 'No content')}\n"
-        
         persona = persona if persona in PERSONAS else "coach"
         summary_length = summary_length if summary_length in SUMMARY_CONFIGS else "short"
         
         persona_config = PERSONAS[persona]
         summary_config = SUMMARY_CONFIGS[summary_length]
         
-        prompt = SUMMARY_TEMPLATE.format(
+        summaries_text = "\n\n".join(f"[{label}]\n{text}" for label, text in summaries)
+        prompt = PERIOD_SUMMARY_TEMPLATE.format(
             persona_name=persona_config["name"],
             persona_description=persona_config["description"],
             persona_tone=persona_config["tone"],
             persona_examples=persona_config["examples"],
+            period_label=period_label,
+            period_name=period_name,
             summary_length=summary_config["length"],
-            summary_goals=summary_config["goals"].format(persona_tone=persona_config["tone"]),
             summary_instruction=summary_config["instruction"],
-            entries=entries_text
+            summaries=summaries_text
         )
         
-        return await chat(prompt)
+        return await chat("period_summary", prompt, input_chars=len(summaries_text), persona=persona, summary_length=summary_length)
+        
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return None
+
+def build_summary_prompt(entries, summary_length="short", persona="coach", earlier_summary=None):
+    """
+    The end-of-day summary prompt, and the routing arguments for it.
+    
+    Returns:
+        tuple: (prompt, {"input_chars", "persona", "summary_length"}) as chat("summary", ...) takes them
+    """
+    entries_text = format_entries(entries)
+    if earlier_summary:
+        entries_text = (
+            f"Notes covering the earlier part of the day:\n{earlier_summary}\n\n"
+            f"Entries since then:\n{entries_text or '(none)'}"
+        )
+    
+    persona = persona if persona in PERSONAS else "coach"
+    summary_length = summary_length if summary_length in SUMMARY_CONFIGS else "short"
+    
+    persona_config = PERSONAS[persona]
+    summary_config = SUMMARY_CONFIGS[summary_length]
+    
+    prompt = SUMMARY_TEMPLATE.format(
+        persona_name=persona_config["name"],
+        persona_description=persona_config["description"],
+        persona_tone=persona_config["tone"],
+        persona_examples=persona_config["examples"],
+        summary_length=summary_config["length"],
+        summary_goals=summary_config["goals"].format(persona_tone=persona_config["tone"]),
+        summary_instruction=summary_config["instruction"],
+        entries=entries_text
+    )
+    return prompt, {"input_chars": len(entries_text), "persona": persona, "summary_length": summary_length}
+
+async def generate_summarizer(entries, summary_length="short", persona="coach", earlier_summary=None):
+    """
+    Generate the end-of-day summary.
+    If earlier_summary (the day's running notes) is given, entries only needs to hold the
+    tail of the day since those notes were written, which keeps the prompt size flat.
+    """
+    try:
+        prompt, routing = build_summary_prompt(entries, summary_length, persona, earlier_summary)
+        return await chat("summary", prompt, **routing)
         
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -59,23 +139,26 @@ async def generate_summarizer(entries, summary_length="short", persona="coach"):
 
 if __name__ == "__main__":
     import sys
+    from dotenv import load_dotenv
+    load_dotenv()
     
     # Print usage information
     if len(sys.argv) > 1 and sys.argv[1] in ["-h", "--help"]:
         print("📝 Daily Summary Generator")
-        print("Usage: python summarizer.py [summary_length] [persona]")
+        print("Usage: python -m llm.summarizer [summary_length] [persona]")
         print("\nArguments:")
         print("  summary_length: short, medium, long (default: short)")
         print("  persona: coach, mindful, drill (default: mindful)")
-        print("\nExample: python summarizer.py medium coach")
+        print("\nExample: python -m llm.summarizer medium coach")
         exit(0)
     
+    SAMPLE_ENTRIES_PATH = os.path.join(os.path.dirname(__file__), "sample_entries.json")
     summary_length = sys.argv[1] if len(sys.argv) > 1 else "short"
     persona = sys.argv[2] if len(sys.argv) > 2 else "mindful"
     
     async def main():
         try:
-            with open("sample_entries.json", 'r') as file:
+            with open(SAMPLE_ENTRIES_PATH, 'r') as file:
                 entries = json.load(file)
             
             # Generate summary
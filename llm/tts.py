@@ -1,26 +1,62 @@
 import os
+import shutil
+import asyncio
 import hashlib
 from datetime import datetime
-from dotenv import load_dotenv
-from openai import AsyncOpenAI
+from .llm_client import get_openai_client, track_call
+from .usage import usage_ledger
 
-load_dotenv()
+VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
 
-def get_openai_client():
-    """Get OpenAI client, raising an exception if API key is not found."""
-    if not os.getenv('OPENAI_API_KEY'):
-        raise ValueError("❌ OPENAI_API_KEY not found in environment variables")
-    return AsyncOpenAI()
+# Formats the speech API can return directly, and how we store/serve them
+AUDIO_FORMATS = {
+    "mp3": {"extension": "mp3", "media_type": "audio/mpeg"},
+    "opus": {"extension": "ogg", "media_type": "audio/ogg"},  # Opus in an Ogg container
+    "aac": {"extension": "aac", "media_type": "audio/aac"},
+}
 
-openai_client = None
+# Size/quality profile per summary length.
+# "bitrate" only applies when transcoding locally (TTS_TRANSCODE=true and ffmpeg installed).
+AUDIO_PROFILES = {
+    "short": {"model": "tts-1", "format": "opus", "bitrate": "16k"},
+    "medium": {"model": "tts-1", "format": "opus", "bitrate": "24k"},
+    "long": {"model": "tts-1", "format": "opus", "bitrate": "24k"},
+}
 
-def generate_filename(user="USER", custom_hash=None):
+# Raw output of the speech API when format is "pcm": 24kHz, 16-bit, mono
+PCM_SAMPLE_RATE = 24000
+
+def get_audio_profile(profile="short"):
+    """
+    Resolve a size/quality profile, applying the TTS_FORMAT override (e.g. "mp3" for the old behaviour).
     """
-    Generate filename in format: USER_DAY_HASH.mp3
+    config = dict(AUDIO_PROFILES.get(profile, AUDIO_PROFILES["short"]))
+    format_override = os.getenv("TTS_FORMAT")
+    if format_override in AUDIO_FORMATS:
+        config["format"] = format_override
+    config["transcode"] = (
+        config["format"] == "opus"
+        and os.getenv("TTS_TRANSCODE", "false").lower() in ("1", "true", "yes")
+        and shutil.which("ffmpeg") is not None
+    )
+    return config
+
+def media_type_for(filename):
+    """HTTP media type of a stored audio file, based on its extension."""
+    extension = os.path.splitext(filename)[1].lstrip(".")
+    for audio_format in AUDIO_FORMATS.values():
+        if audio_format["extension"] == extension:
+            return audio_format["media_type"]
+    return "application/octet-stream"
+
+def generate_filename(user="USER", custom_hash=None, extension="mp3"):
+    """
+    Generate filename in format: USER_DAY_HASH.<extension>
     
     Args:
         user (str): Username (default: "USER")
         custom_hash (str): Custom hash, if None will generate from current date
+        extension (str): File extension (default: "mp3")
     
     Returns:
         str: Formatted filename
@@ -30,9 +66,56 @@ def generate_filename(user="USER", custom_hash=None):
         today = datetime.now().strftime("%Y-%m-%d")
         custom_hash = hashlib.md5(today.encode()).hexdigest()[:8]
     
-    return f"{user}_{datetime.now().strftime('%Y%m%d')}_{custom_hash}.mp3"
+    return f"{user}_{datetime.now().strftime('%Y%m%d')}_{custom_hash}.{extension}"
+
+async def transcode_pcm_to_opus(pcm_bytes, bitrate="16k"):
+    """
+    Encode raw speech API PCM to low-bitrate Opus voice (Ogg container) with ffmpeg.
+    
+    Args:
+        pcm_bytes (bytes): 24kHz 16-bit mono PCM
+        bitrate (str): Target bitrate, e.g. "16k"
+    
+    Returns:
+        bytes: Ogg Opus audio
+    """
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-f", "s16le", "-ar", str(PCM_SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+        "-c:a", "libopus", "-b:a", bitrate, "-application", "voip",
+        "-f", "ogg", "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    encoded, errors = await process.communicate(pcm_bytes)
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {errors.decode(errors='replace').strip()}")
+    return encoded
 
-async def text_to_speech(text, voice="alloy", user="USER", custom_hash=None):
+async def synthesize_speech(text, voice="alloy", profile="short"):
+    """
+    Convert text to speech bytes using OpenAI's TTS API and the given size/quality profile.
+    
+    Returns:
+        tuple: (audio bytes, format name from AUDIO_FORMATS)
+    """
+    config = get_audio_profile(profile)
+    client = get_openai_client()
+    async with track_call():
+        response = await client.audio.speech.create(
+            model=config["model"], # tts-1, tts-1-hd
+            voice=voice, # alloy, echo, fable, onyx, nova, shimmer
+            input=text,
+            response_format="pcm" if config["transcode"] else config["format"]
+        )
+    usage_ledger.record_tts(len(text))
+    
+    if config["transcode"]:
+        return await transcode_pcm_to_opus(response.content, config["bitrate"]), "opus"
+    return response.content, config["format"]
+
+async def text_to_speech(text, voice="alloy", user="USER", custom_hash=None, profile="short"):
     """
     Convert text to speech using OpenAI's TTS API
     
@@ -41,48 +124,47 @@ async def text_to_speech(text, voice="alloy", user="USER", custom_hash=None):
         voice (str): Voice to use (alloy, echo, fable, onyx, nova, shimmer)
         user (str): Username for filename (default: "USER")
         custom_hash (str): Custom hash for filename, if None will generate from date
+        profile (str): Size/quality profile from AUDIO_PROFILES, normally the summary length
     
     Returns:
         str: Path to the generated audio file, or None if failed
     """
     try:
+        audio_bytes, audio_format = await synthesize_speech(text, voice=voice, profile=profile)
+        
         # Generate filename and ensure audio directory exists
-        filename = generate_filename(user, custom_hash)
+        filename = generate_filename(user, custom_hash, extension=AUDIO_FORMATS[audio_format]["extension"])
         audio_dir = "audio"
         os.makedirs(audio_dir, exist_ok=True)
         output_file = os.path.join(audio_dir, filename)
         
-        client = get_openai_client()
-        response = await client.audio.speech.create(
-            model="tts-1", # tts-1-hd, 
-            voice=voice, # alloy, echo, fable, onyx, nova, shimmer
-            input=text
-        )
-        
         # Save the audio file
         with open(output_file, "wb") as f:
-            f.write(response.content)
+            f.write(audio_bytes)
         
-        print(f"🎵 Audio saved to: {output_file}")
+        print(f"🎵 Audio saved to: {output_file} ({len(audio_bytes)} bytes, {audio_format})")
         return output_file
         
     except Exception as e:
         print(f"❌ TTS Error: {e}")
         return None
+
 if __name__ == "__main__":
     import asyncio
     import sys
+    from dotenv import load_dotenv
+    load_dotenv()
     
     # Print usage information
     if len(sys.argv) > 1 and sys.argv[1] in ["-h", "--help"]:
         print("🎵 Text-to-Speech Generator")
-        print("Usage: python tts.py [voice] [user] [custom_hash]")
+        print("Usage: python -m llm.tts [voice] [user] [custom_hash]")
         print("\nArguments:")
         print("  voice: alloy, echo, fable, onyx, nova, shimmer (default: alloy)")
         print("  user: Username for filename (default: USER)")
         print("  custom_hash: Custom hash for filename (default: auto-generated)")
-        print("\nExample: python tts.py nova john abc123")
-        print("Output: audio/USER_20241225_abc123.mp3")
+        print("\nExample: python -m llm.tts nova john abc123")
+        print("Output: audio/USER_20241225_abc123.ogg (format set by TTS_FORMAT / AUDIO_PROFILES)")
         print("\nNote: Text will be read from stdin")
         exit(0)
     
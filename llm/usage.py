@@ -0,0 +1,123 @@
+"""
+Usage ledger: chat completion tokens and calls, and TTS characters and calls, per user per
+UTC day, so OpenAI spend can be traced back to users and capped with daily quotas.
+
+Calls are attributed to the user set with for_user() around the work done for them; it is a
+context variable, so it follows the request into chat() and synthesize_speech() without
+being passed through every helper. Calls outside for_user() are counted under UNATTRIBUTED.
+
+Counts accumulate in memory and are handed out in batches by take_pending() (the API writes
+them as $inc updates, see api/usage_ledger.py). Quota checks add this worker's pending counts
+to the day's totals as of the last flush, so other workers' usage is seen with a delay of
+one flush interval: quotas are soft limits that switch a user to cheaper behaviour.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+UNATTRIBUTED = "_unattributed"
+
+_current_user = ContextVar("usage_user", default=None)
+
+
+@contextmanager
+def for_user(discord_id):
+    """Attribute the LLM and TTS calls made inside the block to discord_id."""
+    token = _current_user.set(discord_id)
+    try:
+        yield
+    finally:
+        _current_user.reset(token)
+
+
+def current_user():
+    return _current_user.get()
+
+
+def usage_day():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class UsageLedger:
+    def __init__(self, daily_token_quota=0, daily_tts_char_quota=0):
+        # 0 means no quota
+        self.daily_token_quota = daily_token_quota
+        self.daily_tts_char_quota = daily_tts_char_quota
+        self._pending = {}  # (discordId, date) -> {field: amount}
+        self._flushed = {}  # (discordId, date) -> day totals as of the last flush
+        self.degraded = {"tokens": 0, "tts": 0}
+
+    def _add(self, fields):
+        key = (current_user() or UNATTRIBUTED, usage_day())
+        counts = self._pending.setdefault(key, {})
+        for field, amount in fields.items():
+            counts[field] = counts.get(field, 0) + amount
+
+    def record_chat(self, task, usage):
+        """Count one chat completion; usage is the response's usage object (may be None)."""
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        self._add({
+            "llmCalls": 1,
+            "promptTokens": prompt,
+            "completionTokens": completion,
+            f"tasks.{task}.calls": 1,
+            f"tasks.{task}.tokens": prompt + completion,
+        })
+
+    def record_tts(self, chars):
+        self._add({"ttsCalls": 1, "ttsChars": chars})
+
+    def take_pending(self):
+        """The counts recorded since the last call, as {(discordId, date): {field: amount}}."""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending):
+        """Put back counts that couldn't be written, to go out with the next flush."""
+        for key, fields in pending.items():
+            counts = self._pending.setdefault(key, {})
+            for field, amount in fields.items():
+                counts[field] = counts.get(field, 0) + amount
+
+    def apply_totals(self, docs):
+        """Remember the stored day totals of ledger documents read after a flush."""
+        today = usage_day()
+        for key in [key for key in self._flushed if key[1] != today]:
+            del self._flushed[key]
+        for doc in docs:
+            self._flushed[(doc["_id"]["discordId"], doc["_id"]["date"])] = doc
+
+    def used(self, discord_id):
+        """Today's usage of a user: {"tokens", "ttsChars"}, including counts not flushed yet."""
+        key = (discord_id, usage_day())
+        flushed, pending = self._flushed.get(key, {}), self._pending.get(key, {})
+        return {
+            "tokens": sum(doc.get(field, 0) for doc in (flushed, pending) for field in ("promptTokens", "completionTokens")),
+            "ttsChars": flushed.get("ttsChars", 0) + pending.get("ttsChars", 0),
+        }
+
+    def over_token_quota(self, discord_id):
+        if not self.daily_token_quota or self.used(discord_id)["tokens"] < self.daily_token_quota:
+            return False
+        self.degraded["tokens"] += 1
+        return True
+
+    def over_tts_quota(self, discord_id):
+        if not self.daily_tts_char_quota or self.used(discord_id)["ttsChars"] < self.daily_tts_char_quota:
+            return False
+        self.degraded["tts"] += 1
+        return True
+
+    def stats(self):
+        return {
+            "dailyTokenQuota": self.daily_token_quota or None,
+            "dailyTtsCharQuota": self.daily_tts_char_quota or None,
+            "pendingUsers": len(self._pending),
+            "degraded": dict(self.degraded),
+        }
+
+
+# Shared by every LLM and TTS call in the process. The API sets the quotas from its settings
+# on startup (USAGE_DAILY_* in the environment or .env, see api/settings.py)
+usage_ledger = UsageLedger()
@@ -0,0 +1,292 @@
+"""
+On-demand profiling for a running process (the API workers and the Discord bot).
+
+Nothing here runs until an admin asks for a profile: the request hooks check a single
+attribute, the sampler thread only exists during a profile and tracemalloc is only on
+while a memory profile is being taken.
+
+- sample: a background thread records every thread's stack every few milliseconds.
+  Output is collapsed stacks ("frame;frame;frame count" per line), the input format of
+  flamegraph.pl, speedscope and inferno.
+- cprofile: deterministic cProfile of the event loop thread, as a pstats table (and the
+  raw pstats data for snakeviz/gprof2dot).
+- memory: tracemalloc snapshots at the start and end, diffed by line.
+- tasks: every asyncio task, grouped by coroutine and where it is waiting. Each pending
+  follow-up in the bot is a task, so this is where leaks and pile-ups show.
+
+Stdlib only, so the bot can import it without the API's dependencies; both the API and
+the bot import it from the repo root, like the llm package.
+"""
+import asyncio
+import cProfile
+import functools
+import inspect
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MODES = ("sample", "cprofile")
+# Upper bound for one profile, also when waiting for N requests that never come
+MAX_PROFILE_SECONDS = 120.0
+DEFAULT_PROFILE_SECONDS = 10.0
+SAMPLE_INTERVAL_SECONDS = 0.005
+# Frames kept per allocation while tracing memory; more is slower
+TRACEMALLOC_FRAMES = 5
+TOP = 25
+ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+
+def frame_label(code):
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def loop_idle_leaves():
+    """
+    (file, function) of the event loop thread's innermost frame while it waits for I/O,
+    called from a coroutine: select() under asyncio; uvloop waits in C, so there it is the
+    Python frame that started the loop.
+    """
+    idle = {("selectors.py", "select")}
+    frame, outermost = sys._getframe(), None
+    while frame is not None:
+        if frame.f_code.co_flags & inspect.CO_COROUTINE:
+            outermost = frame
+        frame = frame.f_back
+    runner = outermost.f_back if outermost is not None else None
+    if runner is not None and os.path.basename(runner.f_code.co_filename) != "events.py":
+        idle.add((os.path.basename(runner.f_code.co_filename), runner.f_code.co_name))
+    return idle
+
+
+def collapsed(counts):
+    """Counter of stacks -> collapsed stack text, one "frame;frame count" line per stack."""
+    return "\n".join(f"{stack} {count}" for stack, count in counts.most_common())
+
+
+class StackSampler:
+    """Counts the stacks of all threads from a background thread, every `interval` seconds."""
+
+    # Leaf frames of threads parked with nothing to do (thread pool workers, waits)
+    IDLE = {("thread.py", "_worker"), ("threading.py", "wait")}
+
+    def __init__(self, loop_thread, idle_leaves, interval=SAMPLE_INTERVAL_SECONDS):
+        self.loop_thread = loop_thread
+        self.idle_leaves = idle_leaves
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.loop_idle = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                if ident == self.loop_thread:
+                    # The event loop waiting for I/O has nothing to run
+                    self.loop_idle += leaf in self.idle_leaves
+                elif leaf in self.IDLE:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def report(self):
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames[1:]):
+                total[frame] += count
+        return {
+            "samples": self.samples,
+            "intervalMs": self.interval * 1000,
+            # Share of samples the event loop was running code rather than waiting for I/O
+            "loopBusy": round(1 - self.loop_idle / self.samples, 3) if self.samples else None,
+            "top": [{"function": frame, "ownSamples": count, "totalSamples": total[frame]}
+                    for frame, count in own.most_common(TOP)],
+            "collapsed": collapsed(self.stacks),
+        }
+
+
+class DeterministicProfiler:
+    """cProfile of the thread that starts it (the event loop)."""
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def report(self):
+        table = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=table)
+        stats.sort_stats("cumulative").print_stats(TOP)
+        return {
+            "calls": stats.total_calls,
+            "table": table.getvalue(),
+            "pstats": marshal.dumps(stats.stats),
+        }
+
+
+def memory_diff(before, after):
+    """Allocation growth by line between two tracemalloc snapshots, largest first."""
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+    diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "sizeDiffKB": round(stat.size_diff / 1024, 1),
+            "countDiff": stat.count_diff,
+            "sizeKB": round(stat.size / 1024, 1),
+        }
+        for stat in diff[:TOP]
+    ]
+
+
+def await_chain(coro):
+    """Frames of a suspended coroutine and everything it is awaiting, outermost first."""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return frames
+
+
+def task_report(limit=TOP):
+    """Every asyncio task of the running loop, grouped by coroutine and where it is waiting."""
+    groups = Counter()
+    stacks = Counter()
+    tasks = asyncio.all_tasks()
+    for task in tasks:
+        coro = task.get_coro()
+        frames = await_chain(coro)
+        name = getattr(coro, "__qualname__", type(coro).__name__)
+        # Where our code waits: the innermost frame that isn't asyncio itself (e.g. its sleep())
+        own = [frame for frame in frames if not frame.f_code.co_filename.startswith(ASYNCIO_DIR)] or frames
+        waiting_at = f"{os.path.basename(own[-1].f_code.co_filename)}:{own[-1].f_lineno}" if own else None
+        groups[(name, waiting_at)] += 1
+        stacks[";".join([name] + [frame_label(frame.f_code) for frame in frames[1:]])] += 1
+    return {
+        "tasks": len(tasks),
+        "groups": [{"coroutine": name, "waitingAt": waiting_at, "count": count}
+                   for (name, waiting_at), count in groups.most_common(limit)],
+        "collapsed": collapsed(stacks),
+    }
+
+
+class Profiler:
+    """One profile at a time per process, driven by profile() and the request hooks."""
+
+    def __init__(self):
+        self.active = False
+        self._remaining = None
+        self._done = None
+
+    def request_finished(self):
+        """Request hook: call when a request (API call, bot message) has been handled."""
+        if self._remaining is not None:
+            self._remaining -= 1
+            if self._remaining <= 0:
+                self._done.set()
+
+    def counted(self, handler):
+        """Wrap an async handler so each call counts as a request for an active profile."""
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            if not self.active:
+                return await handler(*args, **kwargs)
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                self.request_finished()
+        return wrapper
+
+    async def profile(self, seconds=None, requests=None, mode="sample", memory=False):
+        """
+        Profile this process for `seconds`, or until `requests` more requests have finished
+        (whichever comes first if both are given; at most MAX_PROFILE_SECONDS).
+        Returns the report; raises RuntimeError if a profile is already running.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {mode} (use one of {', '.join(MODES)})")
+        if self.active:
+            raise RuntimeError("A profile is already running")
+        if seconds is None:
+            seconds = MAX_PROFILE_SECONDS if requests else DEFAULT_PROFILE_SECONDS
+        seconds = min(seconds, MAX_PROFILE_SECONDS)
+
+        self.active = True
+        self._remaining = requests
+        self._done = asyncio.Event()
+        started_tracing = memory and not tracemalloc.is_tracing()
+        try:
+            if started_tracing:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            before = await asyncio.to_thread(tracemalloc.take_snapshot) if memory else None
+            collector = StackSampler(threading.get_ident(), loop_idle_leaves()) if mode == "sample" else DeterministicProfiler()
+            started = time.monotonic()
+            collector.start()
+            try:
+                await asyncio.wait_for(self._done.wait(), timeout=seconds)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                collector.stop()
+            elapsed = time.monotonic() - started
+            report = {
+                "pid": os.getpid(),
+                "mode": mode,
+                "seconds": round(elapsed, 3),
+                "requests": requests - max(self._remaining, 0) if requests else None,
+                **collector.report(),
+            }
+            if memory:
+                after = await asyncio.to_thread(tracemalloc.take_snapshot)
+                current, peak = tracemalloc.get_traced_memory()
+                report["memory"] = {
+                    "tracedKB": round(current / 1024, 1),
+                    "peakKB": round(peak / 1024, 1),
+                    "top": await asyncio.to_thread(memory_diff, before, after),
+                }
+            return report
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            self.active = False
+            self._remaining = None
+
+
+# Shared by the request hooks and the admin endpoints/commands of the process
+profiler = Profiler()